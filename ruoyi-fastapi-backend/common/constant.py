@@ -83,6 +83,8 @@ class JobConstant:
 
     JOB_ERROR_LIST: 定时任务禁止调用模块及违规字符串列表
     JOB_WHITE_LIST: 定时任务允许调用模块列表
+    QUEUE_TUSHARE_DOWNLOAD: 任务执行队列（Tushare下载任务）
+    QUEUE_FACTOR_TASK: 任务执行队列（因子计算任务）
     """
 
     JOB_ERROR_LIST = [
@@ -131,6 +133,8 @@ class JobConstant:
         ' ',
     ]
     JOB_WHITE_LIST = ['module_task']
+    QUEUE_TUSHARE_DOWNLOAD = 'tushare_download'
+    QUEUE_FACTOR_TASK = 'factor_task'
 
 
 class MenuConstant:
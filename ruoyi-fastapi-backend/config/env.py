@@ -23,6 +23,10 @@ class AppSettings(BaseSettings):
     app_reload: bool = True
     app_ip_location_query: bool = True
     app_same_time_login: bool = True
+    app_job_queue_workers: str = 'tushare_download:2,factor_task:1'
+    app_job_queue_max_pending: int = 100
+    app_job_queue_poll_interval: int = 5
+    app_job_queue_heartbeat_timeout: int = 60
 
 
 class JwtSettings(BaseSettings):
@@ -52,6 +56,8 @@ class DataBaseSettings(BaseSettings):
     db_pool_size: int = 50
     db_pool_recycle: int = 3600
     db_pool_timeout: int = 30
+    db_worker_pool_size: int = 20
+    db_worker_max_overflow: int = 10
 
     @computed_field
     @property
@@ -79,6 +85,32 @@ class TushareSettings(BaseSettings):
     """
 
     tushare_token: str = ''
+    tushare_api_max_workers: int = 16
+    tushare_rate_limit: int = 200
+    tushare_rate_limit_backoff: int = 5
+    tushare_rate_limit_max_backoff: int = 60
+    tushare_rate_limit_max_retries: int = 5
+    tushare_cache_enabled: bool = True
+    tushare_cache_dir: str = 'vf_admin/tushare_cache'
+    tushare_cache_immutable_params: str = 'trade_date,end_date'
+    tushare_cache_mutable_apis: str = ''
+    tushare_cache_ttl: int = 3600
+    tushare_cache_max_size_mb: int = 2048
+    tushare_checkpoint_interval: int = 200
+    tushare_stream_chunk_size: int = 50
+    tushare_spill_dir: str = 'vf_admin/tushare_spill'
+    tushare_bulk_load_enabled: bool = True
+    tushare_bulk_load_batch_size: int = 1000
+    tushare_schema_cache_ttl: int = 300
+    tushare_compact_float_enabled: bool = False
+    tushare_partitioned_tables: str = ''
+    tushare_workflow_max_parallel_steps: int = 4
+    tushare_http_url: str = 'http://api.waditu.com/dataapi'
+    tushare_http_timeout: int = 30
+    tushare_http_max_connections: int = 20
+    tushare_gap_planner_enabled: bool = False
+    tushare_gap_planner_apis: str = 'daily,pro_bar'
+    tushare_trade_cal_table: str = 'tushare_trade_cal'
 
 
 class GenSettings:
@@ -0,0 +1,250 @@
+import asyncio
+import importlib
+import json
+import os
+import socket
+from collections.abc import Callable
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config.database import AsyncSessionLocal
+from config.env import AppConfig
+from config.get_worker import WorkerUtil
+from module_admin.dao.job_queue_dao import JobQueueDao
+from utils.log_util import logger
+
+
+class JobQueueUtil:
+    """
+    任务执行队列相关方法
+
+    手动执行的任务先写入任务执行队列表（sys_job_queue），由常驻在后台任务运行时中的调度协程领取执行：
+    - 每个队列按配置的并发上限执行（按数据库中所有执行实例的运行中任务计数），优先级高的先执行
+    - 提交任务、任务结束时立即调度，另外按固定间隔轮询
+    - 运行中的任务在数据库中被取消时，取消对应的协程，协程退出后才释放去重键
+    - 每次调度更新本实例运行中任务的心跳，心跳超时（执行实例已退出）的任务重新进入等待状态
+    """
+
+    _loop: asyncio.AbstractEventLoop | None = None
+    _wakeup: asyncio.Event | None = None
+    _dispatcher: Future | None = None
+    # 执行实例标识：主机名:进程号
+    _worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    # 本进程运行中的队列任务：队列任务id -> (队列名称, 任务的 Task 对象)
+    _running: dict[int, tuple[str, asyncio.Task]] = {}
+    # 本进程已请求取消、尚未退出的队列任务id
+    _cancelling: set[int] = set()
+
+    @classmethod
+    async def init_job_queue(cls) -> None:
+        """
+        应用启动时恢复心跳超时的任务并启动队列调度
+
+        :return:
+        """
+        logger.info('🔎 开始启动任务执行队列...')
+        async with AsyncSessionLocal() as session:
+            await cls._requeue_stale_jobs(session)
+        cls._dispatcher = WorkerUtil.start_service('job_queue_dispatcher', cls._dispatch_loop)
+        logger.info('✅️ 任务执行队列启动成功')
+
+    @classmethod
+    async def close_job_queue(cls) -> None:
+        """
+        应用关闭时停止队列调度（运行中的任务心跳超时后重新执行）
+
+        :return:
+        """
+        if cls._dispatcher is not None:
+            cls._dispatcher.cancel()
+            cls._dispatcher = None
+        logger.info('✅️ 关闭任务执行队列成功')
+
+    @classmethod
+    def notify(cls) -> None:
+        """
+        唤醒队列调度（线程安全）
+
+        :return:
+        """
+        if cls._loop is not None and cls._wakeup is not None and not cls._loop.is_closed():
+            cls._loop.call_soon_threadsafe(cls._wakeup.set)
+
+    @classmethod
+    def get_queue_max_workers(cls, queue_name: str) -> int:
+        """
+        获取队列的并发上限（未配置的队列为1）
+
+        :param queue_name: 队列名称
+        :return: 并发上限
+        """
+        for item in (AppConfig.app_job_queue_workers or '').split(','):
+            name, _, workers = item.strip().partition(':')
+            if name.strip() == queue_name and workers.strip().isdigit():
+                return max(int(workers.strip()), 1)
+        return 1
+
+    @classmethod
+    def _import_function(cls, func_path: str) -> Callable[..., Any]:
+        """
+        动态导入函数
+
+        :param func_path: 函数字符串，如module_tushare.task.tushare_download_task.download_tushare_data
+        :return: 导入的函数对象
+        """
+        module_path, func_name = func_path.rsplit('.', 1)
+        module = importlib.import_module(module_path)
+        return getattr(module, func_name)
+
+    @classmethod
+    async def _requeue_stale_jobs(cls, session: AsyncSession) -> None:
+        """
+        恢复心跳超时的队列任务（其他执行实例或本实例重启前的运行中任务）
+
+        :param session: 数据库会话
+        :return:
+        """
+        stale_before = datetime.now() - timedelta(seconds=AppConfig.app_job_queue_heartbeat_timeout)
+        requeue_count = await JobQueueDao.requeue_stale_job_queue_dao(session, stale_before)
+        await session.commit()
+        if requeue_count:
+            logger.info(f'📋 已将 {requeue_count} 个心跳超时的队列任务重新加入等待队列')
+
+    @classmethod
+    async def _dispatch_loop(cls, session_factory: async_sessionmaker) -> None:
+        """
+        队列调度协程（运行在后台任务运行时的事件循环中）
+
+        :param session_factory: 共享连接池的会话工厂
+        :return:
+        """
+        cls._loop = asyncio.get_running_loop()
+        cls._wakeup = asyncio.Event()
+        while True:
+            try:
+                await cls._dispatch_once(session_factory)
+            except Exception as e:
+                logger.exception(f'任务执行队列调度失败: {e}')
+            try:
+                await asyncio.wait_for(cls._wakeup.wait(), timeout=AppConfig.app_job_queue_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            cls._wakeup.clear()
+
+    @classmethod
+    async def _dispatch_once(cls, session_factory: async_sessionmaker) -> None:
+        """
+        执行一次调度：更新本实例运行中任务的心跳，取消已被取消的运行中任务，恢复心跳超时的任务，
+        并按并发上限领取等待中的任务
+
+        :param session_factory: 共享连接池的会话工厂
+        :return:
+        """
+        async with session_factory() as session:
+            if cls._running:
+                await JobQueueDao.touch_job_queue_dao(session, list(cls._running))
+                await session.commit()
+                status_map = await JobQueueDao.get_job_queue_status_map(session, list(cls._running))
+                for queue_id, status in status_map.items():
+                    if status == '4' and queue_id in cls._running and queue_id not in cls._cancelling:
+                        logger.info(f'队列任务 {queue_id} 已被取消，停止执行')
+                        cls._cancelling.add(queue_id)
+                        cls._running[queue_id][1].cancel()
+            await cls._requeue_stale_jobs(session)
+
+            for queue_name in await JobQueueDao.get_waiting_queue_name_list(session):
+                max_workers = cls.get_queue_max_workers(queue_name)
+                free_slots = max_workers - await JobQueueDao.count_running_job_queue(session, queue_name)
+                if free_slots <= 0:
+                    continue
+                # 提前提取字段，避免 commit 后访问 ORM 对象
+                waiting_jobs = [
+                    (
+                        item.queue_id,
+                        item.task_id,
+                        item.job_name or f'{queue_name}_{item.task_id}',
+                        item.invoke_target,
+                        item.job_kwargs,
+                    )
+                    for item in await JobQueueDao.get_waiting_job_queue_list(session, queue_name, free_slots)
+                ]
+                for queue_id, task_id, job_name, invoke_target, job_kwargs in waiting_jobs:
+                    # 其他执行实例可能同时在领取，领取前按数据库重新计数
+                    if await JobQueueDao.count_running_job_queue(session, queue_name) >= max_workers:
+                        break
+                    claimed = await JobQueueDao.claim_job_queue_dao(session, queue_id, cls._worker_id)
+                    await session.commit()
+                    if claimed:
+                        cls._start_job(
+                            session_factory, queue_id, queue_name, task_id, job_name, invoke_target, job_kwargs
+                        )
+
+    @classmethod
+    def _start_job(
+        cls,
+        session_factory: async_sessionmaker,
+        queue_id: int,
+        queue_name: str,
+        task_id: int,
+        job_name: str,
+        invoke_target: str,
+        job_kwargs: str | None,
+    ) -> None:
+        """
+        在后台任务运行时中执行领取到的队列任务
+
+        :param session_factory: 共享连接池的会话工厂
+        :param queue_id: 队列任务id
+        :param queue_name: 队列名称
+        :param task_id: 业务任务id
+        :param job_name: 任务名称
+        :param invoke_target: 调用目标字符串
+        :param job_kwargs: 关键字参数（JSON格式）
+        :return:
+        """
+        try:
+            job_func = cls._import_function(invoke_target)
+            kwargs = json.loads(job_kwargs) if job_kwargs else {}
+        except Exception as e:
+            logger.exception(f'队列任务 {queue_id} 的调用目标无效: {e}')
+            cls._loop.create_task(cls._finish_job(session_factory, queue_id, None, str(e)))
+            return
+
+        task = WorkerUtil.create_job_task(job_name, lambda session: job_func(task_id, session=session, **kwargs))
+        cls._running[queue_id] = (queue_name, task)
+        logger.info(f'队列 {queue_name} 开始执行任务 {job_name}（队列任务ID：{queue_id}）')
+        task.add_done_callback(lambda done: cls._loop.create_task(cls._finish_job(session_factory, queue_id, done)))
+
+    @classmethod
+    async def _finish_job(
+        cls, session_factory: async_sessionmaker, queue_id: int, task: asyncio.Task | None, error_message: str = ''
+    ) -> None:
+        """
+        记录队列任务的执行结果，释放去重键并唤醒调度（任务协程已经退出）
+
+        :param session_factory: 共享连接池的会话工厂
+        :param queue_id: 队列任务id
+        :param task: 任务的 Task 对象
+        :param error_message: 错误信息（任务未能启动时）
+        :return:
+        """
+        cls._running.pop(queue_id, None)
+        cls._cancelling.discard(queue_id)
+        failed = bool(error_message)
+        if task is not None and not task.cancelled() and task.exception() is not None:
+            failed = True
+            error_message = str(task.exception()) or type(task.exception()).__name__
+        try:
+            async with session_factory() as session:
+                # 被取消的任务状态已经是已取消
+                if task is None or not task.cancelled():
+                    await JobQueueDao.finish_job_queue_dao(session, queue_id, '3' if failed else '2', error_message)
+                await JobQueueDao.release_job_queue_dedup_key_dao(session, queue_id)
+                await session.commit()
+        except Exception as e:
+            logger.exception(f'更新队列任务 {queue_id} 的执行结果失败: {e}')
+        if cls._wakeup is not None:
+            cls._wakeup.set()
@@ -0,0 +1,244 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from config.database import ASYNC_SQLALCHEMY_DATABASE_URL
+from config.env import DataBaseConfig
+from module_tushare.task.tushare_http_client import TushareHttpClient
+from utils.log_util import logger
+
+
+class WorkerUtil:
+    """
+    后台任务运行时相关方法
+
+    在一个常驻线程中运行独立的事件循环，并持有一个按批量任务配置的数据库连接池。
+    定时任务和手动触发的任务（Tushare下载、因子计算、模型训练）都提交到这里执行，
+    不再为每次运行新建事件循环和连接池
+    """
+
+    _lock = threading.Lock()
+    _thread: threading.Thread | None = None
+    _loop: asyncio.AbstractEventLoop | None = None
+    _engine: AsyncEngine | None = None
+    _session_factory: async_sessionmaker | None = None
+    # 运行中的任务：任务序号 -> (任务名称, 开始时间)
+    _running_jobs: dict[int, tuple[str, float]] = {}
+    _job_seq = 0
+    _stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    @classmethod
+    def init_background_worker(cls) -> None:
+        """
+        启动后台任务运行时（已启动时直接返回，首次提交任务时也会自动启动）
+
+        :return:
+        """
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            logger.info('🔎 开始启动后台任务运行时...')
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=cls._run_loop, args=(loop, ready), daemon=True, name='BackgroundWorker')
+            thread.start()
+            ready.wait()
+            cls._loop = loop
+            cls._thread = thread
+        logger.info(
+            f'✅️ 后台任务运行时启动成功，连接池大小: {DataBaseConfig.db_worker_pool_size}，'
+            f'最大溢出连接数: {DataBaseConfig.db_worker_max_overflow}'
+        )
+
+    @classmethod
+    async def close_background_worker(cls) -> None:
+        """
+        应用关闭时关闭后台任务运行时
+
+        :return:
+        """
+        with cls._lock:
+            loop, thread = cls._loop, cls._thread
+            cls._loop = None
+            cls._thread = None
+        if loop is None or thread is None:
+            return
+        if cls._running_jobs:
+            logger.warning(f'关闭后台任务运行时，仍有任务在运行: {[name for name, _ in cls._running_jobs.values()]}')
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(cls._dispose(), loop)), 30)
+        except Exception as e:
+            logger.warning(f'释放后台任务运行时资源失败: {e}')
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(thread.join, 30)
+        logger.info('✅️ 关闭后台任务运行时成功')
+
+    @classmethod
+    def submit_job(cls, job_name: str, job_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]]) -> Future:
+        """
+        提交任务到后台任务运行时（不等待执行完成）
+
+        :param job_name: 任务名称（用于日志和运行指标）
+        :param job_func: 任务函数，接收一个使用共享连接池的数据库会话
+        :return: 任务的 Future 对象
+        """
+        cls.init_background_worker()
+        with cls._lock:
+            cls._stats['submitted'] += 1
+        return asyncio.run_coroutine_threadsafe(cls._run_job(job_name, job_func), cls._loop)
+
+    @classmethod
+    def create_job_task(
+        cls, job_name: str, job_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]]
+    ) -> asyncio.Task:
+        """
+        在后台任务运行时的事件循环中创建任务（只能在后台任务运行时中调用，如常驻服务协程中）
+
+        与 submit_job 返回的 Future 不同，取消返回的 Task 后，Task 在任务协程真正退出后才结束
+
+        :param job_name: 任务名称（用于日志和运行指标）
+        :param job_func: 任务函数，接收一个使用共享连接池的数据库会话
+        :return: 任务的 Task 对象
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not cls._loop:
+            raise RuntimeError('只能在后台任务运行时的事件循环中创建任务')
+        with cls._lock:
+            cls._stats['submitted'] += 1
+        return loop.create_task(cls._run_job(job_name, job_func))
+
+    @classmethod
+    def run_job(cls, job_name: str, job_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]]) -> Any:
+        """
+        提交任务到后台任务运行时并等待执行完成（供定时任务等同步入口调用）
+
+        :param job_name: 任务名称（用于日志和运行指标）
+        :param job_func: 任务函数，接收一个使用共享连接池的数据库会话
+        :return: 任务函数的返回值
+        """
+        if threading.current_thread() is cls._thread:
+            raise RuntimeError('不能在后台任务运行时线程中同步等待任务执行完成')
+        return cls.submit_job(job_name, job_func).result()
+
+    @classmethod
+    def start_service(
+        cls, service_name: str, service_func: Callable[[async_sessionmaker], Coroutine[Any, Any, Any]]
+    ) -> Future:
+        """
+        在后台任务运行时中启动常驻协程（如任务执行队列调度），不计入任务统计
+
+        :param service_name: 服务名称
+        :param service_func: 服务函数，接收共享连接池的会话工厂
+        :return: 服务的 Future 对象
+        """
+        cls.init_background_worker()
+        logger.info(f'后台任务运行时启动常驻服务: {service_name}')
+        return asyncio.run_coroutine_threadsafe(service_func(cls._session_factory), cls._loop)
+
+    @classmethod
+    def get_worker_metrics(cls) -> dict[str, Any]:
+        """
+        获取后台任务运行时的运行指标（连接池使用情况和任务统计）
+
+        :return: 运行指标
+        """
+        running = cls._thread is not None and cls._thread.is_alive()
+        pool_size = DataBaseConfig.db_worker_pool_size
+        max_overflow = DataBaseConfig.db_worker_max_overflow
+        checked_out = checked_in = overflow = 0
+        if running and cls._engine is not None:
+            pool = cls._engine.pool
+            pool_size = pool.size()
+            checked_out = pool.checkedout()
+            checked_in = pool.checkedin()
+            overflow = max(pool.overflow(), 0)
+        capacity = pool_size + max_overflow
+        now = time.monotonic()
+        with cls._lock:
+            running_jobs = [
+                {'job_name': name, 'duration': int(now - started)} for name, started in cls._running_jobs.values()
+            ]
+            stats = dict(cls._stats)
+        return {
+            'running': running,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'checked_out': checked_out,
+            'checked_in': checked_in,
+            'overflow': overflow,
+            'utilization': round(checked_out / capacity * 100, 2) if capacity > 0 else 0.0,
+            'running_jobs': running_jobs,
+            **stats,
+        }
+
+    @classmethod
+    def _run_loop(cls, loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        """
+        后台线程入口：创建共享引擎并持续运行事件循环
+
+        :param loop: 事件循环
+        :param ready: 启动完成事件
+        :return:
+        """
+        asyncio.set_event_loop(loop)
+        cls._engine = create_async_engine(
+            ASYNC_SQLALCHEMY_DATABASE_URL,
+            echo=DataBaseConfig.db_echo,
+            max_overflow=DataBaseConfig.db_worker_max_overflow,
+            pool_size=DataBaseConfig.db_worker_pool_size,
+            pool_recycle=DataBaseConfig.db_pool_recycle,
+            pool_timeout=DataBaseConfig.db_pool_timeout,
+            pool_pre_ping=True,
+        )
+        cls._session_factory = async_sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+            asyncio.set_event_loop(None)
+
+    @classmethod
+    async def _run_job(cls, job_name: str, job_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]]) -> Any:
+        """
+        在后台事件循环中执行任务
+
+        :param job_name: 任务名称
+        :param job_func: 任务函数
+        :return: 任务函数的返回值
+        """
+        with cls._lock:
+            cls._job_seq += 1
+            job_seq = cls._job_seq
+            cls._running_jobs[job_seq] = (job_name, time.monotonic())
+        try:
+            async with cls._session_factory() as session:
+                result = await job_func(session)
+            with cls._lock:
+                cls._stats['completed'] += 1
+            return result
+        except Exception as e:
+            with cls._lock:
+                cls._stats['failed'] += 1
+            logger.exception(f'后台任务 {job_name} 执行失败: {e}')
+            raise
+        finally:
+            with cls._lock:
+                cls._running_jobs.pop(job_seq, None)
+
+    @classmethod
+    async def _dispose(cls) -> None:
+        """
+        释放后台事件循环持有的资源（Tushare异步客户端和共享引擎）
+
+        :return:
+        """
+        await TushareHttpClient.close()
+        if cls._engine is not None:
+            await cls._engine.dispose()
+            cls._engine = None
@@ -21,9 +21,12 @@ from module_admin.entity.vo.job_vo import (
     JobLogPageQueryModel,
     JobModel,
     JobPageQueryModel,
+    JobQueueModel,
+    JobQueuePageQueryModel,
 )
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.job_log_service import JobLogService
+from module_admin.service.job_queue_service import JobQueueService
 from module_admin.service.job_service import JobService
 from utils.common_util import bytes2file_response
 from utils.log_util import logger
@@ -300,3 +303,61 @@ async def export_system_job_log_list(
     logger.info('导出成功')
 
     return ResponseUtil.streaming(data=bytes2file_response(job_log_export_result))
+
+
+@job_controller.get(
+    '/jobQueue/list',
+    summary='获取任务执行队列分页列表接口',
+    description='用于获取任务执行队列分页列表，可按队列名称、业务任务ID和状态查询',
+    response_model=PageResponseModel[JobQueueModel],
+    dependencies=[UserInterfaceAuthDependency('monitor:job:list')],
+)
+async def get_system_job_queue_list(
+    request: Request,
+    job_queue_page_query: Annotated[JobQueuePageQueryModel, Query()],
+    query_db: Annotated[AsyncSession, DBSessionDependency()],
+) -> Response:
+    # 获取分页数据
+    job_queue_page_query_result = await JobQueueService.get_job_queue_list_services(
+        query_db, job_queue_page_query, is_page=True
+    )
+    logger.info('获取成功')
+
+    return ResponseUtil.success(model_content=job_queue_page_query_result)
+
+
+@job_controller.put(
+    '/jobQueue/cancel/{queue_id}',
+    summary='取消队列任务接口',
+    description='用于取消等待或运行中的队列任务，运行中的任务会被中断',
+    response_model=ResponseBaseModel,
+    dependencies=[UserInterfaceAuthDependency('monitor:job:changeStatus')],
+)
+@Log(title='任务执行队列', business_type=BusinessType.UPDATE)
+async def cancel_system_job_queue(
+    request: Request,
+    queue_id: Annotated[int, Path(description='队列任务ID')],
+    query_db: Annotated[AsyncSession, DBSessionDependency()],
+) -> Response:
+    cancel_job_queue_result = await JobQueueService.cancel_job_queue_services(query_db, queue_id)
+    logger.info(cancel_job_queue_result.message)
+
+    return ResponseUtil.success(msg=cancel_job_queue_result.message)
+
+
+@job_controller.get(
+    '/jobQueue/{queue_id}',
+    summary='获取队列任务详情接口',
+    description='用于获取指定队列任务的状态和执行结果',
+    response_model=DataResponseModel[JobQueueModel],
+    dependencies=[UserInterfaceAuthDependency('monitor:job:query')],
+)
+async def query_detail_system_job_queue(
+    request: Request,
+    queue_id: Annotated[int, Path(description='队列任务ID')],
+    query_db: Annotated[AsyncSession, DBSessionDependency()],
+) -> Response:
+    job_queue_detail_result = await JobQueueService.job_queue_detail_services(query_db, queue_id)
+    logger.info(f'获取queue_id为{queue_id}的信息成功')
+
+    return ResponseUtil.success(data=job_queue_detail_result)
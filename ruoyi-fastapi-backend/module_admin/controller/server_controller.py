@@ -4,7 +4,7 @@ from common.aspect.interface_auth import UserInterfaceAuthDependency
 from common.aspect.pre_auth import PreAuthDependency
 from common.router import APIRouterPro
 from common.vo import DataResponseModel
-from module_admin.entity.vo.server_vo import ServerMonitorModel
+from module_admin.entity.vo.server_vo import ServerMonitorModel, WorkerMonitorModel
 from module_admin.service.server_service import ServerService
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
@@ -27,3 +27,17 @@ async def get_monitor_server_info(request: Request) -> Response:
     logger.info('获取成功')
 
     return ResponseUtil.success(data=server_info_query_result)
+
+
+@server_controller.get(
+    '/worker',
+    summary='获取后台任务运行时监控信息接口',
+    description='用于获取后台任务运行时的连接池使用情况和运行中的任务',
+    response_model=DataResponseModel[WorkerMonitorModel],
+    dependencies=[UserInterfaceAuthDependency('monitor:server:list')],
+)
+async def get_monitor_worker_info(request: Request) -> Response:
+    worker_info_query_result = await ServerService.get_worker_monitor_info()
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=worker_info_query_result)
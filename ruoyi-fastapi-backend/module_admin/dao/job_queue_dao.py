@@ -0,0 +1,318 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, case, desc, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.vo import PageModel
+from module_admin.entity.do.job_do import SysJobQueue
+from module_admin.entity.vo.job_vo import JobQueueModel, JobQueuePageQueryModel
+from utils.page_util import PageUtil
+
+# 等待和运行中的状态（参与去重）
+INFLIGHT_STATUSES = ('0', '1')
+
+
+class JobQueueDao:
+    """
+    任务执行队列模块数据库操作层
+    """
+
+    @classmethod
+    async def get_job_queue_detail_by_id(cls, db: AsyncSession, queue_id: int) -> SysJobQueue | None:
+        """
+        根据队列任务id获取队列任务详细信息
+
+        :param db: orm对象
+        :param queue_id: 队列任务id
+        :return: 队列任务信息对象
+        """
+        job_queue_info = (
+            (await db.execute(select(SysJobQueue).where(SysJobQueue.queue_id == queue_id))).scalars().first()
+        )
+
+        return job_queue_info
+
+    @classmethod
+    async def get_inflight_job_queue(cls, db: AsyncSession, queue_name: str, task_id: int) -> SysJobQueue | None:
+        """
+        获取同一业务任务等待或运行中的队列任务
+
+        :param db: orm对象
+        :param queue_name: 队列名称
+        :param task_id: 业务任务id
+        :return: 队列任务信息对象
+        """
+        job_queue_info = (
+            (
+                await db.execute(
+                    select(SysJobQueue).where(
+                        SysJobQueue.queue_name == queue_name,
+                        SysJobQueue.task_id == task_id,
+                        SysJobQueue.status.in_(INFLIGHT_STATUSES),
+                    )
+                )
+            )
+            .scalars()
+            .first()
+        )
+
+        return job_queue_info
+
+    @classmethod
+    async def count_pending_job_queue(cls, db: AsyncSession, queue_name: str) -> int:
+        """
+        统计队列中等待执行的任务数
+
+        :param db: orm对象
+        :param queue_name: 队列名称
+        :return: 等待执行的任务数
+        """
+        pending_count = (
+            await db.execute(
+                select(func.count('*'))
+                .select_from(SysJobQueue)
+                .where(SysJobQueue.queue_name == queue_name, SysJobQueue.status == '0')
+            )
+        ).scalar()
+
+        return pending_count or 0
+
+    @classmethod
+    async def get_job_queue_list(
+        cls, db: AsyncSession, query_object: JobQueuePageQueryModel, is_page: bool = False
+    ) -> PageModel | list[dict[str, Any]]:
+        """
+        根据查询参数获取队列任务列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 队列任务列表信息对象
+        """
+        query = (
+            select(SysJobQueue)
+            .where(
+                SysJobQueue.queue_name == query_object.queue_name if query_object.queue_name else True,
+                SysJobQueue.task_id == query_object.task_id if query_object.task_id else True,
+                SysJobQueue.job_name.like(f'%{query_object.job_name}%') if query_object.job_name else True,
+                SysJobQueue.status == query_object.status if query_object.status else True,
+            )
+            .order_by(desc(SysJobQueue.queue_id))
+        )
+        job_queue_list: PageModel | list[dict[str, Any]] = await PageUtil.paginate(
+            db, query, query_object.page_num, query_object.page_size, is_page
+        )
+
+        return job_queue_list
+
+    @classmethod
+    async def add_job_queue_dao(cls, db: AsyncSession, job_queue: JobQueueModel) -> SysJobQueue:
+        """
+        新增队列任务数据库操作
+
+        :param db: orm对象
+        :param job_queue: 队列任务对象
+        :return:
+        """
+        db_job_queue = SysJobQueue(**job_queue.model_dump(exclude_unset=True))
+        db.add(db_job_queue)
+        await db.flush()
+
+        return db_job_queue
+
+    @classmethod
+    async def get_waiting_queue_name_list(cls, db: AsyncSession) -> list[str]:
+        """
+        获取有等待执行任务的队列名称
+
+        :param db: orm对象
+        :return: 队列名称列表
+        """
+        queue_name_list = (
+            (await db.execute(select(SysJobQueue.queue_name).where(SysJobQueue.status == '0').distinct()))
+            .scalars()
+            .all()
+        )
+
+        return list(queue_name_list)
+
+    @classmethod
+    async def get_waiting_job_queue_list(cls, db: AsyncSession, queue_name: str, limit: int) -> list[SysJobQueue]:
+        """
+        按优先级获取队列中等待执行的任务（优先级高的先执行，同优先级先提交的先执行）
+
+        :param db: orm对象
+        :param queue_name: 队列名称
+        :param limit: 获取数量
+        :return: 队列任务列表
+        """
+        job_queue_list = (
+            (
+                await db.execute(
+                    select(SysJobQueue)
+                    .where(SysJobQueue.queue_name == queue_name, SysJobQueue.status == '0')
+                    .order_by(desc(SysJobQueue.priority), SysJobQueue.queue_id)
+                    .limit(limit)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        return list(job_queue_list)
+
+    @classmethod
+    async def count_running_job_queue(cls, db: AsyncSession, queue_name: str) -> int:
+        """
+        统计队列中占用并发数的任务数（所有执行实例运行中的任务，以及已取消但尚未结束执行的任务）
+
+        :param db: orm对象
+        :param queue_name: 队列名称
+        :return: 占用并发数的任务数
+        """
+        running_count = (
+            await db.execute(
+                select(func.count('*'))
+                .select_from(SysJobQueue)
+                .where(
+                    SysJobQueue.queue_name == queue_name,
+                    or_(
+                        SysJobQueue.status == '1',
+                        and_(SysJobQueue.status == '4', SysJobQueue.dedup_key.is_not(None)),
+                    ),
+                )
+            )
+        ).scalar()
+
+        return running_count or 0
+
+    @classmethod
+    async def claim_job_queue_dao(cls, db: AsyncSession, queue_id: int, worker_id: str) -> bool:
+        """
+        领取等待执行的队列任务（条件更新，同一任务只会被领取一次）
+
+        :param db: orm对象
+        :param queue_id: 队列任务id
+        :param worker_id: 执行实例标识
+        :return: 是否领取成功
+        """
+        now = datetime.now()
+        result = await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.queue_id == queue_id, SysJobQueue.status == '0')
+            .values(status='1', start_time=now, worker_id=worker_id, heartbeat_time=now)
+        )
+
+        return result.rowcount == 1
+
+    @classmethod
+    async def touch_job_queue_dao(cls, db: AsyncSession, queue_ids: list[int]) -> None:
+        """
+        更新执行实例运行中任务的心跳时间
+
+        :param db: orm对象
+        :param queue_ids: 队列任务id列表
+        :return:
+        """
+        if not queue_ids:
+            return
+        await db.execute(
+            update(SysJobQueue).where(SysJobQueue.queue_id.in_(queue_ids)).values(heartbeat_time=datetime.now())
+        )
+
+    @classmethod
+    async def finish_job_queue_dao(cls, db: AsyncSession, queue_id: int, status: str, error_message: str = '') -> None:
+        """
+        结束运行中的队列任务（已取消的任务不会被覆盖）
+
+        :param db: orm对象
+        :param queue_id: 队列任务id
+        :param status: 结束状态（2成功 3失败）
+        :param error_message: 错误信息
+        :return:
+        """
+        await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.queue_id == queue_id, SysJobQueue.status == '1')
+            .values(status=status, error_message=error_message[:2000], end_time=datetime.now())
+        )
+
+    @classmethod
+    async def release_job_queue_dedup_key_dao(cls, db: AsyncSession, queue_id: int) -> None:
+        """
+        释放已结束执行的队列任务的去重键
+
+        :param db: orm对象
+        :param queue_id: 队列任务id
+        :return:
+        """
+        await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.queue_id == queue_id, SysJobQueue.status.not_in(INFLIGHT_STATUSES))
+            .values(dedup_key=None)
+        )
+
+    @classmethod
+    async def cancel_job_queue_dao(cls, db: AsyncSession, queue_id: int) -> bool:
+        """
+        取消等待或运行中的队列任务（运行中任务的去重键在任务真正结束执行后释放）
+
+        :param db: orm对象
+        :param queue_id: 队列任务id
+        :return: 是否取消成功
+        """
+        # MySQL 按顺序计算赋值，去重键必须在状态之前根据原状态更新
+        result = await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.queue_id == queue_id, SysJobQueue.status.in_(INFLIGHT_STATUSES))
+            .ordered_values(
+                (SysJobQueue.dedup_key, case((SysJobQueue.status == '0', None), else_=SysJobQueue.dedup_key)),
+                (SysJobQueue.status, '4'),
+                (SysJobQueue.end_time, datetime.now()),
+            )
+        )
+
+        return result.rowcount == 1
+
+    @classmethod
+    async def get_job_queue_status_map(cls, db: AsyncSession, queue_ids: list[int]) -> dict[int, str]:
+        """
+        批量获取队列任务状态
+
+        :param db: orm对象
+        :param queue_ids: 队列任务id列表
+        :return: 队列任务id -> 状态
+        """
+        if not queue_ids:
+            return {}
+        rows = (
+            await db.execute(
+                select(SysJobQueue.queue_id, SysJobQueue.status).where(SysJobQueue.queue_id.in_(queue_ids))
+            )
+        ).all()
+
+        return {row[0]: row[1] for row in rows}
+
+    @classmethod
+    async def requeue_stale_job_queue_dao(cls, db: AsyncSession, stale_before: datetime) -> int:
+        """
+        恢复心跳超时（执行实例已退出）的队列任务：运行中的任务重置为等待状态，已取消的任务释放去重键
+
+        :param db: orm对象
+        :param stale_before: 心跳时间早于该时间视为超时
+        :return: 重置为等待状态的任务数
+        """
+        stale_condition = or_(SysJobQueue.heartbeat_time.is_(None), SysJobQueue.heartbeat_time < stale_before)
+        result = await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.status == '1', stale_condition)
+            .values(status='0', start_time=None, worker_id=None, heartbeat_time=None)
+        )
+        await db.execute(
+            update(SysJobQueue)
+            .where(SysJobQueue.status == '4', SysJobQueue.dedup_key.is_not(None), stale_condition)
+            .values(dedup_key=None)
+        )
+
+        return result.rowcount
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import CHAR, BigInteger, Column, DateTime, String
+from sqlalchemy import CHAR, BigInteger, Column, DateTime, Index, Integer, String, UniqueConstraint
 
 from config.database import Base
 
@@ -56,3 +56,33 @@ class SysJobLog(Base):
     status = Column(CHAR(1), nullable=True, server_default='0', comment='执行状态（0正常 1失败）')
     exception_info = Column(String(2000), nullable=True, server_default="''", comment='异常信息')
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
+
+
+class SysJobQueue(Base):
+    """
+    任务执行队列表
+    """
+
+    __tablename__ = 'sys_job_queue'
+    __table_args__ = (
+        UniqueConstraint('dedup_key', name='uk_sys_job_queue_dedup_key'),
+        Index('idx_sys_job_queue_qs', 'queue_name', 'status'),
+        {'comment': '任务执行队列表'},
+    )
+
+    queue_id = Column(BigInteger, primary_key=True, nullable=False, autoincrement=True, comment='队列任务ID')
+    queue_name = Column(String(64), nullable=False, comment='队列名称')
+    task_id = Column(BigInteger, nullable=False, comment='业务任务ID')
+    job_name = Column(String(200), nullable=True, server_default="''", comment='任务名称')
+    invoke_target = Column(String(500), nullable=False, comment='调用目标字符串')
+    job_kwargs = Column(String(2000), nullable=True, server_default="''", comment='关键字参数（JSON格式）')
+    priority = Column(Integer, nullable=True, server_default='0', comment='优先级（数值越大越先执行）')
+    status = Column(CHAR(1), nullable=True, server_default='0', comment='状态（0等待 1运行中 2成功 3失败 4已取消）')
+    dedup_key = Column(String(128), nullable=True, comment='去重键（等待或运行中时为 队列名称:业务任务ID，结束后清空）')
+    error_message = Column(String(2000), nullable=True, server_default="''", comment='错误信息')
+    create_by = Column(String(64), nullable=True, server_default="''", comment='创建者')
+    create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
+    start_time = Column(DateTime, nullable=True, comment='开始执行时间')
+    end_time = Column(DateTime, nullable=True, comment='结束时间')
+    worker_id = Column(String(128), nullable=True, comment='执行实例标识（主机名:进程号）')
+    heartbeat_time = Column(DateTime, nullable=True, comment='执行实例心跳时间')
@@ -130,3 +130,39 @@ class DeleteJobLogModel(BaseModel):
     model_config = ConfigDict(alias_generator=to_camel)
 
     job_log_ids: str = Field(description='需要删除的定时任务日志ID')
+
+
+class JobQueueModel(BaseModel):
+    """
+    任务执行队列表对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel, from_attributes=True)
+
+    queue_id: int | None = Field(default=None, description='队列任务ID')
+    queue_name: str | None = Field(default=None, description='队列名称')
+    task_id: int | None = Field(default=None, description='业务任务ID')
+    job_name: str | None = Field(default=None, description='任务名称')
+    invoke_target: str | None = Field(default=None, description='调用目标字符串')
+    job_kwargs: str | None = Field(default=None, description='关键字参数（JSON格式）')
+    priority: int | None = Field(default=None, description='优先级（数值越大越先执行）')
+    status: Literal['0', '1', '2', '3', '4'] | None = Field(
+        default=None, description='状态（0等待 1运行中 2成功 3失败 4已取消）'
+    )
+    dedup_key: str | None = Field(default=None, description='去重键')
+    error_message: str | None = Field(default=None, description='错误信息')
+    create_by: str | None = Field(default=None, description='创建者')
+    create_time: datetime | None = Field(default=None, description='创建时间')
+    start_time: datetime | None = Field(default=None, description='开始执行时间')
+    end_time: datetime | None = Field(default=None, description='结束时间')
+    worker_id: str | None = Field(default=None, description='执行实例标识（主机名:进程号）')
+    heartbeat_time: datetime | None = Field(default=None, description='执行实例心跳时间')
+
+
+class JobQueuePageQueryModel(JobQueueModel):
+    """
+    任务执行队列分页查询模型
+    """
+
+    page_num: int = Field(default=1, description='当前页码')
+    page_size: int = Field(default=10, description='每页记录数')
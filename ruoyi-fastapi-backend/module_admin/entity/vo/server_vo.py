@@ -52,6 +52,33 @@ class SysFiles(BaseModel):
     usage: str | None = Field(default=None, description='资源的使用率')
 
 
+class WorkerJobInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    job_name: str | None = Field(default=None, description='任务名称')
+    duration: int | None = Field(default=None, description='已运行时长（秒）')
+
+
+class WorkerMonitorModel(BaseModel):
+    """
+    后台任务运行时监控对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    running: bool | None = Field(default=None, description='是否运行中')
+    pool_size: int | None = Field(default=None, description='连接池大小')
+    max_overflow: int | None = Field(default=None, description='最大溢出连接数')
+    checked_out: int | None = Field(default=None, description='使用中的连接数')
+    checked_in: int | None = Field(default=None, description='空闲连接数')
+    overflow: int | None = Field(default=None, description='溢出连接数')
+    utilization: float | None = Field(default=None, description='连接池使用率（%）')
+    running_jobs: list[WorkerJobInfo] | None = Field(default=None, description='运行中的任务')
+    submitted: int | None = Field(default=None, description='已提交任务数')
+    completed: int | None = Field(default=None, description='已完成任务数')
+    failed: int | None = Field(default=None, description='失败任务数')
+
+
 class ServerMonitorModel(BaseModel):
     """
     服务监控对应pydantic模型
@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.vo import CrudResponseModel, PageModel
+from config.env import AppConfig
+from config.get_job_queue import JobQueueUtil
+from exceptions.exception import ServiceException
+from module_admin.dao.job_queue_dao import JobQueueDao
+from module_admin.entity.vo.job_vo import JobQueueModel, JobQueuePageQueryModel
+from utils.common_util import CamelCaseUtil
+
+
+class JobQueueService:
+    """
+    任务执行队列模块服务层
+    """
+
+    @classmethod
+    async def get_job_queue_list_services(
+        cls, query_db: AsyncSession, query_object: JobQueuePageQueryModel, is_page: bool = False
+    ) -> PageModel | list[dict[str, Any]]:
+        """
+        获取队列任务列表信息service
+
+        :param query_db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 队列任务列表信息对象
+        """
+        job_queue_list_result = await JobQueueDao.get_job_queue_list(query_db, query_object, is_page)
+
+        return job_queue_list_result
+
+    @classmethod
+    async def enqueue_job_services(
+        cls,
+        query_db: AsyncSession,
+        queue_name: str,
+        task_id: int,
+        invoke_target: str,
+        job_name: str = '',
+        job_kwargs: dict[str, Any] | None = None,
+        priority: int = 0,
+        create_by: str = '',
+    ) -> CrudResponseModel:
+        """
+        提交任务到任务执行队列service（同一业务任务在等待或运行中时不允许重复提交）
+
+        :param query_db: orm对象
+        :param queue_name: 队列名称
+        :param task_id: 业务任务id
+        :param invoke_target: 调用目标字符串（异步函数，调用方式为 func(task_id, session=session, **job_kwargs)）
+        :param job_name: 任务名称
+        :param job_kwargs: 关键字参数
+        :param priority: 优先级（数值越大越先执行）
+        :param create_by: 创建者
+        :return: 提交结果，result 为队列任务id
+        """
+        inflight_job = await JobQueueDao.get_inflight_job_queue(query_db, queue_name, task_id)
+        if inflight_job:
+            raise ServiceException(message=f'任务已在执行队列中（队列任务ID：{inflight_job.queue_id}），请勿重复提交')
+        pending_count = await JobQueueDao.count_pending_job_queue(query_db, queue_name)
+        if pending_count >= AppConfig.app_job_queue_max_pending:
+            raise ServiceException(message=f'执行队列{queue_name}已满（等待中的任务数：{pending_count}），请稍后再试')
+
+        job_queue = JobQueueModel(
+            queue_name=queue_name,
+            task_id=task_id,
+            job_name=job_name,
+            invoke_target=invoke_target,
+            job_kwargs=json.dumps(job_kwargs or {}, ensure_ascii=False),
+            priority=priority,
+            status='0',
+            dedup_key=f'{queue_name}:{task_id}',
+            create_by=create_by,
+            create_time=datetime.now(),
+        )
+        try:
+            db_job_queue = await JobQueueDao.add_job_queue_dao(query_db, job_queue)
+            queue_id = db_job_queue.queue_id
+            await query_db.commit()
+        except IntegrityError as e:
+            # 并发提交时由去重键的唯一约束保证只有一个任务入队
+            await query_db.rollback()
+            raise ServiceException(message='任务已在执行队列中，请勿重复提交') from e
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+        JobQueueUtil.notify()
+
+        return CrudResponseModel(is_success=True, message='任务已提交执行队列，请稍后查看执行日志', result=queue_id)
+
+    @classmethod
+    async def job_queue_detail_services(cls, query_db: AsyncSession, queue_id: int) -> JobQueueModel:
+        """
+        获取队列任务详细信息service
+
+        :param query_db: orm对象
+        :param queue_id: 队列任务id
+        :return: 队列任务id对应的信息
+        """
+        job_queue = await JobQueueDao.get_job_queue_detail_by_id(query_db, queue_id)
+        result = JobQueueModel(**CamelCaseUtil.transform_result(job_queue)) if job_queue else JobQueueModel()
+
+        return result
+
+    @classmethod
+    async def cancel_job_queue_services(cls, query_db: AsyncSession, queue_id: int) -> CrudResponseModel:
+        """
+        取消队列任务service（等待中的任务不再执行，运行中的任务会被中断）
+
+        :param query_db: orm对象
+        :param queue_id: 队列任务id
+        :return: 取消结果
+        """
+        job_queue = await JobQueueDao.get_job_queue_detail_by_id(query_db, queue_id)
+        if not job_queue:
+            raise ServiceException(message='队列任务不存在')
+        try:
+            cancelled = await JobQueueDao.cancel_job_queue_dao(query_db, queue_id)
+            await query_db.commit()
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+        if not cancelled:
+            raise ServiceException(message='队列任务已结束，无法取消')
+        JobQueueUtil.notify()
+
+        return CrudResponseModel(is_success=True, message='取消成功')
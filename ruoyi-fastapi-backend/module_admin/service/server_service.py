@@ -5,7 +5,16 @@ import time
 
 import psutil
 
-from module_admin.entity.vo.server_vo import CpuInfo, MemoryInfo, PyInfo, ServerMonitorModel, SysFiles, SysInfo
+from config.get_worker import WorkerUtil
+from module_admin.entity.vo.server_vo import (
+    CpuInfo,
+    MemoryInfo,
+    PyInfo,
+    ServerMonitorModel,
+    SysFiles,
+    SysInfo,
+    WorkerMonitorModel,
+)
 from utils.common_util import bytes2human
 
 
@@ -100,3 +109,12 @@ class ServerService:
         result = ServerMonitorModel(cpu=cpu, mem=mem, sys=sys, py=py, sysFiles=sys_files)
 
         return result
+
+    @staticmethod
+    async def get_worker_monitor_info() -> WorkerMonitorModel:
+        """
+        获取后台任务运行时的连接池使用情况和任务统计
+
+        :return: 后台任务运行时监控信息
+        """
+        return WorkerMonitorModel(**WorkerUtil.get_worker_metrics())
@@ -256,8 +256,10 @@ async def execute_factor_task(
     request: Request,
     task_id: Annotated[int, Path(description='任务ID')],
     query_db: Annotated[AsyncSession, DBSessionDependency()],
+    current_user: Annotated[CurrentUserModel, CurrentUserDependency()],
+    priority: Annotated[int, Query(description='执行队列优先级（数值越大越先执行）')] = 0,
 ):
-    result = await FactorTaskService.execute_task_services(query_db, task_id)
+    result = await FactorTaskService.execute_task_services(query_db, task_id, priority, current_user.user.user_name)
     logger.info(result.message)
     return ResponseUtil.success(msg=result.message)
 
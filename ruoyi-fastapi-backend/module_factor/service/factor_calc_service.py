@@ -2,13 +2,23 @@ from datetime import datetime, timedelta
 import json
 from typing import Any, Iterable
 
+import asyncio
+
 import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config.env import DataBaseConfig
 from module_factor.dao.factor_dao import FactorCalcLogDao, FactorValueDao
 from module_factor.entity.do.factor_do import FactorCalcLog, FactorDefinition, FactorTask
+from module_factor.service.factor_dag import FactorDag, FactorDependencyError
+from module_factor.service.factor_expr_analyzer import FactorExprAnalyzer
+from module_factor.service.factor_expr_compiler import FactorExprCompiler, FactorExprError, FactorExprPlan
+from module_factor.service.factor_panel import PANEL_OPERATORS, FactorPanel
+from module_tushare.dao.tushare_schema_registry import TushareSchemaRegistry
+from module_tushare.task.tushare_dataset import get_parquet_dataset_columns, read_parquet_dataset
+from module_tushare.task.tushare_trade_calendar import TradeCalendar
 from utils.log_util import logger
 
 
@@ -21,7 +31,19 @@ class FactorCalcService:
     - `source_table` 必须是已存在的行情表名（如通过 Tushare 下载创建的表），且包含：
       - 日期列：`trade_date`（YYYYMMDD）
       - 代码列：默认 `ts_code`，可在因子 `params` JSON 中通过 `{"symbol_col":"ts_code"}` 覆盖；
+    - 因子 `params` 配置 `{"dataset_path":"..."}` 时，从下载任务保存的 Parquet 数据集读取行情
+      （`source_table` 作为接口代码，也可以通过 `dataset_api_code` 覆盖），此时任务需要配置起止日期；
     - `expr` 为基于 pandas 的表达式，返回 `pd.Series`，索引与行情 DataFrame 对齐；
+    - `expr` 也可以使用行情面板 `panel`（日期 × 标的的二维数组，如 `panel["close"]`）和面板算子
+      `delay`、`ts_mean`、`ts_std`、`ts_rank`、`cs_rank`、`corr`，按标的分别计算时间序列，
+      返回二维数组，例如 `cs_rank(ts_mean(panel["close"] / delay(panel["close"], 1) - 1, 5))`；
+    - 表达式只解析、校验一次并缓存编译结果，同一行情来源的因子之间相同的子表达式只计算一次；
+    - 因子 `dependencies` 配置依赖的因子代码（如 `["ma5", "ma10"]`）后，表达式可以直接使用依赖因子的结果
+      （变量名为因子代码，或 `factors["ma5"]`），例如 `ma5 / ma10 - 1`；因子按依赖关系排序计算，
+      依赖因子的结果在本次计算中保留在内存，不在任务中的依赖因子只参与计算、不写入结果；
+    - 同一任务中行情来源相同的因子共用一次加载，只读取表达式引用到的列（遍历表达式语法树得到）；
+    - 行情从开始日期之前的第 N 个交易日加载（N 为因子的回看窗口，取 `window_size` 与表达式分析结果的较大值），
+      只写入开始日期之后的结果，增量计算只需计算新增交易日，滚动类因子也不会因缺少历史数据而为空；
     - 结果写入 `factor_value` 窄表。
     """
 
@@ -34,7 +56,7 @@ class FactorCalcService:
         max_days: int = 10,
     ) -> str | None:
         """
-        从行情表中查找下一个交易日
+        查找下一个交易日（优先使用交易日历缓存，交易日历不可用时从行情表中查找）
 
         :param db: 数据库会话
         :param table_name: 行情表名
@@ -45,6 +67,10 @@ class FactorCalcService:
         try:
             # 将datetime转换为YYYYMMDD格式
             from_date_str = from_date.strftime('%Y%m%d')
+            if await TradeCalendar.ensure_loaded(db):
+                next_trade_date = TradeCalendar.next_trade_date(from_date_str)
+                if next_trade_date is not None:
+                    return next_trade_date
             # 计算最大查找日期
             max_date = (from_date + timedelta(days=max_days)).strftime('%Y%m%d')
 
@@ -60,7 +86,7 @@ class FactorCalcService:
             if row:
                 return str(row[0])
             return None
-        except Exception as exc:  # noqa: BLE001
+        except Exception as exc:
             logger.warning('查找下一个交易日失败: %s', exc)
             return None
 
@@ -87,7 +113,7 @@ class FactorCalcService:
             if row and row[0]:
                 return str(row[0])
             return None
-        except Exception as exc:  # noqa: BLE001
+        except Exception as exc:
             logger.warning('查找最新交易日失败: %s', exc)
             return None
 
@@ -114,7 +140,7 @@ class FactorCalcService:
             if row and row[0]:
                 return str(row[0])
             return None
-        except Exception as exc:  # noqa: BLE001
+        except Exception as exc:
             logger.warning('查找最早交易日失败: %s', exc)
             return None
 
@@ -243,9 +269,11 @@ class FactorCalcService:
         db: AsyncSession,
         task: FactorTask,
         factor_defs: list[FactorDefinition],
-    ) -> None:
+    ) -> bool:
         """
         按任务配置计算一批因子
+
+        :return: 是否全部计算成功（日期范围无需计算时视为成功）
         """
         start_time = datetime.now()
         # 提前缓存任务关键字段，避免在异步上下文中触发 ORM 懒加载（MissingGreenlet）
@@ -280,13 +308,13 @@ class FactorCalcService:
         # 如果两个日期都为空，无法执行
         if not actual_start_date and not actual_end_date:
             logger.warning('因子任务 %s(ID=%s) 调整后的日期范围为空，无法执行', task_name, task_id)
-            return
+            return True
 
         # 如果只有一个日期为空，尝试从行情表中获取
         if not actual_start_date or not actual_end_date:
             if not factor_defs or not factor_defs[0].source_table:
                 logger.warning('因子任务 %s(ID=%s) 日期范围不完整且无法确定行情表，暂不执行', task_name, task_id)
-                return
+                return True
             
             source_table = factor_defs[0].source_table
             
@@ -295,7 +323,7 @@ class FactorCalcService:
                 actual_start_date = await cls._get_earliest_trade_date(db, source_table)
                 if not actual_start_date:
                     logger.warning('因子任务 %s(ID=%s) 无法确定开始日期，暂不执行', task_name, task_id)
-                    return
+                    return True
                 logger.info('使用最早交易日作为开始日期: %s', actual_start_date)
             
             if not actual_end_date:
@@ -303,7 +331,7 @@ class FactorCalcService:
                 actual_end_date = await cls._get_latest_trade_date(db, source_table)
                 if not actual_end_date:
                     logger.warning('因子任务 %s(ID=%s) 无法确定结束日期，暂不执行', task_name, task_id)
-                    return
+                    return True
                 logger.info('使用最新交易日作为结束日期: %s', actual_end_date)
 
         # 检查调整后的日期范围是否有效
@@ -315,7 +343,7 @@ class FactorCalcService:
                 actual_start_date,
                 actual_end_date,
             )
-            return
+            return True
 
         # 解析标的范围：当前仅支持 type=list 且 symbols 字段
         symbols: list[str] | None = None
@@ -327,14 +355,20 @@ class FactorCalcService:
                     if not isinstance(symbols, list):
                         symbols = None
                 # 其他类型（all/index 等）暂不处理，视为全市场
-            except Exception as exc:  # noqa: BLE001
+            except Exception as exc:
                 logger.warning('解析 symbol_universe 失败: %s, 内容=%s', exc, task.symbol_universe)
 
         total_records = 0
         error_messages = []
 
         try:
-            for definition in factor_defs:
+            # 按依赖关系排序（依赖的因子先计算），循环依赖或依赖缺失在加载行情前报错
+            dag = await FactorDag.build(db, factor_defs)
+
+            # 按行情来源分组，同一来源的因子共用一次加载
+            source_groups: dict[tuple[str, str | None, str], list[FactorDefinition]] = {}
+            source_of: dict[str, tuple[str, str | None, str]] = {}
+            for definition in dag.ordered_defs:
                 if definition.calc_type != 'PY_EXPR':
                     logger.info(
                         '因子 %s(calc_type=%s) 当前仅支持 PY_EXPR，跳过',
@@ -347,21 +381,80 @@ class FactorCalcService:
                     logger.warning('因子 %s 未配置 source_table，跳过', definition.factor_code)
                     continue
 
-                try:
-                    records = await cls._calc_single_factor_py_expr(
+                source_key = cls._resolve_load_source(definition)
+                source_groups.setdefault(source_key, []).append(definition)
+                source_of[definition.factor_code] = source_key
+
+            # 各来源需要多加载的历史交易日数（回看窗口），只写入实际计算区间内的结果
+            group_lookbacks = cls._resolve_group_lookbacks(dag, source_groups)
+            # 各来源尚未计算的因子数，计算完后释放该来源的行情数据
+            remaining = {source_key: len(group_defs) for source_key, group_defs in source_groups.items()}
+            group_states: dict[tuple[str, str | None, str], dict[str, Any] | None] = {}
+            # 被其他因子依赖的计算结果：因子代码 -> (行情来源, 与行情对齐的结果, 按 (trade_date, 代码) 索引的结果)
+            factor_results: dict[str, tuple[tuple[str, str | None, str], pd.Series, pd.Series | None]] = {}
+
+            for definition in dag.ordered_defs:
+                factor_code = definition.factor_code
+                source_key = source_of.get(factor_code)
+                if source_key is None:
+                    continue
+                table_name, _, symbol_col = source_key
+
+                if source_key not in group_states:
+                    load_start_date = await cls._resolve_load_start_date(
+                        db, source_key, group_lookbacks[source_key], actual_start_date
+                    )
+                    group_states[source_key] = await cls._prepare_source_group(
                         db=db,
-                        task=task,
-                        definition=definition,
+                        source_key=source_key,
+                        group_defs=source_groups[source_key],
+                        dag=dag,
                         symbols=symbols,
-                        start_date=actual_start_date,
+                        start_date=load_start_date,
                         end_date=actual_end_date,
+                        error_messages=error_messages,
                     )
-                    total_records += records
-                except Exception as factor_exc:  # noqa: BLE001
-                    error_msg = f'因子 {definition.factor_code} 计算失败: {str(factor_exc)}'
-                    logger.exception(error_msg)
-                    error_messages.append(error_msg)
-                    # 继续计算其他因子，不中断整个任务
+                state = group_states[source_key]
+                remaining[source_key] -= 1
+
+                if state is not None:
+                    parents = dag.dependencies.get(factor_code, [])
+                    missing_parents = [parent for parent in parents if parent not in factor_results]
+                    try:
+                        if missing_parents:
+                            raise FactorDependencyError(f'依赖的因子 {missing_parents} 未计算成功')
+                        for parent in parents:
+                            cls._bind_parent_factor(state, parent, factor_results[parent], source_key)
+                        records, series = await cls._calc_single_factor_py_expr(
+                            db=db,
+                            task=task,
+                            definition=definition,
+                            df=state['df'],
+                            panel=state['panel'],
+                            plan=state['plan'],
+                            expr_index=state['expr_index'][factor_code],
+                            expr_env=state['env'],
+                            table_name=table_name,
+                            symbol_col=symbol_col,
+                            start_date=actual_start_date,
+                            end_date=actual_end_date,
+                            write_values=factor_code in dag.output_codes,
+                        )
+                        total_records += records
+                        if series is not None and dag.dependents.get(factor_code):
+                            keyed_series = None
+                            if any(source_of.get(child) != source_key for child in dag.dependents[factor_code]):
+                                keyed_series = series.set_axis(cls._build_row_keys(state['df'], symbol_col))
+                                keyed_series = keyed_series[~keyed_series.index.duplicated(keep='last')]
+                            factor_results[factor_code] = (source_key, series, keyed_series)
+                    except Exception as factor_exc:
+                        error_msg = f'因子 {factor_code} 计算失败: {str(factor_exc)}'
+                        logger.exception(error_msg)
+                        error_messages.append(error_msg)
+                        # 继续计算其他因子，不中断整个任务
+
+                if remaining[source_key] == 0:
+                    group_states[source_key] = None
 
             duration = int((datetime.now() - start_time).total_seconds())
             status = '0' if not error_messages else '1'
@@ -385,7 +478,7 @@ class FactorCalcService:
                     create_time=datetime.now(),
                 )
                 await FactorCalcLogDao.add_log_dao(db, log)
-            except Exception as exc:  # noqa: BLE001
+            except Exception as exc:
                 # 记录错误，但不影响前面 factor_value 插入的提交
                 logger.exception('写入因子计算日志失败: %s', exc)
 
@@ -409,7 +502,8 @@ class FactorCalcService:
                     duration,
                     error_message,
                 )
-        except Exception as exc:  # noqa: BLE001
+            return status == '0'
+        except Exception as exc:
             # 捕获整个计算过程的异常，重新抛出给上层处理
             duration = int((datetime.now() - start_time).total_seconds())
             logger.exception('因子任务 %s(ID=%s) 计算过程发生异常', task_name, task_id)
@@ -431,7 +525,7 @@ class FactorCalcService:
                 )
                 await FactorCalcLogDao.add_log_dao(db, log)
                 await db.commit()
-            except Exception as log_exc:  # noqa: BLE001
+            except Exception as log_exc:
                 logger.exception('写入因子计算错误日志失败: %s', log_exc)
             # 重新抛出异常，让上层处理
             raise
@@ -441,23 +535,45 @@ class FactorCalcService:
         cls,
         db: AsyncSession,
         table_name: str,
-        start_date: str,
+        start_date: str | None,
         end_date: str,
         symbols: list[str] | None,
         symbol_col: str,
+        dataset_path: str | None = None,
+        columns: list[str] | None = None,
     ) -> pd.DataFrame:
         """
-        从动态行情表加载数据为 DataFrame
+        从动态行情表加载数据为 DataFrame（配置了 dataset_path 时从 Parquet 数据集读取，table_name 为接口代码）
+
+        :param start_date: 开始日期，为空则从最早的数据开始加载
+        :param columns: 需要加载的列，为空则加载全部列
         """
-        # 基本字段：日期 + 代码 + 其他所有列
-        where_clauses = ['trade_date >= :start_date', 'trade_date <= :end_date']
-        params: dict[str, Any] = {'start_date': start_date, 'end_date': end_date}
+        if dataset_path:
+            # Parquet 读取在线程中执行，避免阻塞事件循环
+            return await asyncio.to_thread(
+                read_parquet_dataset,
+                dataset_path,
+                table_name,
+                start_date,
+                end_date,
+                columns,
+                symbols,
+                symbol_col,
+            )
+
+        # 基本字段：日期 + 代码 + 表达式引用的列（未指定时为所有列）
+        where_clauses = ['trade_date <= :end_date']
+        params: dict[str, Any] = {'end_date': end_date}
+        if start_date:
+            where_clauses.append('trade_date >= :start_date')
+            params['start_date'] = start_date
         if symbols:
             where_clauses.append(f'{symbol_col} IN :symbols')
             params['symbols'] = tuple(symbols)
 
         where_sql = ' AND '.join(where_clauses)
-        sql = f'SELECT * FROM {table_name} WHERE {where_sql} ORDER BY trade_date, {symbol_col}'
+        select_sql = ', '.join(cls._quote_column(column) for column in columns) if columns else '*'
+        sql = f'SELECT {select_sql} FROM {table_name} WHERE {where_sql} ORDER BY trade_date, {symbol_col}'
         logger.debug('加载行情 SQL: %s, params=%s', sql, params)
 
         result = await db.execute(text(sql), params)
@@ -469,78 +585,361 @@ class FactorCalcService:
         return df
 
     @classmethod
-    async def _calc_single_factor_py_expr(
+    def _build_expr_env(cls, df: pd.DataFrame, panel: FactorPanel | None) -> dict[str, Any]:
+        """
+        构建因子表达式的计算环境（同一行情来源的因子共用，公共子表达式的中间结果也保存在其中）
+
+        :param df: 行情数据
+        :param panel: 行情面板
+        :return: 计算环境
+        """
+        return {'__builtins__': {}, 'df': df, 'pd': pd, 'np': np, 'panel': panel, 'factors': {}, **PANEL_OPERATORS}
+
+    @classmethod
+    async def _prepare_source_group(
         cls,
         db: AsyncSession,
-        task: FactorTask,
-        definition: FactorDefinition,
+        source_key: tuple[str, str | None, str],
+        group_defs: list[FactorDefinition],
+        dag: FactorDag,
         symbols: list[str] | None,
-        start_date: str,
+        start_date: str | None,
         end_date: str,
-    ) -> int:
+        error_messages: list[str],
+    ) -> dict[str, Any] | None:
         """
-        基于 pandas 表达式的单个因子计算
+        加载一个行情来源的数据，并编译该来源全部因子的表达式
+
+        :param db: 数据库会话
+        :param source_key: 行情来源 (表名或接口代码, Parquet 数据集目录, 代码列)
+        :param group_defs: 该来源的因子定义
+        :param dag: 因子依赖图
+        :param symbols: 标的列表
+        :param start_date: 行情加载的开始日期（包含回看窗口），为空则从最早的数据开始加载
+        :param end_date: 结束日期
+        :param error_messages: 错误信息列表，加载失败时追加
+        :return: 行情数据、面板、计算环境和编译计划，加载失败时为 None
         """
-        factor_code = definition.factor_code
-        table_name = definition.source_table
-        if not factor_code or not table_name:
-            return 0
+        table_name, dataset_path, symbol_col = source_key
+        try:
+            df = await cls._load_group_price_data(
+                db=db,
+                table_name=table_name,
+                dataset_path=dataset_path,
+                symbol_col=symbol_col,
+                group_defs=group_defs,
+                symbols=symbols,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        except Exception as load_exc:
+            error_msg = f'行情 {table_name} 加载失败（因子 {[d.factor_code for d in group_defs]}）: {load_exc}'
+            logger.exception(error_msg)
+            error_messages.append(error_msg)
+            return None
 
-        # 解析参数：目前仅支持 symbol_col
+        # 面板构建（代码分解）是 CPU 密集操作，在线程中执行，避免阻塞事件循环
+        panel = await asyncio.to_thread(FactorPanel, df, symbol_col) if not df.empty else None
+        expr_env = cls._build_expr_env(df, panel)
+        base_names = frozenset(expr_env) - {'__builtins__'}
+        # 依赖因子的代码是合法变量名时可以直接在表达式中使用
+        extra_names = [
+            frozenset(
+                parent
+                for parent in dag.dependencies.get(definition.factor_code, [])
+                if parent.isidentifier() and not parent.startswith('_') and parent not in base_names
+            )
+            for definition in group_defs
+        ]
+        plan = FactorExprCompiler.compile_plan(
+            [definition.expr or '' for definition in group_defs], base_names, extra_names
+        )
+        return {
+            'df': df,
+            'panel': panel,
+            'env': expr_env,
+            'plan': plan,
+            'expr_index': {definition.factor_code: index for index, definition in enumerate(group_defs)},
+        }
+
+    @classmethod
+    def _resolve_group_lookbacks(
+        cls, dag: FactorDag, source_groups: dict[tuple[str, str | None, str], list[FactorDefinition]]
+    ) -> dict[tuple[str, str | None, str], int | None]:
+        """
+        计算每个行情来源需要多加载的历史交易日数
+
+        因子的回看交易日数取表达式分析结果（沿 shift/rolling/面板算子累加窗口，并加上依赖因子的回看交易日数）
+        与 window_size 中的较大值；依赖因子还要满足下游因子的回看需要。表达式依赖全部历史（如 ewm、cumsum）
+        且没有配置 window_size 时为 None，从最早的数据开始加载
+
+        :param dag: 因子依赖图
+        :param source_groups: 行情来源 -> 因子定义
+        :return: 行情来源 -> 回看交易日数
+        """
+        lookbacks: dict[str, int | None] = {}
+        for definition in dag.ordered_defs:
+            parents = dag.dependencies.get(definition.factor_code, [])
+            lookback = FactorExprAnalyzer.get_lookback(
+                definition.expr or '', {parent: lookbacks.get(parent, 0) for parent in parents}
+            )
+            window = definition.window if definition.window and definition.window > 0 else None
+            if lookback is None:
+                lookback = window
+            elif window is not None:
+                lookback = max(lookback, window)
+            lookbacks[definition.factor_code] = lookback
+
+        # 依赖因子的结果要覆盖下游因子的回看窗口
+        required: dict[str, int | None] = {}
+        for definition in reversed(dag.ordered_defs):
+            code = definition.factor_code
+            values = [lookbacks[code], *(required[child] for child in dag.dependents.get(code, []))]
+            required[code] = None if None in values else max(values)
+
+        group_lookbacks: dict[tuple[str, str | None, str], int | None] = {}
+        for source_key, group_defs in source_groups.items():
+            values = [required[definition.factor_code] for definition in group_defs]
+            group_lookbacks[source_key] = None if None in values else max(values, default=0)
+            logger.info(
+                '行情 %s 的回看交易日数: %s（因子回看: %s）',
+                source_key[0],
+                '全部历史' if group_lookbacks[source_key] is None else group_lookbacks[source_key],
+                {definition.factor_code: required[definition.factor_code] for definition in group_defs},
+            )
+        return group_lookbacks
+
+    @classmethod
+    async def _resolve_load_start_date(
+        cls,
+        db: AsyncSession,
+        source_key: tuple[str, str | None, str],
+        lookback: int | None,
+        start_date: str,
+    ) -> str | None:
+        """
+        计算行情加载的开始日期（开始日期之前的第 lookback 个交易日）
+
+        :param db: 数据库会话
+        :param source_key: 行情来源 (表名或接口代码, Parquet 数据集目录, 代码列)
+        :param lookback: 回看交易日数，为 None 表示需要全部历史
+        :param start_date: 实际计算区间的开始日期
+        :return: 行情加载的开始日期，为 None 时从最早的数据开始加载
+        """
+        if lookback is None:
+            return None
+        if lookback == 0:
+            return start_date
+        if await TradeCalendar.ensure_loaded(db):
+            load_start_date = TradeCalendar.prev_trade_date(start_date, lookback)
+            if load_start_date is not None:
+                return load_start_date
+
+        table_name, dataset_path, _ = source_key
+        if not dataset_path:
+            # 交易日历不可用时从行情表中查找开始日期之前的第 lookback 个交易日（不足时为最早交易日）
+            try:
+                sql = f"""
+                    SELECT MIN(trade_date) AS min_date FROM (
+                        SELECT DISTINCT trade_date
+                        FROM {table_name}
+                        WHERE trade_date < :start_date
+                        ORDER BY trade_date DESC
+                        LIMIT {int(lookback)}
+                    ) t
+                """
+                row = (await db.execute(text(sql), {'start_date': start_date})).first()
+                return str(row[0]) if row and row[0] else start_date
+            except Exception as exc:
+                logger.warning('查找回看开始日期失败: %s', exc)
+        # 按自然日估算（每周 5 个交易日，并预留节假日），多加载的数据不会写入
+        return (datetime.strptime(start_date, '%Y%m%d') - timedelta(days=lookback * 7 // 5 + 15)).strftime('%Y%m%d')
+
+    @classmethod
+    def _build_row_keys(cls, df: pd.DataFrame, symbol_col: str) -> pd.MultiIndex:
+        """
+        构建行情数据每行的 (trade_date, 代码) 索引
+
+        :param df: 行情数据
+        :param symbol_col: 代码列
+        :return: 行索引
+        """
+        return pd.MultiIndex.from_arrays([df['trade_date'].astype(str), df[symbol_col].astype(str)])
+
+    @classmethod
+    def _bind_parent_factor(
+        cls,
+        state: dict[str, Any],
+        parent_code: str,
+        parent_result: tuple[tuple[str, str | None, str], pd.Series, pd.Series | None],
+        source_key: tuple[str, str | None, str],
+    ) -> None:
+        """
+        把依赖因子的结果对齐到当前行情来源，放入计算环境
+
+        :param state: 行情来源的计算状态
+        :param parent_code: 依赖因子代码
+        :param parent_result: 依赖因子的计算结果
+        :param source_key: 当前行情来源
+        :return: None
+        """
+        expr_env = state['env']
+        if parent_code in expr_env['factors']:
+            return
+        parent_source_key, series, keyed_series = parent_result
+        if parent_source_key != source_key:
+            # 不同行情来源按 (trade_date, 代码) 对齐
+            df = state['df']
+            series = keyed_series.reindex(cls._build_row_keys(df, source_key[2])).set_axis(df.index)
+        expr_env['factors'][parent_code] = series
+        if parent_code.isidentifier() and not parent_code.startswith('_') and parent_code not in expr_env:
+            expr_env[parent_code] = series
+
+    @classmethod
+    def _quote_column(cls, column: str) -> str:
+        """
+        按数据库类型转义列名（行情列可能与关键字重名，如 change）
+
+        :param column: 列名
+        :return: 转义后的列名
+        """
+        return f'"{column}"' if DataBaseConfig.db_type == 'postgresql' else f'`{column}`'
+
+    @classmethod
+    def _resolve_load_source(cls, definition: FactorDefinition) -> tuple[str, str | None, str]:
+        """
+        解析因子的行情来源
+
+        :param definition: 因子定义
+        :return: (表名或接口代码, Parquet 数据集目录, 代码列)
+        """
+        # 解析参数：symbol_col、dataset_path、dataset_api_code
+        table_name = definition.source_table
         symbol_col = 'ts_code'
+        dataset_path = None
         if definition.params:
             try:
                 params = json.loads(definition.params)
-                if isinstance(params, dict) and params.get('symbol_col'):
-                    symbol_col = params['symbol_col']
-            except Exception as exc:  # noqa: BLE001
-                logger.warning('解析因子 %s params 失败: %s', factor_code, exc)
+                if isinstance(params, dict):
+                    if params.get('symbol_col'):
+                        symbol_col = params['symbol_col']
+                    if params.get('dataset_path'):
+                        dataset_path = params['dataset_path']
+                        table_name = params.get('dataset_api_code') or table_name
+            except Exception as exc:
+                logger.warning('解析因子 %s params 失败: %s', definition.factor_code, exc)
+        return table_name, dataset_path, symbol_col
 
-        df = await cls._load_price_data(
+    @classmethod
+    async def _load_group_price_data(
+        cls,
+        db: AsyncSession,
+        table_name: str,
+        dataset_path: str | None,
+        symbol_col: str,
+        group_defs: list[FactorDefinition],
+        symbols: list[str] | None,
+        start_date: str | None,
+        end_date: str,
+    ) -> pd.DataFrame:
+        """
+        为同一行情来源的一组因子加载一次行情，只读取表达式引用到的列
+
+        :param db: 数据库会话
+        :param table_name: 表名或接口代码
+        :param dataset_path: Parquet 数据集目录
+        :param symbol_col: 代码列
+        :param group_defs: 因子定义列表
+        :param symbols: 标的列表
+        :param start_date: 开始日期
+        :param end_date: 结束日期
+        :return: 行情数据
+        """
+        if dataset_path:
+            source_columns = await asyncio.to_thread(get_parquet_dataset_columns, dataset_path, table_name)
+        else:
+            schema = await TushareSchemaRegistry.get_table_schema(db, table_name)
+            source_columns = list(schema.columns) if schema.exists else None
+        columns = FactorExprAnalyzer.get_projected_columns(
+            [definition.expr for definition in group_defs if definition.expr], source_columns, ['trade_date', symbol_col]
+        )
+        logger.info(
+            '加载行情 %s（%s 个因子共用），区间 %s~%s，加载列: %s',
+            table_name,
+            len(group_defs),
+            start_date or '最早',
+            end_date,
+            columns or '全部',
+        )
+        return await cls._load_price_data(
             db=db,
             table_name=table_name,
             start_date=start_date,
             end_date=end_date,
             symbols=symbols,
             symbol_col=symbol_col,
+            dataset_path=dataset_path,
+            columns=columns,
         )
-        if df.empty:
-            logger.warning(
-                '因子 %s 在表 %s 上区间 %s~%s 未加载到任何行情数据',
-                factor_code,
-                table_name,
-                start_date,
-                end_date,
-            )
-            return 0
 
-        if not definition.expr:
-            logger.warning('因子 %s 未配置 expr 表达式，跳过', factor_code)
-            return 0
+    @classmethod
+    def _evaluate_factor_expr(
+        cls,
+        factor_code: str,
+        plan: FactorExprPlan,
+        expr_index: int,
+        expr_env: dict[str, Any],
+        df: pd.DataFrame,
+        panel: FactorPanel | None,
+    ) -> pd.Series | None:
+        """
+        计算因子表达式并对齐到行情数据的索引（同步执行，由调用方放到线程中）
 
-        # 执行表达式
-        try:
-            local_env: dict[str, Any] = {'df': df, 'pd': pd, 'np': np}
-            # expr 示例：(df["close"] / df["close"].shift(1) - 1).rolling(window=5).mean()
-            series = eval(definition.expr, {"__builtins__": {}}, local_env)  # noqa: S307
-            if not isinstance(series, pd.Series):
-                logger.warning('因子 %s 表达式结果不是 Series 类型，实际为 %s', factor_code, type(series))
-                return 0
-        except Exception as exc:  # noqa: BLE001
-            logger.exception('执行因子 %s 表达式失败: %s, expr=%s', factor_code, exc, definition.expr)
-            return 0
+        :param factor_code: 因子代码
+        :param plan: 编译计划
+        :param expr_index: 表达式在编译计划中的序号
+        :param expr_env: 计算环境
+        :param df: 行情数据
+        :param panel: 行情面板
+        :return: 与行情数据对齐的因子值，结果不是 Series 时为 None
+        """
+        series = plan.evaluate(expr_index, expr_env)
+        if isinstance(series, np.ndarray) and panel is not None and series.shape == panel.shape:
+            series = panel.to_series(series)
+        if not isinstance(series, pd.Series):
+            logger.warning('因子 %s 表达式结果不是 Series 类型，实际为 %s', factor_code, type(series))
+            return None
+        return series.reindex(df.index)
+
+    @classmethod
+    def _build_value_records(
+        cls,
+        df: pd.DataFrame,
+        series: pd.Series,
+        factor_code: str,
+        task_id: int,
+        symbol_col: str,
+        start_date: str,
+    ) -> list[dict[str, Any]]:
+        """
+        组装写入因子结果表的数据，过滤缺失值和回看窗口内（开始日期之前）的结果（同步执行，由调用方放到线程中）
 
-        # 对齐索引，过滤缺失值
-        series = series.reindex(df.index)
-        mask = ~series.isna()
+        :param df: 行情数据
+        :param series: 与行情数据对齐的因子值
+        :param factor_code: 因子代码
+        :param task_id: 任务ID
+        :param symbol_col: 代码列
+        :param start_date: 写入的开始日期
+        :return: 因子结果记录列表
+        """
+        mask = ~series.isna() & (df['trade_date'].astype(str) >= start_date)
         if not mask.any():
             logger.warning('因子 %s 计算结果全部为空，跳过写入', factor_code)
-            return 0
+            return []
 
         valid_df = df.loc[mask].copy()
         valid_series = series[mask]
 
-        # 组装写入因子结果表的数据
         now = datetime.now()
         records: list[dict[str, Any]] = []
         for idx, row in valid_df.iterrows():
@@ -558,15 +957,77 @@ class FactorCalcService:
                     'symbol': symbol,
                     'factor_code': factor_code,
                     'factor_value': value,
-                    'task_id': task.id,
+                    'task_id': task_id,
                     'calc_date': now,
                     'extra': None,
                 }
             )
+        return records
+
+    @classmethod
+    async def _calc_single_factor_py_expr(
+        cls,
+        db: AsyncSession,
+        task: FactorTask,
+        definition: FactorDefinition,
+        df: pd.DataFrame,
+        panel: FactorPanel | None,
+        plan: FactorExprPlan,
+        expr_index: int,
+        expr_env: dict[str, Any],
+        table_name: str,
+        symbol_col: str,
+        start_date: str,
+        end_date: str,
+        write_values: bool = True,
+    ) -> tuple[int, pd.Series | None]:
+        """
+        基于 pandas 表达式的单个因子计算（行情数据、编译计划和计算环境由同一来源的因子共用）
+
+        :param write_values: 是否写入 factor_value（只作为其他因子依赖时不写入）
+        :return: (写入记录数, 与行情数据对齐的因子值)，计算失败时因子值为 None
+        """
+        factor_code = definition.factor_code
+        if not factor_code or not table_name:
+            return 0, None
+
+        if df.empty:
+            logger.warning(
+                '因子 %s 在表 %s 上区间 %s~%s 未加载到任何行情数据',
+                factor_code,
+                table_name,
+                start_date,
+                end_date,
+            )
+            return 0, None
+
+        if not definition.expr:
+            logger.warning('因子 %s 未配置 expr 表达式，跳过', factor_code)
+            return 0, None
+
+        if plan.errors[expr_index]:
+            raise FactorExprError(f'{plan.errors[expr_index]}, expr={definition.expr}')
+
+        # 执行表达式（表达式计算和结果组装是 CPU 密集操作，在线程中执行，避免阻塞事件循环上的其他任务）
+        try:
+            # expr 示例：(df["close"] / df["close"].shift(1) - 1).rolling(window=5).mean()
+            # 或面板写法：ts_mean(panel["close"] / delay(panel["close"], 1) - 1, 5)
+            series = await asyncio.to_thread(cls._evaluate_factor_expr, factor_code, plan, expr_index, expr_env, df, panel)
+            if series is None:
+                return 0, None
+        except Exception as exc:
+            logger.exception('执行因子 %s 表达式失败: %s, expr=%s', factor_code, exc, definition.expr)
+            return 0, None
+
+        if not write_values:
+            return 0, series
+        records = await asyncio.to_thread(
+            cls._build_value_records, df, series, factor_code, task.id, symbol_col, start_date
+        )
 
         if not records:
             logger.warning('因子 %s 有效记录数为 0，跳过写入', factor_code)
-            return 0
+            return 0, series
 
         await FactorValueDao.bulk_insert_values_dao(db, records)
         logger.info(
@@ -577,6 +1038,6 @@ class FactorCalcService:
             start_date,
             end_date,
         )
-        return len(records)
+        return len(records), series
 
 
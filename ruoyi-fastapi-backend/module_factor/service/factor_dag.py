@@ -0,0 +1,124 @@
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from module_factor.dao.factor_dao import FactorDefinitionDao
+from module_factor.entity.do.factor_do import FactorDefinition
+from utils.log_util import logger
+
+
+class FactorDependencyError(ValueError):
+    """
+    因子依赖无法解析（依赖的因子不存在或存在循环依赖）
+    """
+
+
+def parse_factor_dependencies(dependencies: str | None) -> list[str]:
+    """
+    解析因子定义的依赖因子列表
+
+    :param dependencies: 依赖因子（JSON 数组，如 ["ma5", "ma10"]，也兼容逗号分隔的因子代码）
+    :return: 依赖的因子代码列表（去重，保持顺序）
+    """
+    if not dependencies or not dependencies.strip():
+        return []
+    try:
+        parsed = json.loads(dependencies)
+    except ValueError:
+        parsed = dependencies.split(',')
+    if isinstance(parsed, str):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        raise FactorDependencyError(f'依赖因子格式错误，应为因子代码的 JSON 数组: {dependencies}')
+    return list(dict.fromkeys(str(code).strip() for code in parsed if str(code).strip()))
+
+
+class FactorDag:
+    """
+    因子依赖图
+
+    按 FactorDefinition.dependencies 把任务中的因子排成拓扑顺序，被依赖的因子先计算：
+    - 任务中没有包含的依赖因子从因子定义表补充，只参与计算、不写入结果
+    - 依赖的因子不存在或存在循环依赖时，在加载行情之前抛出 FactorDependencyError
+    """
+
+    def __init__(
+        self, ordered_defs: list[FactorDefinition], output_codes: set[str], dependencies: dict[str, list[str]]
+    ) -> None:
+        # 拓扑顺序的因子定义（包含补充的依赖因子）
+        self.ordered_defs = ordered_defs
+        # 需要写入结果的因子代码（任务中配置的因子）
+        self.output_codes = output_codes
+        # 因子代码 -> 直接依赖的因子代码
+        self.dependencies = dependencies
+        # 因子代码 -> 直接依赖它的因子代码
+        self.dependents: dict[str, list[str]] = {code: [] for code in dependencies}
+        for code, parents in dependencies.items():
+            for parent in parents:
+                self.dependents[parent].append(code)
+
+    @classmethod
+    async def build(cls, db: AsyncSession, factor_defs: list[FactorDefinition]) -> 'FactorDag':
+        """
+        解析任务因子的依赖并生成拓扑顺序
+
+        :param db: 数据库会话
+        :param factor_defs: 任务中的因子定义
+        :return: 因子依赖图
+        """
+        definitions: dict[str, FactorDefinition] = {}
+        for definition in factor_defs:
+            definitions.setdefault(definition.factor_code, definition)
+        output_codes = set(definitions)
+
+        dependencies: dict[str, list[str]] = {}
+        pending = list(definitions)
+        while pending:
+            code = pending.pop()
+            if code in dependencies:
+                continue
+            parents = parse_factor_dependencies(definitions[code].dependencies)
+            if code in parents:
+                raise FactorDependencyError(f'因子 {code} 依赖了自身')
+            dependencies[code] = parents
+            for parent in parents:
+                if parent not in definitions:
+                    parent_definition = await FactorDefinitionDao.get_definition_by_code(db, parent)
+                    if parent_definition is None:
+                        raise FactorDependencyError(f'因子 {code} 依赖的因子 {parent} 不存在')
+                    definitions[parent] = parent_definition
+                    logger.info('因子 %s 依赖的因子 %s 不在任务中，补充计算（不写入结果）', code, parent)
+                pending.append(parent)
+
+        ordered_codes = cls._topological_sort(list(definitions), dependencies)
+        return cls([definitions[code] for code in ordered_codes], output_codes, dependencies)
+
+    @classmethod
+    def _topological_sort(cls, codes: list[str], dependencies: dict[str, list[str]]) -> list[str]:
+        """
+        拓扑排序（Kahn 算法，同一层级保持原有顺序）
+
+        :param codes: 因子代码（任务中的顺序在前）
+        :param dependencies: 因子代码 -> 直接依赖的因子代码
+        :return: 拓扑顺序的因子代码
+        """
+        in_degree = {code: len(dependencies[code]) for code in codes}
+        dependents: dict[str, list[str]] = {code: [] for code in codes}
+        for code in codes:
+            for parent in dependencies[code]:
+                dependents[parent].append(code)
+
+        ready = [code for code in codes if in_degree[code] == 0]
+        ordered: list[str] = []
+        while ready:
+            code = ready.pop(0)
+            ordered.append(code)
+            for child in dependents[code]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
+
+        if len(ordered) < len(codes):
+            cyclic = [code for code in codes if in_degree[code] > 0]
+            raise FactorDependencyError(f'因子存在循环依赖，无法排序的因子: {", ".join(cyclic)}')
+        return ordered
@@ -0,0 +1,224 @@
+import ast
+from functools import lru_cache
+
+import pandas as pd
+
+# 表达式中代表行情数据的变量名（长表 df 和行情面板 panel）
+FRAME_NAMES = ('df', 'panel')
+# 不依赖全部列的 DataFrame 属性（其余属性如 mean、select_dtypes 等会用到所有列，无法做列裁剪）
+COLUMN_SAFE_FRAME_ATTRS = frozenset({'groupby', 'loc', 'iloc', 'get', 'index'})
+# 面板算子的窗口参数位置和回看的交易日数（窗口长度为 n 时，delay 需要 n 根历史，滚动统计需要 n-1 根）
+PANEL_WINDOW_OPERATORS = {'delay': (1, 0), 'ts_mean': (1, -1), 'ts_std': (1, -1), 'ts_rank': (1, -1), 'corr': (2, -1)}
+# 按周期偏移的 pandas 方法（默认周期为 1）
+PERIOD_METHODS = frozenset({'shift', 'diff', 'pct_change'})
+# 依赖全部历史的 pandas 方法（结果与加载的起始日期有关，无法确定回看窗口）
+UNBOUNDED_METHODS = frozenset({'ewm', 'expanding', 'cumsum', 'cumprod', 'cummax', 'cummin', 'ffill'})
+# 依赖因子结果的容器变量名
+FACTORS_NAME = 'factors'
+
+
+class FactorExprReferences:
+    """
+    因子表达式引用的行情列
+    """
+
+    def __init__(self, columns: frozenset[str], needs_all_columns: bool) -> None:
+        # 可能引用的列（字符串常量和 df.<列名> 属性访问，需要与表的实际列取交集）
+        self.columns = columns
+        # 表达式以整表方式使用行情数据，需要加载全部列
+        self.needs_all_columns = needs_all_columns
+
+
+class FactorExprAnalyzer:
+    """
+    因子表达式静态分析（遍历表达式语法树，不执行表达式）
+    """
+
+    @classmethod
+    def get_references(cls, expr: str) -> FactorExprReferences:
+        """
+        获取表达式引用的行情列（按表达式文本缓存）
+
+        :param expr: 因子表达式
+        :return: 引用的行情列
+        """
+        return _analyze_references(expr)
+
+    @classmethod
+    def get_projected_columns(
+        cls, exprs: list[str], table_columns: list[str] | None, required_columns: list[str]
+    ) -> list[str] | None:
+        """
+        计算一组表达式需要加载的列
+
+        :param exprs: 因子表达式列表
+        :param table_columns: 行情表的实际列，为空表示未知
+        :param required_columns: 必须加载的列（日期列、代码列）
+        :return: 需要加载的列，为 None 时加载全部列
+        """
+        if not table_columns:
+            return None
+        referenced: set[str] = set()
+        for expr in exprs:
+            references = cls.get_references(expr)
+            if references.needs_all_columns:
+                return None
+            referenced.update(references.columns)
+        return list(dict.fromkeys([*required_columns, *(column for column in table_columns if column in referenced)]))
+
+    @classmethod
+    def get_lookback(cls, expr: str, name_lookbacks: dict[str, int | None] | None = None) -> int | None:
+        """
+        计算表达式在第一个输出日期之前需要的历史交易日数（沿表达式嵌套累加 shift/rolling/面板算子的窗口）
+
+        :param expr: 因子表达式
+        :param name_lookbacks: 依赖因子代码 -> 该因子的回看交易日数
+        :return: 回看交易日数，依赖全部历史或窗口不是常量时为 None
+        """
+        return _analyze_lookback(expr, tuple(sorted((name_lookbacks or {}).items())))
+
+
+@lru_cache(maxsize=1024)
+def _analyze_references(expr: str) -> FactorExprReferences:
+    """
+    遍历表达式语法树收集引用的列
+
+    :param expr: 因子表达式
+    :return: 引用的行情列，表达式无法解析时需要加载全部列
+    """
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError:
+        return FactorExprReferences(frozenset(), True)
+
+    columns: set[str] = set()
+    needs_all_columns = False
+    # 作为下标或属性访问对象的 df 节点，其余位置出现的 df 表示整表使用
+    accessed_frames: set[int] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            columns.add(node.value)
+        elif isinstance(node, ast.Subscript) and _is_frame(node.value):
+            accessed_frames.add(id(node.value))
+            # df[变量] 等非字符串常量下标无法确定列
+            keys = node.slice.elts if isinstance(node.slice, (ast.List, ast.Tuple)) else [node.slice]
+            if not all(isinstance(key, ast.Constant) and isinstance(key.value, str) for key in keys):
+                needs_all_columns = True
+        elif isinstance(node, ast.Attribute) and _is_frame(node.value):
+            accessed_frames.add(id(node.value))
+            if not hasattr(pd.DataFrame, node.attr):
+                columns.add(node.attr)
+            elif node.attr not in COLUMN_SAFE_FRAME_ATTRS:
+                needs_all_columns = True
+    for node in ast.walk(tree):
+        if _is_frame(node) and id(node) not in accessed_frames:
+            needs_all_columns = True
+            break
+    return FactorExprReferences(frozenset(columns), needs_all_columns)
+
+
+@lru_cache(maxsize=1024)
+def _analyze_lookback(expr: str, name_lookbacks: tuple[tuple[str, int | None], ...]) -> int | None:
+    """
+    遍历表达式语法树计算回看交易日数
+
+    :param expr: 因子表达式
+    :param name_lookbacks: (依赖因子代码, 回看交易日数) 元组
+    :return: 回看交易日数，无法确定时为 None
+    """
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError:
+        # 无法解析的表达式在编译时报错，不需要历史数据
+        return 0
+    return _node_lookback(tree.body, dict(name_lookbacks))
+
+
+def _node_lookback(node: ast.AST, name_lookbacks: dict[str, int | None]) -> int | None:
+    """
+    计算节点的回看交易日数：节点自身的窗口加上输入中最大的回看交易日数
+
+    :param node: 语法树节点
+    :param name_lookbacks: 依赖因子代码 -> 回看交易日数
+    :return: 回看交易日数，无法确定时为 None
+    """
+    if isinstance(node, ast.Name):
+        return name_lookbacks.get(node.id, 0)
+    if (
+        isinstance(node, ast.Subscript)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == FACTORS_NAME
+        and isinstance(node.slice, ast.Constant)
+    ):
+        return name_lookbacks.get(node.slice.value, 0)
+
+    own = 0
+    if isinstance(node, ast.Call):
+        own = _call_window(node)
+        if own is None:
+            return None
+    lookback = 0
+    for child in ast.iter_child_nodes(node):
+        child_lookback = _node_lookback(child, name_lookbacks)
+        if child_lookback is None:
+            return None
+        lookback = max(lookback, child_lookback)
+    return own + lookback
+
+
+def _call_window(node: ast.Call) -> int | None:
+    """
+    计算调用自身需要的历史交易日数
+
+    :param node: 调用节点
+    :return: 历史交易日数，依赖全部历史或窗口不是常量时为 None
+    """
+    func = node.func
+    if isinstance(func, ast.Name) and func.id in PANEL_WINDOW_OPERATORS:
+        position, adjust = PANEL_WINDOW_OPERATORS[func.id]
+        window = _int_argument(node, position, 'n', 1 if func.id == 'delay' else None)
+        return None if window is None else max(window + adjust, 0)
+    if isinstance(func, ast.Attribute):
+        if func.attr in UNBOUNDED_METHODS:
+            return None
+        if func.attr in PERIOD_METHODS:
+            periods = _int_argument(node, 0, 'periods', 1)
+            return None if periods is None else abs(periods)
+        if func.attr == 'rolling':
+            window = _int_argument(node, 0, 'window', None)
+            return None if window is None else max(window - 1, 0)
+    return 0
+
+
+def _int_argument(node: ast.Call, position: int, keyword: str, default: int | None) -> int | None:
+    """
+    获取调用的整数常量参数
+
+    :param node: 调用节点
+    :param position: 参数位置
+    :param keyword: 参数名
+    :param default: 未传参数时的默认值
+    :return: 参数值，不是整数常量时为 None
+    """
+    if len(node.args) > position:
+        value = node.args[position]
+    else:
+        value = next((item.value for item in node.keywords if item.arg == keyword), None)
+    if value is None:
+        return default
+    sign = 1
+    if isinstance(value, ast.UnaryOp) and isinstance(value.op, ast.USub):
+        sign, value = -1, value.operand
+    if isinstance(value, ast.Constant) and isinstance(value.value, int) and not isinstance(value.value, bool):
+        return sign * value.value
+    return None
+
+
+def _is_frame(node: ast.AST) -> bool:
+    """
+    节点是否为行情数据变量
+
+    :param node: 语法树节点
+    :return: 是否为行情数据变量
+    """
+    return isinstance(node, ast.Name) and node.id in FRAME_NAMES
@@ -0,0 +1,303 @@
+import ast
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Any
+
+# 编译缓存的最大条目数（按表达式哈希缓存语法树，按一组表达式的哈希缓存计算计划）
+COMPILE_CACHE_SIZE = 1024
+# 公共子表达式的中间结果变量名前缀（用户表达式不能使用下划线开头的变量，不会冲突）
+CSE_NAME_PREFIX = '_cse_'
+# 子表达式出现的次数达到该值时提取为中间结果
+CSE_MIN_OCCURRENCES = 2
+# 参与公共子表达式合并的节点类型（函数/方法调用和运算，取列、常量等开销很小的节点不合并）
+CSE_NODE_TYPES = (ast.Call, ast.BinOp, ast.UnaryOp, ast.Compare)
+# 内部不做合并的节点类型（lambda 和推导式引用局部变量，条件表达式的分支不一定执行）
+CSE_OPAQUE_NODE_TYPES = (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp, ast.IfExp, ast.BoolOp)
+
+
+class FactorExprError(ValueError):
+    """
+    因子表达式语法错误或校验失败
+    """
+
+
+class FactorExprPlan:
+    """
+    一组因子表达式的计算计划
+
+    多个因子共用的子表达式提取为中间结果，按依赖顺序编号；每个因子按需计算其依赖的中间结果，
+    同一次计算中每个中间结果只计算一次，计算失败时依赖它的因子抛出同一个异常
+    """
+
+    def __init__(
+        self,
+        factor_codes: list[CodeType | None],
+        factor_deps: list[list[str]],
+        intermediates: dict[str, CodeType],
+        intermediate_deps: dict[str, list[str]],
+        errors: list[str | None],
+    ) -> None:
+        self.factor_codes = factor_codes
+        self.factor_deps = factor_deps
+        self.intermediates = intermediates
+        self.intermediate_deps = intermediate_deps
+        # 每个表达式的编译错误，为 None 表示编译成功
+        self.errors = errors
+
+    def evaluate(self, index: int, env: dict[str, Any]) -> Any:
+        """
+        计算第 index 个表达式（中间结果保存在 env 中，供后续表达式复用）
+
+        :param index: 表达式序号
+        :param env: 计算环境（作为全局变量，需包含 __builtins__）
+        :return: 表达式结果
+        """
+        if self.errors[index]:
+            raise FactorExprError(self.errors[index])
+        for name in self.factor_deps[index]:
+            self._ensure_intermediate(name, env)
+        return eval(self.factor_codes[index], env)
+
+    def _ensure_intermediate(self, name: str, env: dict[str, Any]) -> None:
+        """
+        计算中间结果（已计算则跳过，之前计算失败则抛出同一个异常）
+
+        :param name: 中间结果变量名
+        :param env: 计算环境
+        :return: None
+        """
+        if name in env:
+            return
+        failures = env.setdefault('__factor_expr_failures__', {})
+        if name in failures:
+            raise failures[name]
+        for dep in self.intermediate_deps[name]:
+            self._ensure_intermediate(dep, env)
+        try:
+            env[name] = eval(self.intermediates[name], env)
+        except Exception as exc:
+            failures[name] = exc
+            raise
+
+
+class FactorExprCompiler:
+    """
+    因子表达式编译器
+
+    - 每个表达式只解析、校验一次，语法树按表达式文本的哈希缓存
+    - 一个任务（同一行情来源）的全部表达式一起编译：出现两次及以上的子表达式（跨因子或同一因子内）
+      提取为中间结果，每次计算只算一次，例如 ma5、ma10、bias5 共用的 close / close.shift(1) - 1
+    - 编译后的计算计划按这组表达式的哈希缓存，下次运行直接复用
+    """
+
+    _lock = threading.Lock()
+    _tree_cache: 'OrderedDict[str, ast.Expression]' = OrderedDict()
+    _plan_cache: 'OrderedDict[str, FactorExprPlan]' = OrderedDict()
+
+    @classmethod
+    def parse(cls, expr: str, allowed_names: frozenset[str]) -> ast.Expression:
+        """
+        解析并校验表达式（按哈希缓存，返回的语法树不能修改）
+
+        :param expr: 因子表达式
+        :param allowed_names: 表达式中可以使用的变量名
+        :return: 语法树
+        """
+        key = cls._hash(expr, *sorted(allowed_names))
+        with cls._lock:
+            tree = cls._tree_cache.get(key)
+            if tree is not None:
+                cls._tree_cache.move_to_end(key)
+                return tree
+        try:
+            tree = ast.parse(expr.strip(), mode='eval')
+        except SyntaxError as exc:
+            raise FactorExprError(f'表达式语法错误: {exc.msg}（第 {exc.offset} 列）') from exc
+        cls._validate(tree, allowed_names)
+        cls._cache_put(cls._tree_cache, key, tree)
+        return tree
+
+    @classmethod
+    def compile_plan(
+        cls, exprs: list[str], allowed_names: frozenset[str], extra_names: list[frozenset[str]] | None = None
+    ) -> FactorExprPlan:
+        """
+        编译一组表达式并合并公共子表达式
+
+        :param exprs: 因子表达式列表（空表达式不编译）
+        :param allowed_names: 表达式中可以使用的变量名
+        :param extra_names: 每个表达式额外可以使用的变量名（如依赖因子的代码），与 exprs 一一对应
+        :return: 计算计划
+        """
+        extra_names = extra_names or [frozenset()] * len(exprs)
+        key = cls._hash(*exprs, '\0', *sorted(allowed_names), *('\0'.join(sorted(names)) for names in extra_names))
+        with cls._lock:
+            plan = cls._plan_cache.get(key)
+            if plan is not None:
+                cls._plan_cache.move_to_end(key)
+                return plan
+
+        trees: list[ast.Expression | None] = []
+        errors: list[str | None] = []
+        for expr, names in zip(exprs, extra_names, strict=True):
+            if not expr or not expr.strip():
+                trees.append(None)
+                errors.append('未配置 expr 表达式')
+                continue
+            try:
+                # 合并公共子表达式会改写语法树，复制一份，不修改缓存
+                trees.append(copy.deepcopy(cls.parse(expr, allowed_names | names)))
+                errors.append(None)
+            except FactorExprError as exc:
+                trees.append(None)
+                errors.append(str(exc))
+
+        counts: dict[str, int] = {}
+        for tree in trees:
+            if tree is not None:
+                _count_subexpressions(tree.body, counts)
+        shared_keys = {node_key for node_key, count in counts.items() if count >= CSE_MIN_OCCURRENCES}
+
+        rewriter = _CommonSubexpressionRewriter(shared_keys)
+        factor_codes: list[CodeType | None] = []
+        factor_deps: list[list[str]] = []
+        for index, tree in enumerate(trees):
+            if tree is None:
+                factor_codes.append(None)
+                factor_deps.append([])
+                continue
+            body = rewriter.visit(tree.body)
+            factor_codes.append(_compile_node(body, f'<factor_expr_{index}>'))
+            factor_deps.append(_referenced_intermediates(body))
+
+        intermediates = {name: _compile_node(node, f'<factor_{name}>') for name, node in rewriter.intermediates.items()}
+        intermediate_deps = {name: _referenced_intermediates(node) for name, node in rewriter.intermediates.items()}
+        plan = FactorExprPlan(factor_codes, factor_deps, intermediates, intermediate_deps, errors)
+        cls._cache_put(cls._plan_cache, key, plan)
+        return plan
+
+    @classmethod
+    def _validate(cls, tree: ast.Expression, allowed_names: frozenset[str]) -> None:
+        """
+        校验表达式：不允许访问下划线开头的属性和变量，变量名必须是计算环境提供的名称或 lambda/推导式中的局部变量
+
+        :param tree: 语法树
+        :param allowed_names: 表达式中可以使用的变量名
+        :return: None
+        """
+        local_names: set[str] = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Lambda):
+                args = node.args
+                local_names.update(arg.arg for arg in [*args.posonlyargs, *args.args, *args.kwonlyargs])
+                local_names.update(arg.arg for arg in (args.vararg, args.kwarg) if arg is not None)
+            elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                local_names.add(node.id)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+                raise FactorExprError(f'表达式不允许访问属性 {node.attr}')
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id.startswith('_'):
+                    raise FactorExprError(f'表达式不允许使用变量 {node.id}')
+                if node.id not in allowed_names and node.id not in local_names:
+                    raise FactorExprError(
+                        f'表达式中的变量 {node.id} 未定义，可用变量: {", ".join(sorted(allowed_names))}'
+                    )
+            if isinstance(node, ast.NamedExpr):
+                raise FactorExprError('表达式不允许使用赋值表达式')
+
+    @classmethod
+    def _hash(cls, *parts: str) -> str:
+        """
+        计算缓存键
+
+        :param parts: 参与计算的文本
+        :return: 哈希值
+        """
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _cache_put(cls, cache: OrderedDict, key: str, value: Any) -> None:
+        """
+        写入缓存（超过容量时淘汰最久未使用的条目）
+
+        :param cache: 缓存
+        :param key: 缓存键
+        :param value: 缓存值
+        :return: None
+        """
+        with cls._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > COMPILE_CACHE_SIZE:
+                cache.popitem(last=False)
+
+
+def _count_subexpressions(node: ast.AST, counts: dict[str, int]) -> None:
+    """
+    统计可合并子表达式的出现次数（不进入 lambda、推导式和条件分支）
+
+    :param node: 语法树节点
+    :param counts: 子表达式 -> 出现次数
+    :return: None
+    """
+    if isinstance(node, CSE_OPAQUE_NODE_TYPES):
+        return
+    if isinstance(node, CSE_NODE_TYPES):
+        node_key = ast.dump(node)
+        counts[node_key] = counts.get(node_key, 0) + 1
+    for child in ast.iter_child_nodes(node):
+        _count_subexpressions(child, counts)
+
+
+class _CommonSubexpressionRewriter(ast.NodeTransformer):
+    """
+    把出现多次的子表达式替换为中间结果变量（后序遍历，内层中间结果先编号，保证依赖顺序）
+    """
+
+    def __init__(self, shared_keys: set[str]) -> None:
+        self.shared_keys = shared_keys
+        self.names: dict[str, str] = {}
+        self.intermediates: dict[str, ast.expr] = {}
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, CSE_OPAQUE_NODE_TYPES):
+            return node
+        node_key = ast.dump(node) if isinstance(node, CSE_NODE_TYPES) else None
+        node = super().generic_visit(node)
+        if node_key is None or node_key not in self.shared_keys:
+            return node
+        name = self.names.get(node_key)
+        if name is None:
+            name = f'{CSE_NAME_PREFIX}{len(self.names)}'
+            self.names[node_key] = name
+            self.intermediates[name] = node
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+
+def _referenced_intermediates(node: ast.AST) -> list[str]:
+    """
+    获取节点直接引用的中间结果变量
+
+    :param node: 语法树节点
+    :return: 中间结果变量名列表
+    """
+    return list(
+        dict.fromkeys(
+            child.id for child in ast.walk(node) if isinstance(child, ast.Name) and child.id.startswith(CSE_NAME_PREFIX)
+        )
+    )
+
+
+def _compile_node(node: ast.expr, filename: str) -> CodeType:
+    """
+    编译表达式节点
+
+    :param node: 表达式节点
+    :param filename: 编译文件名（出现在异常堆栈中）
+    :return: 代码对象
+    """
+    return compile(ast.fix_missing_locations(ast.Expression(body=node)), filename, 'eval')
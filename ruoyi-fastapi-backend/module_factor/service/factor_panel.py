@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from pandas.api.typing import Rolling
+
+# 面板的日期列
+PANEL_DATE_COLUMN = 'trade_date'
+
+
+class FactorPanel:
+    """
+    行情面板（日期 × 标的）
+
+    把按 trade_date、代码排序的长表行情转换为每个字段一个二维 numpy 数组（行为日期，列为标的），
+    时间序列算子沿日期方向计算，截面算子沿标的方向计算，不会把不同标的的数据混在一起：
+    - 字段在首次访问时转换并缓存，表达式中通过 panel["close"] 或 panel.close 访问
+    - 缺失的 (日期, 标的) 为 NaN
+    - 表达式返回的二维数组通过 to_series 还原为与长表索引对齐的 Series
+    """
+
+    def __init__(self, df: pd.DataFrame, symbol_col: str = 'ts_code') -> None:
+        self._df = df
+        date_codes, self.dates = pd.factorize(df[PANEL_DATE_COLUMN].astype(str), sort=True)
+        symbol_codes, self.symbols = pd.factorize(df[symbol_col].astype(str), sort=True)
+        self._date_codes = date_codes
+        self._symbol_codes = symbol_codes
+        self.shape = (len(self.dates), len(self.symbols))
+        self._fields: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        block = self._fields.get(field)
+        if block is None:
+            if field not in self._df.columns:
+                raise KeyError(f'行情数据中没有字段 {field}')
+            block = np.full(self.shape, np.nan)
+            block[self._date_codes, self._symbol_codes] = pd.to_numeric(self._df[field], errors='coerce').to_numpy(
+                dtype=float, na_value=np.nan
+            )
+            self._fields[field] = block
+        return block
+
+    def __getattr__(self, field: str) -> np.ndarray:
+        if field.startswith('_'):
+            raise AttributeError(field)
+        try:
+            return self[field]
+        except KeyError as exc:
+            raise AttributeError(str(exc)) from exc
+
+    def to_series(self, block: np.ndarray) -> pd.Series:
+        """
+        把面板数组还原为与长表行情索引对齐的 Series
+
+        :param block: 形状为 (日期数, 标的数) 的数组
+        :return: 因子值
+        """
+        return pd.Series(block[self._date_codes, self._symbol_codes], index=self._df.index)
+
+
+def _check_window(n: int) -> int:
+    """
+    校验窗口长度
+
+    :param n: 窗口长度
+    :return: 窗口长度
+    """
+    if isinstance(n, bool) or not isinstance(n, (int, np.integer)) or n < 1:
+        raise ValueError(f'窗口长度必须为正整数，实际为 {n!r}')
+    return int(n)
+
+
+def _rolling(x: np.ndarray, n: int) -> Rolling:
+    """
+    沿日期方向按列滑动（pandas 按列增量计算，内存占用与面板大小相同，不生成 日期数 × 标的数 × n 的临时数组；
+    窗口内有缺失值或不足 n 个日期时结果为 NaN）
+
+    :param x: 面板数组
+    :param n: 窗口长度
+    :return: 滑动窗口对象
+    """
+    return pd.DataFrame(np.asarray(x, dtype=float)).rolling(n)
+
+
+def delay(x: np.ndarray, n: int = 1) -> np.ndarray:
+    """
+    每个标的 n 个交易日前的值
+
+    :param x: 面板数组
+    :param n: 滞后的交易日数
+    :return: 面板数组
+    """
+    n = _check_window(n)
+    x = np.asarray(x, dtype=float)
+    result = np.full(x.shape, np.nan)
+    if n < x.shape[0]:
+        result[n:] = x[:-n]
+    return result
+
+
+def ts_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    每个标的最近 n 个交易日的均值（窗口内有缺失值时为 NaN）
+
+    :param x: 面板数组
+    :param n: 窗口长度
+    :return: 面板数组
+    """
+    return _rolling(x, _check_window(n)).mean().to_numpy()
+
+
+def ts_std(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    每个标的最近 n 个交易日的样本标准差（与 pandas rolling std 一致，ddof=1）
+
+    :param x: 面板数组
+    :param n: 窗口长度
+    :return: 面板数组
+    """
+    return _rolling(x, _check_window(n)).std(ddof=1).to_numpy()
+
+
+def ts_rank(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    每个标的当日值在最近 n 个交易日中的百分位排名（取值 (0, 1]，相同值取平均排名）
+
+    :param x: 面板数组
+    :param n: 窗口长度
+    :return: 面板数组
+    """
+    return _rolling(x, _check_window(n)).rank(method='average', pct=True).to_numpy()
+
+
+def cs_rank(x: np.ndarray) -> np.ndarray:
+    """
+    每个交易日在全部标的中的百分位排名（忽略 NaN，相同值取平均排名）
+
+    :param x: 面板数组
+    :return: 面板数组
+    """
+    return pd.DataFrame(np.asarray(x, dtype=float)).rank(axis=1, pct=True).to_numpy()
+
+
+def corr(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    每个标的两个序列最近 n 个交易日的皮尔逊相关系数（任一序列在窗口内为常数时为 NaN）
+
+    :param x: 面板数组
+    :param y: 面板数组
+    :param n: 窗口长度
+    :return: 面板数组
+    """
+    result = _rolling(x, _check_window(n)).corr(pd.DataFrame(np.asarray(y, dtype=float))).to_numpy()
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+# PY_EXPR 表达式中可以直接调用的面板算子
+PANEL_OPERATORS = {
+    'delay': delay,
+    'ts_mean': ts_mean,
+    'ts_std': ts_std,
+    'ts_rank': ts_rank,
+    'cs_rank': cs_rank,
+    'corr': corr,
+}
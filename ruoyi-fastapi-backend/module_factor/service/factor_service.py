@@ -3,7 +3,9 @@ from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from common.constant import JobConstant
 from common.vo import CrudResponseModel, PageModel
+from module_admin.service.job_queue_service import JobQueueService
 from module_factor.dao.factor_dao import FactorCalcLogDao, FactorDefinitionDao, FactorTaskDao, FactorValueDao
 from module_factor.entity.vo.factor_vo import (
     DeleteFactorDefinitionModel,
@@ -18,9 +20,7 @@ from module_factor.entity.vo.factor_vo import (
     FactorValueQueryModel,
 )
 from module_factor.service.factor_scheduler_service import FactorSchedulerService
-from module_factor.task.factor_calc_task import run_factor_task_sync
 from utils.log_util import logger
-import threading
 
 
 class FactorDefinitionService:
@@ -142,24 +142,28 @@ class FactorTaskService:
         return CrudResponseModel(is_success=True, message='删除因子任务成功')
 
     @classmethod
-    async def execute_task_services(cls, db: AsyncSession, task_id: int) -> CrudResponseModel:
+    async def execute_task_services(
+        cls, db: AsyncSession, task_id: int, priority: int = 0, create_by: str = ''
+    ) -> CrudResponseModel:
         """
-        手动触发因子任务执行（在后台线程中运行）
+        手动触发因子任务执行（提交到任务执行队列，同一任务在等待或运行中时不允许重复提交）
         """
         task_do = await FactorTaskDao.get_task_by_id(db, task_id)
         if not task_do:
             return CrudResponseModel(is_success=False, message='任务不存在')
-
-        def _run() -> None:
-            try:
-                run_factor_task_sync(task_id)
-            except Exception as exc:  # noqa: BLE001
-                logger.exception('执行因子任务(ID=%s) 失败: %s', task_id, exc)
-
-        thread = threading.Thread(target=_run, daemon=True)
-        thread.start()
-
-        return CrudResponseModel(is_success=True, message='因子任务已提交后台执行')
+        task_name = task_do.task_name
+
+        await JobQueueService.enqueue_job_services(
+            db,
+            queue_name=JobConstant.QUEUE_FACTOR_TASK,
+            task_id=task_id,
+            invoke_target='module_factor.task.factor_calc_task.run_factor_task',
+            job_name=f'factor_task_{task_name}',
+            priority=priority,
+            create_by=create_by,
+        )
+
+        return CrudResponseModel(is_success=True, message='因子任务已提交执行队列')
 
 
 class FactorValueService:
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import re
@@ -301,11 +302,11 @@ class ModelTrainService:
 
             logger.info(f'训练集大小：{len(X_train)}, 测试集大小：{len(X_test)}')
 
-            # 5. 训练模型
-            model = cls.train_model(X_train, y_train, model_params)
+            # 5. 训练模型（CPU密集，在线程中执行，避免阻塞后台任务运行时的事件循环）
+            model = await asyncio.to_thread(cls.train_model, X_train, y_train, model_params)
 
             # 6. 评估模型
-            metrics = cls.evaluate_model(model, X_test, y_test)
+            metrics = await asyncio.to_thread(cls.evaluate_model, model, X_test, y_test)
 
             # 7. 计算本次训练的模型版本号
             next_version = await ModelTrainResultDao.get_next_version_for_task(db, task_id)
@@ -2,12 +2,12 @@ import asyncio
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from datetime import datetime
 
 from config.database import AsyncSessionLocal
-from config.env import DataBaseConfig
+from config.get_worker import WorkerUtil
 from module_factor.dao.factor_dao import FactorCalcLogDao, FactorDefinitionDao, FactorTaskDao
 from module_factor.entity.do.factor_do import FactorCalcLog
 from module_factor.entity.vo.factor_vo import FactorTaskModel
@@ -17,9 +17,10 @@ from utils.log_util import logger
 
 async def run_factor_task(task_id: int, session: AsyncSession | None = None) -> None:
     """
-    因子计算异步入口
+    因子计算异步入口（执行失败时抛出异常，供任务执行队列和定时任务记录失败状态）
     """
     start_time = datetime.now()
+    succeeded = True
     use_external_session = session is not None
     task: Any | None = None
     task_name = ''
@@ -83,19 +84,46 @@ async def run_factor_task(task_id: int, session: AsyncSession | None = None) ->
             logger.warning(error_message)
             raise ValueError(error_message)
 
-        # 调用真正的因子计算引擎（内部会提交事务）
-        await FactorCalcService.calc_task(session, task_do, factor_defs)
+        # 调用真正的因子计算引擎（内部会提交事务，部分因子计算失败时返回 False）
+        succeeded = await FactorCalcService.calc_task(session, task_do, factor_defs)
         
-        # 更新任务统计信息（成功）
+        # 更新任务统计信息
         # 注意：calc_task内部已经提交了事务，这里需要重新开始一个事务
         try:
             await FactorTaskDao.update_task_run_stats_dao(
-                session, task_id, is_success=True, last_run_time=datetime.now()
+                session, task_id, is_success=succeeded, last_run_time=datetime.now()
             )
             await session.commit()
         except Exception as stats_exc:  # noqa: BLE001
             logger.exception('更新任务统计信息失败: %s', stats_exc)
             await session.rollback()
+    except asyncio.CancelledError:
+        # 任务被取消（服务停止、工作进程退出等）时记录失败日志和统计，再继续传播取消
+        logger.warning('因子任务 %s(ID=%s) 被取消', task_name or f'task_{task_id}', task_id)
+        try:
+            if session:
+                await session.rollback()
+                log = FactorCalcLog(
+                    task_id=task_id or 0,
+                    task_name=task_name or f'task_{task_id}',
+                    factor_codes=task_factor_codes,
+                    symbol_universe=task_symbol_universe,
+                    start_date=task_start_date,
+                    end_date=task_end_date,
+                    status='1',
+                    record_count=0,
+                    duration=int((datetime.now() - start_time).total_seconds()),
+                    error_message='任务已取消',
+                    create_time=datetime.now(),
+                )
+                await FactorCalcLogDao.add_log_dao(session, log)
+                await FactorTaskDao.update_task_run_stats_dao(
+                    session, task_id, is_success=False, last_run_time=datetime.now()
+                )
+                await session.commit()
+        except Exception as cancel_exc:
+            logger.exception('记录被取消因子任务的运行信息失败: %s', cancel_exc)
+        raise
     except Exception as exc:  # noqa: BLE001
         # 记录错误日志
         duration = int((datetime.now() - start_time).total_seconds())
@@ -131,47 +159,20 @@ async def run_factor_task(task_id: int, session: AsyncSession | None = None) ->
                 await session.commit()
         except Exception as stats_exc:  # noqa: BLE001
             logger.exception('更新任务统计信息失败: %s', stats_exc)
+        # 记录完成后继续抛出，由调用方（任务执行队列、定时任务）记录失败状态
+        raise
     finally:
         if not use_external_session and session is not None:
             await session.close()
 
+    if not succeeded:
+        # 失败的因子已记录到因子计算日志，这里抛出异常使调用方记录失败状态
+        raise RuntimeError(f'因子任务 {task_name or task_id} 部分因子计算失败，详见因子计算日志')
+
 
 def run_factor_task_sync(task_id: int) -> None:
     """
-    同步入口，供调度器调用（与 Tushare 下载任务类似，独立事件循环和连接池）
+    同步入口，供调度器调用（提交到后台任务运行时执行，共享事件循环和连接池，并等待执行完成）
     """
-    from urllib.parse import quote_plus
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    try:
-        async_db_url = (
-            f'mysql+asyncmy://{DataBaseConfig.db_username}:{quote_plus(DataBaseConfig.db_password)}@'
-            f'{DataBaseConfig.db_host}:{DataBaseConfig.db_port}/{DataBaseConfig.db_database}'
-        )
-        if DataBaseConfig.db_type == 'postgresql':
-            async_db_url = (
-                f'postgresql+asyncpg://{DataBaseConfig.db_username}:{quote_plus(DataBaseConfig.db_password)}@'
-                f'{DataBaseConfig.db_host}:{DataBaseConfig.db_port}/{DataBaseConfig.db_database}'
-            )
-
-        thread_engine = create_async_engine(
-            async_db_url,
-            echo=DataBaseConfig.db_echo,
-            max_overflow=DataBaseConfig.db_max_overflow,
-            pool_size=DataBaseConfig.db_pool_size,
-            pool_recycle=DataBaseConfig.db_pool_recycle,
-            pool_timeout=DataBaseConfig.db_pool_timeout,
-        )
-        ThreadSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=thread_engine)
-
-        async def run_with_session() -> None:
-            async with ThreadSessionLocal() as session:
-                await run_factor_task(task_id, session=session)
-
-        loop.run_until_complete(run_with_session())
-        loop.run_until_complete(thread_engine.dispose())
-    finally:
-        loop.close()
+    WorkerUtil.run_job(f'factor_task_{task_id}', lambda session: run_factor_task(task_id, session=session))
 
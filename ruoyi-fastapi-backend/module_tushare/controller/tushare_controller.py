@@ -602,6 +602,45 @@ async def export_tushare_api_config_list(
     return ResponseUtil.streaming(data=bytes2file_response(api_config_export_result))
 
 
+@tushare_controller.put(
+    '/dataTable/optimize/{table_name}',
+    summary='优化Tushare数据表结构接口',
+    description='用于将已有数据表的日期列、代码列迁移为紧凑类型，并补充股票代码 + 交易日期复合索引（按需手动执行，会重写数据表）',
+    response_model=ResponseBaseModel,
+    dependencies=[UserInterfaceAuthDependency('tushare:apiConfig:edit')],
+)
+@Log(title='Tushare数据表', business_type=BusinessType.UPDATE)
+async def optimize_tushare_data_table(
+    request: Request,
+    table_name: Annotated[str, Path(description='数据表名')],
+    query_db: Annotated[AsyncSession, DBSessionDependency()],
+) -> Response:
+    optimize_result = await TushareApiConfigService.optimize_table_schema_services(query_db, table_name)
+    logger.info(optimize_result.message)
+
+    return ResponseUtil.success(msg=optimize_result.message)
+
+
+@tushare_controller.delete(
+    '/dataTable/partition/{table_name}',
+    summary='删除Tushare数据表历史分区接口',
+    description='用于删除按交易日期分区的数据表中，数据全部早于指定日期的月分区',
+    response_model=ResponseBaseModel,
+    dependencies=[UserInterfaceAuthDependency('tushare:apiConfig:edit')],
+)
+@Log(title='Tushare数据表', business_type=BusinessType.DELETE)
+async def drop_tushare_data_table_partitions(
+    request: Request,
+    table_name: Annotated[str, Path(description='数据表名')],
+    before_date: Annotated[str, Query(description='日期（YYYYMMDD），删除数据全部早于该日期的分区')],
+    query_db: Annotated[AsyncSession, DBSessionDependency()],
+) -> Response:
+    drop_result = await TushareApiConfigService.drop_table_partitions_services(query_db, table_name, before_date)
+    logger.info(drop_result.message)
+
+    return ResponseUtil.success(msg=drop_result.message)
+
+
 # ==================== Tushare下载任务管理 ====================
 
 @tushare_controller.get(
@@ -780,8 +819,13 @@ async def execute_tushare_download_task(
     request: Request,
     task_id: Annotated[int, Path(description='任务ID')],
     query_db: Annotated[AsyncSession, DBSessionDependency()],
+    current_user: Annotated[CurrentUserModel, CurrentUserDependency()],
+    resume: Annotated[bool, Query(description='是否从上次失败或中断的运行断点继续执行')] = False,
+    priority: Annotated[int, Query(description='执行队列优先级（数值越大越先执行）')] = 0,
 ) -> Response:
-    execute_task_result = await TushareDownloadTaskService.execute_task_services(query_db, task_id)
+    execute_task_result = await TushareDownloadTaskService.execute_task_services(
+        query_db, task_id, resume, priority, current_user.user.user_name
+    )
     logger.info(execute_task_result.message)
 
     return ResponseUtil.success(msg=execute_task_result.message)
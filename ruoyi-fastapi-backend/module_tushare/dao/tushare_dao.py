@@ -3,15 +3,28 @@ from typing import Any
 from datetime import datetime
 
 import pandas as pd
-from sqlalchemy import delete, select, update
+from sqlalchemy import case, delete, func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from common.vo import PageModel
+from config.env import DataBaseConfig
+from module_tushare.dao.tushare_partition_dao import PARTITION_COLUMN, TusharePartitionDao
+from module_tushare.dao.tushare_schema_registry import (
+    CODE_DATE_INDEX_COLUMNS,
+    COMPACT_CODE_MAX_LENGTH,
+    COMPACT_CODE_TYPE,
+    COMPACT_DATE_TYPE,
+    TushareSchemaRegistry,
+    is_code_column,
+    is_date_column,
+)
 from module_tushare.entity.do.tushare_do import (
     TushareApiConfig,
     TushareData,
     TushareDownloadLog,
     TushareDownloadRun,
+    TushareDownloadRunCheckpoint,
+    TushareDownloadRunMetric,
     TushareDownloadTask,
     TushareWorkflowConfig,
     TushareWorkflowStep,
@@ -543,6 +556,9 @@ class TushareDownloadRunDao:
         success_records: int | None = None,
         fail_records: int | None = None,
         error_message: str | None = None,
+        cache_hits: int | None = None,
+        cache_misses: int | None = None,
+        checkpoint: str | None = None,
         set_start_time: bool = False,
         set_end_time: bool = False,
     ) -> int:
@@ -562,6 +578,12 @@ class TushareDownloadRunDao:
             values['fail_records'] = fail_records
         if error_message is not None:
             values['error_message'] = error_message
+        if cache_hits is not None:
+            values['cache_hits'] = cache_hits
+        if cache_misses is not None:
+            values['cache_misses'] = cache_misses
+        if checkpoint is not None:
+            values['checkpoint'] = checkpoint
         now = datetime.now()
         if set_start_time:
             values['start_time'] = now
@@ -574,6 +596,160 @@ class TushareDownloadRunDao:
             )
         return run_id
 
+    @classmethod
+    async def get_resumable_run(cls, db: AsyncSession, task_id: int) -> TushareDownloadRun | None:
+        """
+        获取任务最近一次可断点续跑的运行记录（失败或中断且记录了断点信息）
+
+        :param db: orm对象
+        :param task_id: 任务ID
+        :return: 运行记录
+        """
+        latest_run = (
+            (
+                await db.execute(
+                    select(TushareDownloadRun)
+                    .where(TushareDownloadRun.task_id == task_id)
+                    .order_by(TushareDownloadRun.run_id.desc())
+                    .limit(1)
+                )
+            )
+            .scalars()
+            .first()
+        )
+        if latest_run and latest_run.status in ('FAILED', 'RUNNING') and latest_run.checkpoint:
+            return latest_run
+        return None
+
+    @classmethod
+    async def fail_unfinished_runs(cls, db: AsyncSession, task_id: int, error_message: str) -> int:
+        """
+        把任务未结束（PENDING/RUNNING）的运行记录标记为失败（保留断点信息，可以断点续跑）
+
+        :param db: orm对象
+        :param task_id: 任务ID
+        :param error_message: 错误信息
+        :return: 更新的记录数
+        """
+        now = datetime.now()
+        result = await db.execute(
+            update(TushareDownloadRun)
+            .where(TushareDownloadRun.task_id == task_id, TushareDownloadRun.status.in_(['PENDING', 'RUNNING']))
+            .values(status='FAILED', error_message=error_message, end_time=now, update_time=now)
+        )
+        return result.rowcount
+
+
+class TushareDownloadRunCheckpointDao:
+    """
+    Tushare下载运行步骤断点表数据库操作层
+
+    每个步骤只由执行它的分支写入自己的断点行，并行分支之间不会互相覆盖或争用同一行锁
+    """
+
+    @classmethod
+    async def save_step_checkpoint(
+        cls, db: AsyncSession, run_id: int, step_key: str, completed: bool, combo_keys: str | None
+    ) -> None:
+        """
+        保存步骤断点（不提交，与步骤数据在同一事务中提交）
+
+        :param db: orm对象
+        :param run_id: 运行ID
+        :param step_key: 步骤键
+        :param completed: 步骤是否已完成
+        :param combo_keys: 已提交的参数组合键（JSON数组）
+        :return:
+        """
+        values = {'completed': '1' if completed else '0', 'combo_keys': combo_keys, 'update_time': datetime.now()}
+        result = await db.execute(
+            update(TushareDownloadRunCheckpoint)
+            .where(TushareDownloadRunCheckpoint.run_id == run_id, TushareDownloadRunCheckpoint.step_key == step_key)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            db.add(TushareDownloadRunCheckpoint(run_id=run_id, step_key=step_key, **values))
+            await db.flush()
+
+    @classmethod
+    async def get_run_checkpoints(cls, db: AsyncSession, run_id: int) -> list[TushareDownloadRunCheckpoint]:
+        """
+        获取运行的全部步骤断点
+
+        :param db: orm对象
+        :param run_id: 运行ID
+        :return: 步骤断点列表
+        """
+        return list(
+            (
+                await db.execute(
+                    select(TushareDownloadRunCheckpoint).where(TushareDownloadRunCheckpoint.run_id == run_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    @classmethod
+    async def delete_run_checkpoints(cls, db: AsyncSession, run_id: int) -> None:
+        """
+        删除运行的全部步骤断点（运行成功后不再需要续跑）
+
+        :param db: orm对象
+        :param run_id: 运行ID
+        :return:
+        """
+        await db.execute(delete(TushareDownloadRunCheckpoint).where(TushareDownloadRunCheckpoint.run_id == run_id))
+
+
+class TushareDownloadRunMetricDao:
+    """
+    Tushare下载运行指标表数据库操作层
+    """
+
+    @classmethod
+    async def add_metric_dao(cls, db: AsyncSession, metric: TushareDownloadRunMetric) -> None:
+        """
+        新增运行指标
+
+        :param db: orm对象
+        :param metric: 运行指标对象
+        :return:
+        """
+        db.add(metric)
+        await db.flush()
+
+    @classmethod
+    async def get_step_metric_statistics(cls, db: AsyncSession, task_id: int) -> list[Any]:
+        """
+        按步骤汇总任务的运行指标（单条分组查询，使用 task_id + step_id 索引）
+
+        :param db: orm对象
+        :param task_id: 任务ID
+        :return: 每个步骤的汇总行（step_id 为空的行为单接口任务的运行）
+        """
+        metric = TushareDownloadRunMetric
+        query = (
+            select(
+                metric.step_id,
+                func.count(metric.metric_id).label('execute_count'),
+                func.sum(case((metric.status == '0', 1), else_=0)).label('success_count'),
+                func.sum(case((metric.status == '1', 1), else_=0)).label('fail_count'),
+                func.sum(metric.row_count).label('total_records'),
+                func.sum(metric.combo_count).label('combo_count'),
+                func.sum(metric.fail_combo_count).label('fail_combo_count'),
+                func.sum(metric.api_call_count).label('api_call_count'),
+                func.sum(metric.api_wait_ms).label('api_wait_ms'),
+                func.sum(metric.db_write_ms).label('db_write_ms'),
+                func.sum(metric.duration_ms).label('duration_ms'),
+                func.max(metric.create_time).label('last_run_time'),
+            )
+            .where(metric.task_id == task_id)
+            .group_by(metric.step_id)
+        )
+
+        return list((await db.execute(query)).all())
+
 
 class TushareDataDao:
     """
@@ -644,49 +820,15 @@ class TushareDataDao:
         :param table_name: 表名
         :return: 唯一键字段列表
         """
-        from sqlalchemy import text
-        from config.env import DataBaseConfig
         import re
         
         # 验证表名，防止SQL注入
         if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name):
             raise ValueError(f'无效的表名: {table_name}')
         
-        unique_keys = []
-        
-        if DataBaseConfig.db_type == 'postgresql':
-            # PostgreSQL: 查询主键和唯一索引
-            query_sql = """
-                SELECT DISTINCT ccu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.constraint_column_usage ccu 
-                    ON tc.constraint_name = ccu.constraint_name
-                    AND tc.table_schema = ccu.table_schema
-                WHERE tc.table_schema = 'public'
-                    AND tc.table_name = :table_name
-                    AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE')
-                ORDER BY ccu.column_name
-            """
-            result = await db.execute(text(query_sql), {'table_name': table_name})
-            unique_keys = [row[0] for row in result.fetchall()]
-        else:
-            # MySQL: 查询主键和唯一索引
-            query_sql = """
-                SELECT DISTINCT kcu.column_name
-                FROM information_schema.key_column_usage kcu
-                JOIN information_schema.table_constraints tc
-                    ON kcu.constraint_name = tc.constraint_name
-                    AND kcu.table_schema = tc.table_schema
-                    AND kcu.table_name = tc.table_name
-                WHERE kcu.table_schema = DATABASE()
-                    AND kcu.table_name = :table_name
-                    AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE')
-                ORDER BY kcu.ordinal_position, kcu.column_name
-            """
-            result = await db.execute(text(query_sql), {'table_name': table_name})
-            unique_keys = [row[0] for row in result.fetchall()]
-        
-        return unique_keys
+        # 使用进程级表结构缓存，避免每次都查询系统目录
+        table_schema = await TushareSchemaRegistry.get_table_schema(db, table_name)
+        return list(table_schema.unique_key_columns)
 
     @classmethod
     async def get_unique_key_fields(
@@ -707,8 +849,6 @@ class TushareDataDao:
         :param primary_key_fields_str: 主键字段JSON字符串（可选，优先使用此参数避免访问 config 对象）
         :return: 唯一键字段列表
         """
-        from sqlalchemy import text
-        from config.env import DataBaseConfig
         from utils.log_util import logger
         
         # 第一优先级：步骤配置的唯一键字段
@@ -716,29 +856,8 @@ class TushareDataDao:
             logger.debug(f'使用步骤配置的唯一键字段: {step_unique_key_fields}')
             return step_unique_key_fields
         
-        # 检查表是否存在
-        table_exists = False
-        if DataBaseConfig.db_type == 'postgresql':
-            check_sql = """
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = :table_name
-                )
-            """
-        else:
-            check_sql = """
-                SELECT COUNT(*) as count
-                FROM information_schema.tables 
-                WHERE table_schema = DATABASE()
-                AND table_name = :table_name
-            """
-        
-        result = await db.execute(text(check_sql), {'table_name': table_name})
-        if DataBaseConfig.db_type == 'postgresql':
-            table_exists = result.scalar()
-        else:
-            table_exists = result.scalar() > 0
+        # 检查表是否存在（使用进程级表结构缓存）
+        table_exists = (await TushareSchemaRegistry.get_table_schema(db, table_name)).exists
         
         # 第二优先级：如果表已存在，且接口配置的主键字段也有，则优先使用接口配置的主键字段
         # 优先使用传入的 primary_key_fields_str，避免访问 config 对象导致延迟加载
@@ -814,86 +933,478 @@ class TushareDataDao:
         :param columns: 列名列表
         :return: 是否存在唯一约束
         """
-        from sqlalchemy import text
-        from config.env import DataBaseConfig
         from utils.log_util import logger
         
         if not columns or len(columns) == 0:
             return False
         
         try:
-            if DataBaseConfig.db_type == 'postgresql':
-                # PostgreSQL: 检查唯一约束或唯一索引
-                # 方法：检查约束的列名是否完全匹配（不区分顺序）
-                columns_sorted = sorted(columns)
-                
-                # 构建列名数组的字符串表示（用于 SQL 比较）
-                # 注意：这里使用字符串拼接是因为 PostgreSQL 数组字面量需要特殊格式
-                columns_array_str = '{' + ','.join([f'"{col}"' for col in columns_sorted]) + '}'
-                
-                # 查询所有唯一约束，然后检查列名是否匹配
-                # 使用 f-string 是因为 PostgreSQL 数组字面量不能通过参数绑定
-                check_sql = f"""
-                    SELECT EXISTS (
-                        SELECT 1
-                        FROM pg_constraint c
-                        JOIN pg_class t ON c.conrelid = t.oid
-                        JOIN pg_namespace n ON t.relnamespace = n.oid
-                        WHERE n.nspname = 'public'
-                        AND t.relname = :table_name
-                        AND c.contype = 'u'
-                        AND array_length(c.conkey, 1) = :col_count
-                        AND (
-                            SELECT array_agg(a.attname::text ORDER BY a.attname)
-                            FROM pg_attribute a
-                            WHERE a.attrelid = c.conrelid
-                            AND a.attnum = ANY(c.conkey)
-                        ) = '{columns_array_str}'::text[]
-                    )
+            # PostgreSQL 检查唯一约束（不区分列顺序），MySQL 检查唯一索引（区分列顺序），均使用进程级表结构缓存
+            table_schema = await TushareSchemaRegistry.get_table_schema(db, table_name)
+            result_bool = table_schema.has_unique_constraint(columns)
+            logger.debug(f'表 {table_name} 唯一约束检查: 字段 {columns} -> {result_bool}')
+            return result_bool
+        except Exception as e:
+            logger.warning(f'检查表 {table_name} 的唯一约束时出错: {e}，假设不存在')
+            return False
+
+    @classmethod
+    async def optimize_table_schema_dao(cls, db: AsyncSession, table_name: str) -> list[str]:
+        """
+        将已有数据表迁移为紧凑列类型并补充股票代码 + 交易日期复合索引
+
+        - 全部为 YYYYMMDD 的日期列改为 CHAR(8)
+        - 最大长度不超过 20 的代码列改为 VARCHAR(32)
+        - 缺少 (ts_code, trade_date) 开头的索引时创建复合索引
+        浮点列不做转换（转换为单精度可能丢失已有数据的精度）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 执行的变更说明列表
+        """
+        import re
+        from sqlalchemy import text
+        from config.env import DataBaseConfig
+        from utils.log_util import logger
+
+        if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name):
+            raise ValueError(f'无效的表名: {table_name}')
+
+        is_postgresql = DataBaseConfig.db_type == 'postgresql'
+        quote = '"' if is_postgresql else '`'
+        table_name_escaped = f'{quote}{table_name}{quote}'
+        schema_name_condition = "table_schema = 'public'" if is_postgresql else 'table_schema = DATABASE()'
+        columns_result = await db.execute(
+            text(
+                f"""
+                SELECT column_name, data_type, character_maximum_length, is_nullable
+                FROM information_schema.columns
+                WHERE {schema_name_condition} AND table_name = :table_name
+                ORDER BY ordinal_position
                 """
-                
-                result = await db.execute(
-                    text(check_sql),
-                    {
-                        'table_name': table_name,
-                        'col_count': len(columns)
-                    }
+            ),
+            {'table_name': table_name},
+        )
+        column_rows = columns_result.fetchall()
+        if not column_rows:
+            raise ValueError(f'数据表 {table_name} 不存在')
+
+        # 只处理仍为宽字符串类型的日期列和代码列
+        candidates = []
+        for column_name, data_type, max_length, is_nullable in column_rows:
+            if str(data_type).lower() not in ('character varying', 'varchar', 'text'):
+                continue
+            if is_date_column(column_name):
+                candidates.append((column_name, COMPACT_DATE_TYPE, is_nullable))
+            elif is_code_column(column_name) and (max_length is None or max_length > 32):
+                candidates.append((column_name, COMPACT_CODE_TYPE, is_nullable))
+
+        # 一次扫描统计所有候选列：非空数量、非 YYYYMMDD 数量、最大长度
+        column_types: dict[str, str] = {
+            row[0]: (f'VARCHAR({row[2]})' if row[2] else str(row[1]).upper()) for row in column_rows
+        }
+        changes: list[str] = []
+        if candidates:
+            length_func = 'LENGTH' if is_postgresql else 'CHAR_LENGTH'
+            aggregates = []
+            for column_name, _, _ in candidates:
+                column_escaped = f'{quote}{column_name}{quote}'
+                mismatch = (
+                    f"{column_escaped} !~ '^[0-9]{{8}}$'" if is_postgresql else f"{column_escaped} NOT REGEXP '^[0-9]{{8}}$'"
                 )
-                exists = result.scalar()
-                result_bool = bool(exists) if exists is not None else False
-                logger.debug(f'表 {table_name} 唯一约束检查: 字段 {columns} -> {result_bool}')
-                return result_bool
+                aggregates.extend(
+                    [
+                        f'COUNT({column_escaped})',
+                        f'SUM(CASE WHEN {mismatch} THEN 1 ELSE 0 END)',
+                        f'MAX({length_func}({column_escaped}))',
+                    ]
+                )
+            stats = (await db.execute(text(f'SELECT {", ".join(aggregates)} FROM {table_name_escaped}'))).first()
+
+            alter_clauses = []
+            for index, (column_name, target_type, is_nullable) in enumerate(candidates):
+                non_null_count, mismatch_count, max_length = stats[index * 3 : index * 3 + 3]
+                if not non_null_count:
+                    continue
+                if target_type == COMPACT_DATE_TYPE and mismatch_count:
+                    continue
+                if target_type == COMPACT_CODE_TYPE and max_length > COMPACT_CODE_MAX_LENGTH:
+                    continue
+                column_escaped = f'{quote}{column_name}{quote}'
+                if is_postgresql:
+                    alter_clauses.append(f'ALTER COLUMN {column_escaped} TYPE {target_type}')
+                else:
+                    not_null = ' NOT NULL' if is_nullable == 'NO' else ''
+                    alter_clauses.append(f'MODIFY COLUMN {column_escaped} {target_type}{not_null}')
+                column_types[column_name] = target_type
+                changes.append(f'{column_name} -> {target_type}')
+            if alter_clauses:
+                # 合并为一条 ALTER TABLE，只重写一次表
+                await db.execute(text(f'ALTER TABLE {table_name_escaped} {", ".join(alter_clauses)}'))
+
+        # 补充 (ts_code, trade_date) 复合索引
+        if all(col in column_types for col in CODE_DATE_INDEX_COLUMNS):
+            if is_postgresql:
+                index_check_sql = """
+                    SELECT COUNT(*)
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indrelid
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = 'public'
+                        AND c.relname = :table_name
+                        AND ARRAY(
+                            SELECT a.attname::text
+                            FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                            WHERE k.ord <= 2
+                            ORDER BY k.ord
+                        ) = ARRAY['ts_code', 'trade_date']
+                """
             else:
-                # MySQL: 检查唯一索引
-                check_sql = """
-                    SELECT COUNT(*) > 0
-                    FROM information_schema.statistics
-                    WHERE table_schema = DATABASE()
-                    AND table_name = :table_name
-                    AND index_name IN (
-                        SELECT index_name
-                        FROM information_schema.statistics
-                        WHERE table_schema = DATABASE()
-                        AND table_name = :table_name
-                        AND non_unique = 0
-                        GROUP BY index_name
-                        HAVING COUNT(*) = :col_count
-                        AND GROUP_CONCAT(column_name ORDER BY seq_in_index) = :columns
-                    )
+                index_check_sql = """
+                    SELECT COUNT(*)
+                    FROM information_schema.statistics s1
+                    JOIN information_schema.statistics s2
+                        ON s1.table_schema = s2.table_schema
+                        AND s1.table_name = s2.table_name
+                        AND s1.index_name = s2.index_name
+                    WHERE s1.table_schema = DATABASE()
+                        AND s1.table_name = :table_name
+                        AND s1.seq_in_index = 1 AND s1.column_name = 'ts_code'
+                        AND s2.seq_in_index = 2 AND s2.column_name = 'trade_date'
                 """
-                columns_str = ','.join(columns)
-                result = await db.execute(
-                    text(check_sql),
-                    {
-                        'table_name': table_name,
-                        'col_count': len(columns),
-                        'columns': columns_str
-                    }
+            index_exists = (await db.execute(text(index_check_sql), {'table_name': table_name})).scalar() > 0
+            # MySQL 的 utf8mb4 VARCHAR(500) 复合索引会超过索引长度限制，只在两列都是紧凑类型时创建
+            index_supported = is_postgresql or all(
+                column_types[col] in (COMPACT_CODE_TYPE, COMPACT_DATE_TYPE) for col in CODE_DATE_INDEX_COLUMNS
+            )
+            if not index_exists and index_supported:
+                idx_suffix = table_name[-20:] if len(table_name) > 20 else table_name
+                index_cols = ', '.join(CODE_DATE_INDEX_COLUMNS)
+                await db.execute(text(f'CREATE INDEX idx_tstd_{idx_suffix} ON {table_name_escaped}({index_cols})'))
+                changes.append(f'创建索引 idx_tstd_{idx_suffix} ({index_cols})')
+            elif not index_exists:
+                logger.warning(f'表 {table_name} 的 ts_code/trade_date 不是紧凑类型，MySQL 无法创建复合索引')
+
+        # 执行了 DDL，事务提交前不缓存该表的结构
+        TushareSchemaRegistry.mark_pending_ddl(db, table_name)
+        logger.info(f'数据表 {table_name} 结构优化完成: {changes if changes else "无需变更"}')
+        return changes
+
+    @classmethod
+    def _prepare_load_frame(
+        cls, df: pd.DataFrame, df_columns: list[str], system_values: dict[str, Any]
+    ) -> pd.DataFrame:
+        """
+        向量化构建待写入的数据（系统列 + DataFrame 列，列名为安全列名）
+
+        :param df: pandas DataFrame
+        :param df_columns: 安全列名列表（与 df.columns 一一对应）
+        :param system_values: 系统列的值
+        :return: 待写入的 DataFrame
+        """
+        load_df = df.set_axis(df_columns, axis=1)
+        system_df = pd.DataFrame(system_values, index=load_df.index)
+        return pd.concat([system_df, load_df], axis=1)
+
+    @classmethod
+    async def _copy_to_staging_table(
+        cls, db: AsyncSession, table_name: str, load_df: pd.DataFrame, all_columns: list[str]
+    ) -> str:
+        """
+        PostgreSQL: 创建与目标表列类型一致的临时表，并通过 COPY FROM STDIN 导入数据
+
+        :param db: 数据库会话
+        :param table_name: 目标表名
+        :param load_df: 待写入的数据
+        :param all_columns: 列名列表
+        :return: 临时表名
+        """
+        import io
+        import uuid
+
+        from sqlalchemy import text
+
+        staging_table = f'_stg_{table_name[:40]}_{uuid.uuid4().hex[:8]}'
+        col_names = ', '.join([f'"{col}"' for col in all_columns])
+        await db.execute(
+            text(
+                f'CREATE TEMP TABLE "{staging_table}" ON COMMIT DROP AS '
+                f'SELECT {col_names} FROM "{table_name}" WITH NO DATA'
+            )
+        )
+        # 整数列包含空值时在 DataFrame 中是浮点类型，写入 CSV 为 1.0 无法导入整数列，先转换为可空整数类型
+        table_schema = await TushareSchemaRegistry.get_table_schema(db, table_name)
+        int_columns = {
+            col: 'Int64'
+            for col in all_columns
+            if 'int' in str(table_schema.columns.get(col, '')).lower()
+            and pd.api.types.is_float_dtype(load_df[col])
+            and (load_df[col].dropna() % 1 == 0).all()
+        }
+        if int_columns:
+            load_df = load_df.astype(int_columns)
+        # 使用 CSV 格式由数据库完成类型转换，\N 表示 NULL（与空字符串区分）
+        buffer = io.BytesIO(load_df.to_csv(index=False, header=False, na_rep='\\N').encode('utf-8'))
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_to_table(
+            staging_table, source=buffer, columns=all_columns, format='csv', null='\\N'
+        )
+        return staging_table
+
+    @classmethod
+    async def _insert_multi_row_values(
+        cls, db: AsyncSession, insert_prefix: str, insert_suffix: str, rows: list[tuple], column_count: int
+    ) -> int:
+        """
+        MySQL: 按批次拼接多行 VALUES 执行插入
+
+        :param db: 数据库会话
+        :param insert_prefix: INSERT 语句前缀（到列名列表为止）
+        :param insert_suffix: INSERT 语句后缀（如 ON DUPLICATE KEY UPDATE 子句）
+        :param rows: 行数据
+        :param column_count: 列数
+        :return: 受影响的行数
+        """
+        from config.env import TushareConfig
+
+        batch_size = max(1, TushareConfig.tushare_bulk_load_batch_size)
+        row_placeholder = '(' + ', '.join(['%s'] * column_count) + ')'
+        connection = await db.connection()
+        affected_rows = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            insert_sql = f'{insert_prefix} VALUES {", ".join([row_placeholder] * len(batch))}{insert_suffix}'
+            params = tuple(value for row in batch for value in row)
+            result = await connection.exec_driver_sql(insert_sql, params)
+            affected_rows += result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(batch)
+        return affected_rows
+
+    @classmethod
+    async def _delete_by_unique_keys(cls, db: AsyncSession, table_name: str, key_df: pd.DataFrame) -> None:
+        """
+        按唯一键批量删除数据（多行键值合并为一条 IN 语句，包含空值的键逐条删除）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param key_df: 唯一键的值（列为唯一键字段）
+        :return: None
+        """
+        from sqlalchemy import text
+        from config.env import DataBaseConfig, TushareConfig
+
+        quote = '"' if DataBaseConfig.db_type == 'postgresql' else '`'
+        key_fields = list(key_df.columns)
+        key_cols = ', '.join([f'{quote}{col}{quote}' for col in key_fields])
+        key_df = key_df.astype(object).where(key_df.notna(), None)
+        has_null = key_df.isna().any(axis=1)
+        batch_size = max(1, TushareConfig.tushare_bulk_load_batch_size)
+
+        complete_rows = list(key_df[~has_null].itertuples(index=False, name=None))
+        for start in range(0, len(complete_rows), batch_size):
+            delete_params = {}
+            row_placeholders = []
+            for row_index, row in enumerate(complete_rows[start : start + batch_size]):
+                placeholders = []
+                for field_index, value in enumerate(row):
+                    param_name = f'key_{row_index}_{field_index}'
+                    delete_params[param_name] = value
+                    placeholders.append(f':{param_name}')
+                row_placeholders.append('(' + ', '.join(placeholders) + ')')
+            delete_sql = (
+                f'DELETE FROM {quote}{table_name}{quote} WHERE ({key_cols}) IN ({", ".join(row_placeholders)})'
+            )
+            await db.execute(text(delete_sql), delete_params)
+
+        # 唯一键包含空值时无法使用 IN 匹配，逐条使用 IS NULL 条件删除
+        for row in key_df[has_null].itertuples(index=False, name=None):
+            conditions = []
+            delete_params = {}
+            for field_index, (key_field, key_value) in enumerate(zip(key_fields, row, strict=True)):
+                if key_value is None:
+                    conditions.append(f'{quote}{key_field}{quote} IS NULL')
+                else:
+                    param_name = f'key_{field_index}'
+                    conditions.append(f'{quote}{key_field}{quote} = :{param_name}')
+                    delete_params[param_name] = key_value
+            delete_sql = f'DELETE FROM {quote}{table_name}{quote} WHERE ' + ' AND '.join(conditions)
+            await db.execute(text(delete_sql), delete_params)
+
+    @classmethod
+    async def _delete_null_key_rows_from_staging(
+        cls, db: AsyncSession, table_name: str, staging_table: str, unique_key_fields: list[str]
+    ) -> None:
+        """
+        删除与临时表中唯一键包含空值的数据匹配的记录（这类数据很少，取出后按 IS NULL 条件逐条删除）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param staging_table: 临时表名
+        :param unique_key_fields: 唯一键字段列表
+        :return: None
+        """
+        quote = '"' if DataBaseConfig.db_type == 'postgresql' else '`'
+        key_cols = ', '.join([f'{quote}{col}{quote}' for col in unique_key_fields])
+        null_condition = ' OR '.join([f'{quote}{col}{quote} IS NULL' for col in unique_key_fields])
+        null_key_rows = (
+            await db.execute(
+                text(f'SELECT DISTINCT {key_cols} FROM {quote}{staging_table}{quote} WHERE {null_condition}')
+            )
+        ).all()
+        if null_key_rows:
+            await cls._delete_by_unique_keys(
+                db, table_name, pd.DataFrame([tuple(row) for row in null_key_rows], columns=unique_key_fields)
+            )
+
+    @classmethod
+    async def _bulk_load_dataframe(
+        cls,
+        db: AsyncSession,
+        table_name: str,
+        load_df: pd.DataFrame,
+        all_columns: list[str],
+        update_mode: str,
+        unique_key_fields: list[str] | None,
+    ) -> int:
+        """
+        快速批量写入：PostgreSQL 通过临时表 COPY 导入后合并，MySQL 使用多行 VALUES 批量插入（DELETE_INSERT 经临时表合并）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param load_df: 待写入的数据（系统列 + DataFrame 列）
+        :param all_columns: 列名列表
+        :param update_mode: 更新方式（'0': INSERT, '1': INSERT_IGNORE, '2': UPSERT, '3': DELETE_INSERT）
+        :param unique_key_fields: 唯一键字段列表
+        :return: 写入的记录数
+        """
+        import time
+        import uuid
+
+        from sqlalchemy import text
+        from config.env import DataBaseConfig
+        from utils.log_util import logger
+
+        start_time = time.perf_counter()
+        total_rows = len(load_df)
+        if DataBaseConfig.db_type == 'postgresql':
+            staging_table = await cls._copy_to_staging_table(db, table_name, load_df, all_columns)
+            col_names = ', '.join([f'"{col}"' for col in all_columns])
+            insert_sql = f'INSERT INTO "{table_name}" ({col_names}) SELECT {col_names} FROM "{staging_table}"'
+            if update_mode == '1' and unique_key_fields:
+                if await cls._check_unique_constraint_exists(db, table_name, unique_key_fields):
+                    conflict_cols = ', '.join([f'"{col}"' for col in unique_key_fields])
+                    insert_sql += f' ON CONFLICT ({conflict_cols}) DO NOTHING'
+                else:
+                    logger.warning(
+                        f'表 {table_name} 在字段 {unique_key_fields} 上没有唯一约束，'
+                        f'无法使用 ON CONFLICT。将使用普通 INSERT 模式（可能因重复数据报错）'
+                    )
+            elif update_mode in ['2', '3']:
+                key_cols = ', '.join([f'"{col}"' for col in unique_key_fields])
+                # 使用 = 关联以便走唯一键索引；唯一键包含空值的数据单独按 IS NULL 条件删除
+                join_conditions = ' AND '.join([f't."{col}" = s."{col}"' for col in unique_key_fields])
+                not_null_condition = ' AND '.join([f'"{col}" IS NOT NULL' for col in unique_key_fields])
+                # 同一批数据中唯一键重复时保留最后一条，避免同一语句中重复更新同一行
+                deduplicated_source = (
+                    f'SELECT DISTINCT ON ({key_cols}) {col_names} FROM "{staging_table}" ORDER BY {key_cols}, ctid DESC'
                 )
-                return result.scalar() > 0
-        except Exception as e:
-            logger.warning(f'检查表 {table_name} 的唯一约束时出错: {e}，假设不存在')
-            return False
+                connection = await db.connection()
+                server_version = connection.dialect.server_version_info or (0,)
+                if update_mode == '2' and await cls._check_unique_constraint_exists(db, table_name, unique_key_fields):
+                    update_cols = [col for col in all_columns if col not in unique_key_fields]
+                    update_set = ', '.join([f'"{col}" = EXCLUDED."{col}"' for col in update_cols])
+                    insert_sql = (
+                        f'INSERT INTO "{table_name}" ({col_names}) {deduplicated_source} '
+                        f'ON CONFLICT ({key_cols}) DO UPDATE SET {update_set}'
+                    )
+                elif update_mode == '2' and server_version >= (15,):
+                    # 没有唯一约束时无法使用 ON CONFLICT，PostgreSQL 15+ 使用 MERGE 合并
+                    update_cols = [col for col in all_columns if col not in unique_key_fields]
+                    update_set = ', '.join([f'"{col}" = s."{col}"' for col in update_cols])
+                    source_cols = ', '.join([f's."{col}"' for col in all_columns])
+                    # 唯一键包含空值的数据在 MERGE 中不会匹配，先删除对应的旧记录，合并时作为新数据插入
+                    await cls._delete_null_key_rows_from_staging(db, table_name, staging_table, unique_key_fields)
+                    insert_sql = (
+                        f'MERGE INTO "{table_name}" t USING ({deduplicated_source}) s ON {join_conditions} '
+                        f'WHEN MATCHED THEN UPDATE SET {update_set} '
+                        f'WHEN NOT MATCHED THEN INSERT ({col_names}) VALUES ({source_cols})'
+                    )
+                else:
+                    # DELETE_INSERT（以及不支持 MERGE 的 UPSERT）：按唯一键一次性删除后整体插入
+                    await db.execute(
+                        text(
+                            f'DELETE FROM "{table_name}" t USING '
+                            f'(SELECT DISTINCT {key_cols} FROM "{staging_table}" WHERE {not_null_condition}) s '
+                            f'WHERE {join_conditions}'
+                        )
+                    )
+                    await cls._delete_null_key_rows_from_staging(db, table_name, staging_table, unique_key_fields)
+                    if update_mode == '2':
+                        insert_sql = f'INSERT INTO "{table_name}" ({col_names}) {deduplicated_source}'
+            result = await db.execute(text(insert_sql))
+            await db.execute(text(f'DROP TABLE IF EXISTS "{staging_table}"'))
+            written_rows = result.rowcount if update_mode == '1' and result.rowcount is not None else total_rows
+        else:
+            col_names = ', '.join([f'`{col}`' for col in all_columns])
+            insert_keyword = 'INSERT IGNORE INTO' if update_mode == '1' else 'INSERT INTO'
+            insert_suffix = ''
+            if update_mode == '2':
+                update_cols = [col for col in all_columns if col not in unique_key_fields]
+                insert_suffix = ' ON DUPLICATE KEY UPDATE ' + ', '.join(
+                    [f'`{col}` = VALUES(`{col}`)' for col in update_cols]
+                )
+            rows = list(load_df.astype(object).where(load_df.notna(), None).itertuples(index=False, name=None))
+            if update_mode == '3':
+                # DELETE_INSERT：数据先写入临时表，再按唯一键一次性关联删除并整体插入
+                staging_table = f'_stg_{table_name[:40]}_{uuid.uuid4().hex[:8]}'
+                await db.execute(
+                    text(
+                        f'CREATE TEMPORARY TABLE `{staging_table}` AS '
+                        f'SELECT {col_names} FROM `{table_name}` WHERE 1 = 0'
+                    )
+                )
+                try:
+                    await cls._insert_multi_row_values(
+                        db, f'INSERT INTO `{staging_table}` ({col_names})', '', rows, len(all_columns)
+                    )
+                    key_cols = ', '.join([f'`{col}`' for col in unique_key_fields])
+                    # 使用 = 关联以便走唯一键索引；唯一键包含空值的数据单独按 IS NULL 条件删除
+                    join_conditions = ' AND '.join([f't.`{col}` = s.`{col}`' for col in unique_key_fields])
+                    not_null_condition = ' AND '.join([f'`{col}` IS NOT NULL' for col in unique_key_fields])
+                    await db.execute(
+                        text(
+                            f'DELETE t FROM `{table_name}` t JOIN '
+                            f'(SELECT DISTINCT {key_cols} FROM `{staging_table}` WHERE {not_null_condition}) s '
+                            f'ON {join_conditions}'
+                        )
+                    )
+                    await cls._delete_null_key_rows_from_staging(db, table_name, staging_table, unique_key_fields)
+                    await db.execute(
+                        text(f'INSERT INTO `{table_name}` ({col_names}) SELECT {col_names} FROM `{staging_table}`')
+                    )
+                finally:
+                    # MySQL 临时表不受事务回滚影响，需要显式删除
+                    await db.execute(text(f'DROP TEMPORARY TABLE IF EXISTS `{staging_table}`'))
+                written_rows = total_rows
+            else:
+                affected_rows = await cls._insert_multi_row_values(
+                    db, f'{insert_keyword} `{table_name}` ({col_names})', insert_suffix, rows, len(all_columns)
+                )
+                written_rows = affected_rows if update_mode == '1' else total_rows
+        await db.flush()
+
+        elapsed = max(time.perf_counter() - start_time, 1e-6)
+        logger.info(
+            f'表 {table_name} 快速批量写入完成（更新方式: {update_mode}）：处理 {total_rows} 条，写入 {written_rows} 条，'
+            f'耗时 {elapsed:.2f} 秒，{total_rows / elapsed:.0f} 条/秒'
+        )
+        if update_mode == '1' and unique_key_fields and total_rows > written_rows:
+            logger.warning(
+                f'表 {table_name} INSERT_IGNORE 模式：尝试插入 {total_rows} 条，实际插入 {written_rows} 条，'
+                f'跳过 {total_rows - written_rows} 条重复数据（唯一键: {unique_key_fields}）'
+            )
+        return written_rows
 
     @classmethod
     async def add_dataframe_to_table_dao(
@@ -922,7 +1433,7 @@ class TushareDataDao:
         :return: 插入的记录数
         """
         from sqlalchemy import text
-        from config.env import DataBaseConfig
+        from config.env import DataBaseConfig, TushareConfig
         from utils.log_util import logger
         import json
         import re
@@ -973,6 +1484,29 @@ class TushareDataDao:
             logger.warning(f'更新模式 {update_mode} 需要唯一键字段，但未找到。将使用普通 INSERT 模式')
             update_mode = '0'
 
+        # 分区表：写入前为新的交易月份创建分区
+        if PARTITION_COLUMN in df.columns and TusharePartitionDao.is_partitioned_table(table_name):
+            await TusharePartitionDao.ensure_partitions(db, table_name, df[PARTITION_COLUMN].unique())
+
+        # 快速路径：PostgreSQL 通过临时表 COPY 导入，MySQL 使用多行 VALUES 批量插入
+        # 失败时回滚保存点并回退为原有的参数化批量写入
+        if TushareConfig.tushare_bulk_load_enabled:
+            system_values = {
+                'task_id': task_id,
+                'config_id': config_id,
+                'api_code': api_code,
+                'download_date': download_date,
+                'create_time': datetime.now(),
+            }
+            try:
+                load_df = cls._prepare_load_frame(df, df_columns, system_values)
+                async with db.begin_nested():
+                    return await cls._bulk_load_dataframe(
+                        db, table_name, load_df, all_columns, update_mode, unique_key_fields
+                    )
+            except Exception as bulk_error:
+                logger.warning(f'表 {table_name} 快速批量写入失败，回退为参数化批量写入: {bulk_error}')
+
         # 准备批量插入数据
         values_list = []
         create_time = datetime.now()
@@ -1155,98 +1689,26 @@ class TushareDataDao:
             if not unique_key_fields:
                 raise ValueError('DELETE_INSERT 模式需要唯一键字段')
             
-            # 从 DataFrame 中提取唯一键的值
-            unique_key_values = []
-            for idx, row in df.iterrows():
-                key_dict = {}
-                for key_field in unique_key_fields:
-                    # 查找对应的 DataFrame 列
-                    found = False
-                    for orig_col, safe_col in col_mapping.items():
-                        if safe_col == key_field:
-                            value = row[orig_col]
-                            if pd.isna(value):
-                                key_dict[key_field] = None
-                            else:
-                                key_dict[key_field] = value
-                            found = True
-                            break
-                    if not found:
-                        # 如果找不到，可能是系统列
-                        if key_field in system_columns:
-                            if key_field == 'task_id':
-                                key_dict[key_field] = task_id
-                            elif key_field == 'config_id':
-                                key_dict[key_field] = config_id
-                            elif key_field == 'api_code':
-                                key_dict[key_field] = api_code
-                            elif key_field == 'download_date':
-                                key_dict[key_field] = download_date
-                if key_dict:
-                    unique_key_values.append(key_dict)
-            
-            # 构建 DELETE 语句
-            if unique_key_values:
-                if DataBaseConfig.db_type == 'postgresql':
-                    # PostgreSQL: 使用 IN 子句或 OR 条件
-                    delete_conditions = []
-                    for key_dict in unique_key_values:
-                        conditions = []
-                        for key_field, key_value in key_dict.items():
-                            if key_value is None:
-                                conditions.append(f'"{key_field}" IS NULL')
-                            else:
-                                conditions.append(f'"{key_field}" = :{key_field}_{len(delete_conditions)}')
-                        delete_conditions.append('(' + ' AND '.join(conditions) + ')')
-                    
-                    # 简化：使用 IN 子句（如果唯一键是单个字段）
-                    if len(unique_key_fields) == 1:
-                        key_field = unique_key_fields[0]
-                        key_values = [kv[key_field] for kv in unique_key_values if key_field in kv]
-                        if key_values:
-                            placeholders = ', '.join([f':val_{i}' for i in range(len(key_values))])
-                            delete_sql = f'DELETE FROM "{table_name}" WHERE "{key_field}" IN ({placeholders})'
-                            delete_params = {f'val_{i}': val for i, val in enumerate(key_values)}
-                            await db.execute(text(delete_sql), delete_params)
-                    else:
-                        # 多个字段的唯一键，需要逐个删除
-                        for key_dict in unique_key_values:
-                            conditions = []
-                            delete_params = {}
-                            for idx, (key_field, key_value) in enumerate(key_dict.items()):
-                                if key_value is None:
-                                    conditions.append(f'"{key_field}" IS NULL')
-                                else:
-                                    param_name = f'key_{idx}'
-                                    conditions.append(f'"{key_field}" = :{param_name}')
-                                    delete_params[param_name] = key_value
-                            delete_sql = f'DELETE FROM "{table_name}" WHERE ' + ' AND '.join(conditions)
-                            await db.execute(text(delete_sql), delete_params)
-                else:
-                    # MySQL: 使用 IN 子句
-                    if len(unique_key_fields) == 1:
-                        key_field = unique_key_fields[0]
-                        key_values = [kv[key_field] for kv in unique_key_values if key_field in kv]
-                        if key_values:
-                            placeholders = ', '.join([f':val_{i}' for i in range(len(key_values))])
-                            delete_sql = f'DELETE FROM `{table_name}` WHERE `{key_field}` IN ({placeholders})'
-                            delete_params = {f'val_{i}': val for i, val in enumerate(key_values)}
-                            await db.execute(text(delete_sql), delete_params)
-                    else:
-                        # 多个字段的唯一键，需要逐个删除
-                        for key_dict in unique_key_values:
-                            conditions = []
-                            delete_params = {}
-                            for idx, (key_field, key_value) in enumerate(key_dict.items()):
-                                if key_value is None:
-                                    conditions.append(f'`{key_field}` IS NULL')
-                                else:
-                                    param_name = f'key_{idx}'
-                                    conditions.append(f'`{key_field}` = :{param_name}')
-                                    delete_params[param_name] = key_value
-                            delete_sql = f'DELETE FROM `{table_name}` WHERE ' + ' AND '.join(conditions)
-                            await db.execute(text(delete_sql), delete_params)
-                
+            # 从 DataFrame 中向量化提取唯一键的值（系统列使用本次写入的固定值）
+            safe_df = df.set_axis(df_columns, axis=1)
+            system_key_values = {
+                'task_id': task_id,
+                'config_id': config_id,
+                'api_code': api_code,
+                'download_date': download_date,
+            }
+            key_df = pd.DataFrame(
+                {
+                    key_field: safe_df[key_field] if key_field in safe_df.columns else system_key_values[key_field]
+                    for key_field in unique_key_fields
+                    if key_field in safe_df.columns or key_field in system_key_values
+                },
+                index=safe_df.index,
+            ).drop_duplicates()
+
+            # 按唯一键批量删除已存在的数据
+            if not key_df.empty:
+                await cls._delete_by_unique_keys(db, table_name, key_df)
                 await db.flush()
             
             # 执行普通 INSERT
@@ -0,0 +1,344 @@
+import re
+import threading
+from collections.abc import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.env import DataBaseConfig, TushareConfig
+from module_tushare.dao.tushare_schema_registry import COMPACT_DATE_PATTERN, TushareSchemaRegistry
+from utils.log_util import logger
+
+# 分区列（YYYYMMDD 字符串，按月划分范围分区）
+PARTITION_COLUMN = 'trade_date'
+# MySQL 兜底分区名（VALUES LESS THAN (MAXVALUE)）
+MYSQL_MAX_PARTITION = 'pmax'
+# PostgreSQL 默认分区名后缀（存放交易日期为空或不是 YYYYMMDD 的数据）
+PG_DEFAULT_PARTITION_SUFFIX = '_pdefault'
+
+
+def _next_month_start(month: str) -> str:
+    """
+    计算下个月第一天（YYYYMMDD）
+
+    :param month: 月份（YYYYMM）
+    :return: 下个月第一天
+    """
+    year, month_num = int(month[:4]), int(month[4:6])
+    if month_num == 12:
+        return f'{year + 1}0101'
+    return f'{year}{month_num + 1:02d}01'
+
+
+def _previous_month(date_str: str) -> str:
+    """
+    计算某个月初日期的上一个月（YYYYMM）
+
+    :param date_str: 月初日期（YYYYMMDD）
+    :return: 上一个月
+    """
+    year, month_num = int(date_str[:4]), int(date_str[4:6])
+    if month_num == 1:
+        return f'{year - 1}12'
+    return f'{year}{month_num - 1:02d}'
+
+
+class TusharePartitionDao:
+    """
+    动态数据表按交易日期的月范围分区管理
+
+    - PostgreSQL 使用声明式分区（PARTITION BY RANGE），每个月一个子表
+    - MySQL 使用 RANGE COLUMNS 分区，通过拆分包含该月的分区（REORGANIZE PARTITION）新增月分区
+    - 交易日期为空或不是 YYYYMMDD 的数据：PostgreSQL 写入默认分区（DEFAULT，按需创建），
+      MySQL 按 RANGE COLUMNS 规则落入最早的分区（空值和空字符串小于任何日期）
+    分区边界按表缓存在进程内，写入前只在出现新的月份时才执行 DDL；
+    执行分区 DDL 后通过 TushareSchemaRegistry.mark_pending_ddl 标记，事务提交前读取的分区不写入缓存
+    注意：MySQL 的 DDL 会隐式提交当前事务
+    """
+
+    _lock = threading.Lock()
+    # 表名 -> 分区列表 [(分区名, 下界, 上界)]，边界为 None 表示无界；值为 None 表示不是分区表
+    _partitions: dict[str, list[tuple[str, str | None, str | None]] | None] = {}
+    # 已有默认分区的表（PostgreSQL）
+    _default_partition_tables: set[str] = set()
+
+    @classmethod
+    def is_partitioned_table(cls, table_name: str) -> bool:
+        """
+        表是否配置为按交易日期分区
+
+        :param table_name: 表名
+        :return: 是否分区
+        """
+        return table_name in [
+            item.strip() for item in (TushareConfig.tushare_partitioned_tables or '').split(',') if item.strip()
+        ]
+
+    @classmethod
+    def get_partition_clause(cls) -> str:
+        """
+        获取建表语句的分区子句
+
+        :return: 分区子句
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            return f'PARTITION BY RANGE ({PARTITION_COLUMN})'
+        return (
+            f'PARTITION BY RANGE COLUMNS({PARTITION_COLUMN}) '
+            f'(PARTITION {MYSQL_MAX_PARTITION} VALUES LESS THAN (MAXVALUE))'
+        )
+
+    @classmethod
+    def invalidate(cls, table_name: str | None = None) -> None:
+        """
+        使分区缓存失效
+
+        :param table_name: 表名，为空则清空所有缓存
+        :return: None
+        """
+        with cls._lock:
+            if table_name is None:
+                cls._partitions.clear()
+                cls._default_partition_tables.clear()
+            else:
+                cls._partitions.pop(table_name, None)
+                cls._default_partition_tables.discard(table_name)
+
+    @classmethod
+    async def ensure_partitions(cls, db: AsyncSession, table_name: str, trade_dates: Iterable) -> list[str]:
+        """
+        为待写入数据的交易日期创建缺少的月分区（PostgreSQL 有空值或不是 YYYYMMDD 的交易日期时同时创建默认分区）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param trade_dates: 待写入数据的交易日期（包括空值）
+        :return: 新建的分区名列表
+        """
+        months: set[str] = set()
+        has_invalid_date = False
+        for value in trade_dates:
+            if value is not None and COMPACT_DATE_PATTERN.match(str(value)):
+                months.add(str(value)[:6])
+            else:
+                has_invalid_date = True
+        if not months and not has_invalid_date:
+            return []
+        partitions = await cls._get_partitions(db, table_name)
+        if partitions is None:
+            return []
+
+        missing_months = [month for month in sorted(months) if not cls._is_month_covered(partitions, month)]
+        need_default = (
+            has_invalid_date
+            and DataBaseConfig.db_type == 'postgresql'
+            and table_name not in cls._default_partition_tables
+        )
+        if not missing_months and not need_default:
+            return []
+
+        if DataBaseConfig.db_type == 'postgresql':
+            created = []
+            if need_default:
+                partition_name = f'{table_name[:50]}{PG_DEFAULT_PARTITION_SUFFIX}'
+                await db.execute(
+                    text(f'CREATE TABLE IF NOT EXISTS "{partition_name}" PARTITION OF "{table_name}" DEFAULT')
+                )
+                logger.warning(f'表 {table_name} 的待写入数据包含空值或无效的交易日期，写入默认分区 {partition_name}')
+                created.append(partition_name)
+            for month in missing_months:
+                partition_name = f'{table_name[:50]}_p{month}'
+                await db.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{partition_name}" PARTITION OF "{table_name}" '
+                        f"FOR VALUES FROM ('{month}01') TO ('{_next_month_start(month)}')"
+                    )
+                )
+                created.append(partition_name)
+        else:
+            created = await cls._split_mysql_partitions(db, table_name, partitions, missing_months)
+
+        TushareSchemaRegistry.mark_pending_ddl(db, table_name)
+        logger.info(f'已为表 {table_name} 创建分区: {created}')
+        return created
+
+    @classmethod
+    async def drop_partitions_before(cls, db: AsyncSession, table_name: str, before_date: str) -> list[str]:
+        """
+        删除上界不晚于指定日期的分区（分区内的数据全部早于该日期）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param before_date: 日期（YYYYMMDD）
+        :return: 删除的分区名列表
+        """
+        if not COMPACT_DATE_PATTERN.match(before_date):
+            raise ValueError(f'无效的日期: {before_date}，格式应为YYYYMMDD')
+        partitions = await cls._get_partitions(db, table_name)
+        if partitions is None:
+            raise ValueError(f'数据表 {table_name} 不是分区表')
+
+        dropped = [name for name, _, upper in partitions if upper is not None and upper <= before_date]
+        if not dropped:
+            return []
+        if DataBaseConfig.db_type == 'postgresql':
+            for partition_name in dropped:
+                await db.execute(text(f'DROP TABLE "{partition_name}"'))
+        else:
+            await db.execute(text(f'ALTER TABLE `{table_name}` DROP PARTITION {", ".join(dropped)}'))
+
+        TushareSchemaRegistry.mark_pending_ddl(db, table_name)
+        logger.info(f'已删除表 {table_name} 早于 {before_date} 的分区: {dropped}')
+        return dropped
+
+    @classmethod
+    def _is_month_covered(cls, partitions: list[tuple[str, str | None, str | None]], month: str) -> bool:
+        """
+        某个月是否已有独立分区
+
+        PostgreSQL 判断是否有分区包含该月；MySQL 的兜底分区包含所有值，需要包含该月的分区恰好在该月末结束
+
+        :param partitions: 分区列表
+        :param month: 月份（YYYYMM）
+        :return: 是否已有分区
+        """
+        month_start, month_end = f'{month}01', _next_month_start(month)
+        for _, lower, upper in partitions:
+            if (lower is None or lower <= month_start) and (upper is None or upper > month_start):
+                if DataBaseConfig.db_type == 'postgresql':
+                    return True
+                return upper == month_end
+        return False
+
+    @classmethod
+    async def _split_mysql_partitions(
+        cls, db: AsyncSession, table_name: str, partitions: list[tuple[str, str | None, str | None]], months: list[str]
+    ) -> list[str]:
+        """
+        拆分 MySQL 中包含缺少月份的分区（同一个分区的所有拆分点合并为一条 REORGANIZE PARTITION）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :param partitions: 分区列表
+        :param months: 缺少独立分区的月份
+        :return: 新建的分区名列表
+        """
+        created = []
+        for partition_name, lower, upper in partitions:
+            boundaries = set()
+            for month in months:
+                month_start, month_end = f'{month}01', _next_month_start(month)
+                if (lower is None or lower <= month_start) and (upper is None or upper > month_start):
+                    if lower is not None and lower < month_start:
+                        boundaries.add(month_start)
+                    if upper is None or upper > month_end:
+                        boundaries.add(month_end)
+            # 去掉与原分区边界重合的拆分点
+            boundaries = sorted(boundary for boundary in boundaries if boundary != upper and boundary != lower)
+            if not boundaries:
+                continue
+            # 分区按上界命名：p{YYYYMM} 表示数据截止到该月
+            new_partitions = [
+                f"PARTITION p{_previous_month(boundary)} VALUES LESS THAN ('{boundary}')" for boundary in boundaries
+            ]
+            upper_value = 'MAXVALUE' if upper is None else f"'{upper}'"
+            new_partitions.append(f'PARTITION {partition_name} VALUES LESS THAN ({upper_value})')
+            await db.execute(
+                text(
+                    f'ALTER TABLE `{table_name}` REORGANIZE PARTITION {partition_name} INTO ({", ".join(new_partitions)})'
+                )
+            )
+            created.extend(f'p{_previous_month(boundary)}' for boundary in boundaries)
+        return created
+
+    @classmethod
+    async def _get_partitions(
+        cls, db: AsyncSession, table_name: str
+    ) -> list[tuple[str, str | None, str | None]] | None:
+        """
+        获取表的分区列表（优先使用缓存）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 分区列表，不是分区表时返回 None
+        """
+        pending_ddl = TushareSchemaRegistry.is_pending_ddl(db, table_name)
+        with cls._lock:
+            if not pending_ddl and table_name in cls._partitions:
+                return cls._partitions[table_name]
+
+        partitions, has_default = await cls._load_partitions(db, table_name)
+        if pending_ddl:
+            # 未提交的分区 DDL 可能随事务回滚，读取的分区只在当前事务内有效，不写入缓存
+            return partitions
+        with cls._lock:
+            cls._partitions[table_name] = partitions
+            if has_default:
+                cls._default_partition_tables.add(table_name)
+        return partitions
+
+    @classmethod
+    async def _load_partitions(
+        cls, db: AsyncSession, table_name: str
+    ) -> tuple[list[tuple[str, str | None, str | None]] | None, bool]:
+        """
+        从系统目录读取表的分区列表
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: (分区列表（不含默认分区），是否有默认分区)，不是分区表时分区列表为 None
+        """
+        partitions: list[tuple[str, str | None, str | None]] | None
+        has_default = False
+        if DataBaseConfig.db_type == 'postgresql':
+            kind_sql = """
+                SELECT c.relkind::text
+                FROM pg_class c
+                JOIN pg_namespace n ON c.relnamespace = n.oid
+                WHERE n.nspname = 'public' AND c.relname = :table_name
+            """
+            relkind = (await db.execute(text(kind_sql), {'table_name': table_name})).scalar()
+            if relkind != 'p':
+                partitions = None
+            else:
+                bound_sql = """
+                    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    JOIN pg_class p ON p.oid = i.inhparent
+                    JOIN pg_namespace n ON n.oid = p.relnamespace
+                    WHERE n.nspname = 'public' AND p.relname = :table_name
+                """
+                result = await db.execute(text(bound_sql), {'table_name': table_name})
+                partitions = []
+                for partition_name, bound_expr in result.fetchall():
+                    if bound_expr == 'DEFAULT':
+                        has_default = True
+                        continue
+                    # 例如：FOR VALUES FROM ('20240101') TO ('20240201')
+                    match = re.search(r"FROM \('(\w+)'(?:::\w+)?\) TO \('(\w+)'(?:::\w+)?\)", bound_expr or '')
+                    if match:
+                        partitions.append((partition_name, match.group(1), match.group(2)))
+                partitions.sort(key=lambda item: item[1])
+        else:
+            partition_sql = """
+                SELECT partition_name, partition_description
+                FROM information_schema.partitions
+                WHERE table_schema = DATABASE() AND table_name = :table_name AND partition_name IS NOT NULL
+                ORDER BY partition_ordinal_position
+            """
+            rows = (await db.execute(text(partition_sql), {'table_name': table_name})).fetchall()
+            if not rows:
+                partitions = None
+            else:
+                partitions = []
+                lower = None
+                for partition_name, description in rows:
+                    upper = None if description == 'MAXVALUE' else str(description).strip("'")
+                    partitions.append((partition_name, lower, upper))
+                    lower = upper
+
+        return partitions, has_default
+
+
+# 分区 DDL 未提交期间和事务结束时，分区缓存与表结构缓存一起失效
+TushareSchemaRegistry.add_invalidate_hook(TusharePartitionDao.invalidate)
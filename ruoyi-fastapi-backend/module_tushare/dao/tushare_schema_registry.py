@@ -0,0 +1,318 @@
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from config.env import DataBaseConfig, TushareConfig
+from utils.log_util import logger
+
+# 紧凑列类型：YYYYMMDD 日期列使用定长 CHAR(8)，代码列使用较短的 VARCHAR（均保持字符串语义，现有的字符串比较无需改动）
+COMPACT_DATE_TYPE = 'CHAR(8)'
+COMPACT_DATE_PATTERN = re.compile(r'^[0-9]{8}$')
+COMPACT_CODE_TYPE = 'VARCHAR(32)'
+COMPACT_CODE_MAX_LENGTH = 20
+# 行情类表按股票代码 + 交易日期范围查询使用的复合索引列
+CODE_DATE_INDEX_COLUMNS = ['ts_code', 'trade_date']
+# 会话中执行了尚未提交的 DDL 的表名集合（保存在 session.info 中）
+PENDING_DDL_INFO_KEY = 'tushare_pending_ddl_tables'
+
+
+def is_date_column(column_name: str) -> bool:
+    """
+    是否为日期列（trade_date、ann_date、end_date 等）
+
+    :param column_name: 列名
+    :return: 是否为日期列
+    """
+    return column_name == 'date' or column_name.endswith('_date')
+
+
+def is_code_column(column_name: str) -> bool:
+    """
+    是否为代码列（ts_code、index_code、con_code 等）
+
+    :param column_name: 列名
+    :return: 是否为代码列
+    """
+    return column_name == 'code' or (column_name.endswith('_code') and column_name != 'api_code')
+
+
+class TushareTableSchema:
+    """
+    动态数据表的结构信息
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        exists: bool,
+        columns: dict[str, str],
+        primary_key: list[str],
+        unique_constraints: list[list[str]],
+        unique_key_columns: list[str],
+        version: Any,
+    ) -> None:
+        self.table_name = table_name
+        self.exists = exists
+        # 列名 -> 数据类型（按列顺序）
+        self.columns = columns
+        self.primary_key = primary_key
+        # 非主键的唯一约束（MySQL 为非主键的唯一索引），每个约束为一组列名
+        self.unique_constraints = unique_constraints
+        # 主键和唯一约束涉及的所有列（与原 detect_unique_keys 的返回顺序一致）
+        self.unique_key_columns = unique_key_columns
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def has_unique_constraint(self, columns: list[str]) -> bool:
+        """
+        是否存在与指定列完全匹配的唯一约束
+
+        PostgreSQL 只匹配唯一约束（不区分列顺序），MySQL 匹配包括主键在内的唯一索引（区分列顺序）
+
+        :param columns: 列名列表
+        :return: 是否存在
+        """
+        if not columns:
+            return False
+        if DataBaseConfig.db_type == 'postgresql':
+            return any(sorted(constraint) == sorted(columns) for constraint in self.unique_constraints)
+        unique_indexes = ([self.primary_key] if self.primary_key else []) + self.unique_constraints
+        return any(index_columns == list(columns) for index_columns in unique_indexes)
+
+
+class TushareSchemaRegistry:
+    """
+    进程级动态数据表结构缓存
+
+    缓存表是否存在、列及类型、主键和唯一约束，避免遍历模式下每个组合都查询系统目录：
+    - 本模块执行 DDL 后调用 mark_pending_ddl：事务提交前在该会话中读取的表结构不写入缓存（DDL 可能随事务或保存点回滚），
+      事务或保存点结束后再次使缓存失效
+    - 缓存超过有效期后执行一次轻量的版本探测，表结构未变化时继续使用缓存
+    """
+
+    _lock = threading.Lock()
+    _schemas: dict[str, TushareTableSchema] = {}
+    # 表的 DDL 未提交或事务结束时需要一并失效的其他表级缓存（如分区缓存）
+    _invalidate_hooks: list[Callable[[str], None]] = []
+
+    @classmethod
+    async def get_table_schema(cls, db: AsyncSession, table_name: str) -> TushareTableSchema:
+        """
+        获取表结构（优先使用缓存）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 表结构
+        """
+        if cls.is_pending_ddl(db, table_name):
+            # 未提交的 DDL 之后读取的表结构只在当前事务内有效，不写入缓存
+            return await cls._load_table_schema(db, table_name)
+        with cls._lock:
+            schema = cls._schemas.get(table_name)
+        now = time.monotonic()
+        if schema is not None and now - schema.checked_at < TushareConfig.tushare_schema_cache_ttl:
+            return schema
+        if schema is not None:
+            version = await cls._probe_version(db, table_name)
+            if version == schema.version:
+                schema.checked_at = now
+                return schema
+            logger.info(f'检测到表 {table_name} 的结构已变化，重新加载表结构')
+        schema = await cls._load_table_schema(db, table_name)
+        with cls._lock:
+            cls._schemas[table_name] = schema
+        return schema
+
+    @classmethod
+    def invalidate(cls, table_name: str | None = None) -> None:
+        """
+        使表结构缓存失效
+
+        :param table_name: 表名，为空则清空所有缓存
+        :return: None
+        """
+        with cls._lock:
+            if table_name is None:
+                cls._schemas.clear()
+            else:
+                cls._schemas.pop(table_name, None)
+
+    @classmethod
+    def add_invalidate_hook(cls, hook: Callable[[str], None]) -> None:
+        """
+        注册表级缓存失效回调，在表的 DDL 未提交期间和事务结束时与表结构缓存一起失效
+
+        :param hook: 失效回调，接收表名
+        :return: None
+        """
+        if hook not in cls._invalidate_hooks:
+            cls._invalidate_hooks.append(hook)
+
+    @classmethod
+    def is_pending_ddl(cls, db: AsyncSession, table_name: str) -> bool:
+        """
+        会话中是否对表执行了尚未提交的 DDL（此时读取的表级信息不能写入缓存）
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 是否有未提交的 DDL
+        """
+        return table_name in db.info.get(PENDING_DDL_INFO_KEY, ())
+
+    @classmethod
+    def mark_pending_ddl(cls, db: AsyncSession, table_name: str) -> None:
+        """
+        记录会话中对表执行了尚未提交的 DDL，并使该表的缓存失效
+
+        :param db: 执行 DDL 的数据库会话
+        :param table_name: 表名
+        :return: None
+        """
+        cls._invalidate_with_hooks(table_name)
+        pending = db.info.get(PENDING_DDL_INFO_KEY)
+        if pending is None:
+            pending = db.info[PENDING_DDL_INFO_KEY] = set()
+            event.listen(db.sync_session, 'after_transaction_end', cls._on_transaction_end)
+        pending.add(table_name)
+
+    @classmethod
+    def _on_transaction_end(cls, session: Session, transaction: SessionTransaction) -> None:
+        """
+        事务或保存点结束（提交或回滚）后使执行过 DDL 的表的缓存失效，最外层事务结束后不再视为未提交
+
+        :param session: 同步会话
+        :param transaction: 结束的事务
+        :return: None
+        """
+        pending = session.info.get(PENDING_DDL_INFO_KEY)
+        if not pending:
+            return
+        for table_name in pending:
+            cls._invalidate_with_hooks(table_name)
+        if transaction.parent is None:
+            pending.clear()
+
+    @classmethod
+    def _invalidate_with_hooks(cls, table_name: str) -> None:
+        """
+        使表结构缓存和已注册的表级缓存失效
+
+        :param table_name: 表名
+        :return: None
+        """
+        cls.invalidate(table_name)
+        for hook in cls._invalidate_hooks:
+            hook(table_name)
+
+    @classmethod
+    async def _probe_version(cls, db: AsyncSession, table_name: str) -> Any:
+        """
+        查询表结构的版本标识（表不存在时返回 None）
+
+        PostgreSQL 使用 pg_class 行的 oid 和 xmin（ALTER TABLE 等 DDL 都会更新该行），
+        MySQL 使用列数量和唯一索引列数量
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 版本标识
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            probe_sql = """
+                SELECT c.oid::bigint, c.xmin::text,
+                    (SELECT COUNT(*) FROM pg_constraint con WHERE con.conrelid = c.oid)
+                FROM pg_class c
+                JOIN pg_namespace n ON c.relnamespace = n.oid
+                WHERE n.nspname = 'public'
+                    AND c.relname = :table_name
+                    AND c.relkind IN ('r', 'p')
+            """
+        else:
+            probe_sql = """
+                SELECT
+                    (SELECT COUNT(*) FROM information_schema.columns
+                     WHERE table_schema = DATABASE() AND table_name = :table_name),
+                    (SELECT COUNT(*) FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = :table_name AND non_unique = 0)
+            """
+        row = (await db.execute(text(probe_sql), {'table_name': table_name})).first()
+        if row is None or (DataBaseConfig.db_type != 'postgresql' and row[0] == 0):
+            return None
+        return tuple(row)
+
+    @classmethod
+    async def _load_table_schema(cls, db: AsyncSession, table_name: str) -> TushareTableSchema:
+        """
+        从系统目录加载表结构
+
+        :param db: 数据库会话
+        :param table_name: 表名
+        :return: 表结构
+        """
+        version = await cls._probe_version(db, table_name)
+        if version is None:
+            return TushareTableSchema(table_name, False, {}, [], [], [], None)
+
+        if DataBaseConfig.db_type == 'postgresql':
+            columns_sql = """
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = :table_name
+                ORDER BY ordinal_position
+            """
+            constraints_sql = """
+                SELECT c.contype::text,
+                    ARRAY(
+                        SELECT a.attname::text
+                        FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+                        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+                        ORDER BY k.ord
+                    )
+                FROM pg_constraint c
+                WHERE c.conrelid = :table_oid AND c.contype IN ('p', 'u')
+                ORDER BY c.conname
+            """
+            columns_result = await db.execute(text(columns_sql), {'table_name': table_name})
+            columns = {row[0]: row[1] for row in columns_result.fetchall()}
+            constraints_result = await db.execute(text(constraints_sql), {'table_oid': version[0]})
+            primary_key: list[str] = []
+            unique_constraints: list[list[str]] = []
+            for constraint_type, constraint_columns in constraints_result.fetchall():
+                if constraint_type == 'p':
+                    primary_key = list(constraint_columns)
+                else:
+                    unique_constraints.append(list(constraint_columns))
+            unique_key_columns = sorted({col for cols in [primary_key, *unique_constraints] for col in cols})
+        else:
+            columns_sql = """
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = :table_name
+                ORDER BY ordinal_position
+            """
+            indexes_sql = """
+                SELECT index_name, column_name, seq_in_index
+                FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = :table_name AND non_unique = 0
+                ORDER BY index_name, seq_in_index
+            """
+            columns_result = await db.execute(text(columns_sql), {'table_name': table_name})
+            columns = {row[0]: row[1] for row in columns_result.fetchall()}
+            indexes_result = await db.execute(text(indexes_sql), {'table_name': table_name})
+            index_columns: dict[str, list[str]] = {}
+            key_positions: list[tuple[int, str]] = []
+            for index_name, column_name, seq_in_index in indexes_result.fetchall():
+                index_columns.setdefault(index_name, []).append(column_name)
+                key_positions.append((seq_in_index, column_name))
+            primary_key = index_columns.pop('PRIMARY', [])
+            unique_constraints = list(index_columns.values())
+            unique_key_columns = list(dict.fromkeys(column_name for _, column_name in sorted(key_positions)))
+
+        return TushareTableSchema(
+            table_name, True, columns, primary_key, unique_constraints, unique_key_columns, version
+        )
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import CHAR, BigInteger, Column, DateTime, Float, Integer, String, Text
+from sqlalchemy import CHAR, BigInteger, Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 
@@ -23,6 +24,8 @@ class TushareApiConfig(Base):
     api_params = Column(Text, nullable=True, comment='接口参数（JSON格式）')
     data_fields = Column(Text, nullable=True, comment='数据字段（JSON格式，用于指定需要下载的字段）')
     primary_key_fields = Column(Text, nullable=True, comment='主键字段配置（JSON格式，为空则使用默认data_id主键）')
+    rate_limit = Column(Integer, nullable=True, comment='每分钟调用次数上限（为空则使用全局默认配额）')
+    client_mode = Column(CHAR(1), nullable=True, server_default='0', comment='调用方式（0 SDK 1 异步HTTP客户端）')
     status = Column(CHAR(1), nullable=True, server_default='0', comment='状态（0正常 1停用）')
     create_by = Column(String(64), nullable=True, server_default="''", comment='创建者')
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
@@ -49,7 +52,7 @@ class TushareDownloadTask(Base):
     end_date = Column(String(20), nullable=True, comment='结束日期（YYYYMMDD）')
     task_params = Column(Text, nullable=True, comment='任务参数（JSON格式，覆盖接口默认参数）')
     save_path = Column(String(500), nullable=True, comment='保存路径')
-    save_format = Column(String(20), nullable=True, server_default='csv', comment='保存格式（csv/excel/json）')
+    save_format = Column(String(20), nullable=True, server_default='csv', comment='保存格式（csv/excel/json/parquet）')
     save_to_db = Column(CHAR(1), nullable=True, server_default='0', comment='是否保存到数据库（0否 1是）')
     data_table_name = Column(String(100), nullable=True, comment='数据存储表名（为空则使用默认表tushare_data）')
     status = Column(CHAR(1), nullable=True, server_default='0', comment='状态（0正常 1暂停）')
@@ -106,10 +109,73 @@ class TushareDownloadRun(Base):
     success_records = Column(Integer, nullable=True, default=0, comment='成功记录数')
     fail_records = Column(Integer, nullable=True, default=0, comment='失败记录数')
     error_message = Column(Text, nullable=True, comment='错误信息')
+    cache_hits = Column(Integer, nullable=True, default=0, comment='接口响应缓存命中次数')
+    cache_misses = Column(Integer, nullable=True, default=0, comment='接口响应缓存未命中次数')
+    checkpoint = Column(
+        Text().with_variant(LONGTEXT, 'mysql'),
+        nullable=True,
+        comment='断点信息（JSON格式，记录已完成并提交的步骤及参数组合）',
+    )
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
     update_time = Column(DateTime, nullable=True, default=datetime.now(), comment='更新时间')
 
 
+class TushareDownloadRunCheckpoint(Base):
+    """
+    Tushare下载运行步骤断点表（每次运行的每个步骤一条，与步骤数据在同一事务中提交）
+    """
+
+    __tablename__ = 'tushare_download_run_checkpoint'
+    __table_args__ = (
+        Index('uk_tushare_run_checkpoint_step', 'run_id', 'step_key', unique=True),
+        {'comment': 'Tushare下载运行步骤断点表'},
+    )
+
+    checkpoint_id = Column(BigInteger, primary_key=True, nullable=False, autoincrement=True, comment='断点ID')
+    run_id = Column(BigInteger, nullable=False, comment='运行ID')
+    step_key = Column(String(64), nullable=False, comment='步骤键（步骤ID）')
+    completed = Column(CHAR(1), nullable=True, default='0', comment='步骤是否已完成（0否 1是）')
+    combo_keys = Column(
+        Text().with_variant(LONGTEXT, 'mysql'),
+        nullable=True,
+        comment='已提交的参数组合键（JSON数组，步骤未完成时记录）',
+    )
+    update_time = Column(DateTime, nullable=True, default=datetime.now(), comment='更新时间')
+
+
+class TushareDownloadRunMetric(Base):
+    """
+    Tushare下载运行指标表（每次运行的每个步骤一条，单接口任务的步骤ID为空）
+    """
+
+    __tablename__ = 'tushare_download_run_metric'
+    __table_args__ = (
+        Index('idx_tushare_run_metric_task_step', 'task_id', 'step_id'),
+        Index('idx_tushare_run_metric_run', 'run_id'),
+        {'comment': 'Tushare下载运行指标表'},
+    )
+
+    metric_id = Column(BigInteger, primary_key=True, nullable=False, autoincrement=True, comment='指标ID')
+    run_id = Column(BigInteger, nullable=False, comment='运行ID')
+    task_id = Column(BigInteger, nullable=False, comment='任务ID')
+    step_id = Column(BigInteger, nullable=True, comment='步骤ID（单接口任务为空）')
+    step_name = Column(String(100), nullable=True, comment='步骤名称快照')
+    step_order = Column(Integer, nullable=True, comment='步骤顺序')
+    api_code = Column(String(100), nullable=True, comment='接口代码')
+    status = Column(CHAR(1), nullable=True, default='0', comment='执行状态（0成功 1失败）')
+    combo_count = Column(Integer, nullable=True, default=0, comment='参数组合数')
+    success_combo_count = Column(Integer, nullable=True, default=0, comment='成功组合数')
+    fail_combo_count = Column(Integer, nullable=True, default=0, comment='失败组合数')
+    skip_combo_count = Column(Integer, nullable=True, default=0, comment='跳过组合数')
+    api_call_count = Column(Integer, nullable=True, default=0, comment='接口调用次数')
+    api_wait_ms = Column(BigInteger, nullable=True, default=0, comment='接口等待耗时（毫秒，包含限流等待）')
+    db_write_ms = Column(BigInteger, nullable=True, default=0, comment='数据库写入耗时（毫秒）')
+    row_count = Column(BigInteger, nullable=True, default=0, comment='获取记录数')
+    duration_ms = Column(BigInteger, nullable=True, default=0, comment='执行耗时（毫秒）')
+    rows_per_sec = Column(Float, nullable=True, default=0, comment='每秒获取记录数')
+    create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
+
+
 class TushareData(Base):
     """
     Tushare数据存储表（通用表）
@@ -180,6 +246,8 @@ class TushareWorkflowStep(Base):
     loop_mode = Column(CHAR(1), nullable=True, server_default='0', comment='遍历模式（0否 1是，开启后所有变量参数都会遍历）')
     update_mode = Column(CHAR(1), nullable=True, server_default='0', comment='数据更新方式（0仅插入 1忽略重复 2存在则更新 3先删除再插入）')
     unique_key_fields = Column(Text, nullable=True, comment='唯一键字段配置（JSON格式，为空则自动检测）')
+    concurrency = Column(Integer, nullable=True, server_default='1', comment='遍历并发数（遍历模式下同时调用接口的组合数，1为串行）')
+    stream_mode = Column(CHAR(1), nullable=True, server_default='0', comment='流式模式（0否 1是，遍历结果按批次提交并落盘，不在内存中保留完整结果）')
     status = Column(CHAR(1), nullable=True, server_default='0', comment='状态（0正常 1停用）')
     create_by = Column(String(64), nullable=True, server_default="''", comment='创建者')
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
@@ -202,8 +270,8 @@ class TushareProBar(Base):
     api_code = Column(String(100), nullable=False, comment='接口代码')
     download_date = Column(String(20), nullable=True, comment='下载日期（YYYYMMDD）')
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
-    ts_code = Column(String(500), nullable=True, comment='股票代码')
-    trade_date = Column(String(500), nullable=True, comment='交易日期')
+    ts_code = Column(String(32), nullable=True, comment='股票代码')
+    trade_date = Column(CHAR(8), nullable=True, comment='交易日期（YYYYMMDD）')
     open = Column(Float, nullable=True, comment='开盘价')
     high = Column(Float, nullable=True, comment='最高价')
     low = Column(Float, nullable=True, comment='最低价')
@@ -213,3 +281,5 @@ class TushareProBar(Base):
     pct_chg = Column(Float, nullable=True, comment='涨跌幅')
     vol = Column(Float, nullable=True, comment='成交量')
     amount = Column(Float, nullable=True, comment='成交额')
+
+    idx_tushare_pro_bar_tstd = Index('idx_tushare_pro_bar_tstd', ts_code, trade_date)
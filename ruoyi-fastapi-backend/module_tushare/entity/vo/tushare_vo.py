@@ -20,6 +20,8 @@ class TushareApiConfigModel(BaseModel):
     api_params: str | None = Field(default=None, description='接口参数（JSON格式）')
     data_fields: str | None = Field(default=None, description='数据字段（JSON格式）')
     primary_key_fields: str | None = Field(default=None, description='主键字段配置（JSON格式，为空则使用默认data_id主键）')
+    rate_limit: int | None = Field(default=None, description='每分钟调用次数上限（为空则使用全局默认配额）')
+    client_mode: Literal['0', '1'] | None = Field(default='0', description='调用方式（0 SDK 1 异步HTTP客户端）')
     status: Literal['0', '1'] | None = Field(default=None, description='状态（0正常 1停用）')
     create_by: str | None = Field(default=None, description='创建者')
     create_time: datetime | None = Field(default=None, description='创建时间')
@@ -93,7 +95,7 @@ class TushareDownloadTaskModel(BaseModel):
     end_date: str | None = Field(default=None, description='结束日期')
     task_params: str | None = Field(default=None, description='任务参数（JSON格式）')
     save_path: str | None = Field(default=None, description='保存路径')
-    save_format: str | None = Field(default=None, description='保存格式')
+    save_format: str | None = Field(default=None, description='保存格式（csv/excel/json/parquet）')
     save_to_db: Literal['0', '1'] | None = Field(default=None, description='是否保存到数据库（0否 1是）')
     data_table_name: str | None = Field(default=None, description='数据存储表名（为空则使用默认表tushare_data）')
     status: Literal['0', '1'] | None = Field(default=None, description='状态（0正常 1暂停）')
@@ -338,6 +340,8 @@ class TushareWorkflowStepModel(BaseModel):
     loop_mode: Literal['0', '1'] | None = Field(default='0', description='遍历模式（0否 1是，开启后所有变量参数都会遍历）')
     update_mode: Literal['0', '1', '2', '3'] | None = Field(default='0', description='数据更新方式（0仅插入 1忽略重复 2存在则更新 3先删除再插入）')
     unique_key_fields: str | None = Field(default=None, description='唯一键字段配置（JSON格式，为空则自动检测）')
+    concurrency: int | None = Field(default=1, description='遍历并发数（遍历模式下同时调用接口的组合数，1为串行）')
+    stream_mode: Literal['0', '1'] | None = Field(default='0', description='流式模式（0否 1是，遍历结果按批次提交并落盘，不在内存中保留完整结果）')
     status: Literal['0', '1'] | None = Field(default=None, description='状态（0正常 1停用）')
     create_by: str | None = Field(default=None, description='创建者')
     create_time: datetime | None = Field(default=None, description='创建时间')
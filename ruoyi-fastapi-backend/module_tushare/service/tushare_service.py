@@ -3,16 +3,20 @@ from typing import Any
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from common.constant import CommonConstant
+from common.constant import CommonConstant, JobConstant
 from common.vo import CrudResponseModel
 from exceptions.exception import ServiceException
+from module_admin.service.job_queue_service import JobQueueService
 from module_tushare.dao.tushare_dao import (
     TushareApiConfigDao,
+    TushareDataDao,
     TushareDownloadLogDao,
+    TushareDownloadRunMetricDao,
     TushareDownloadTaskDao,
     TushareWorkflowConfigDao,
     TushareWorkflowStepDao,
 )
+from module_tushare.dao.tushare_partition_dao import TusharePartitionDao
 from module_tushare.entity.do.tushare_do import TushareDownloadLog
 from module_tushare.entity.vo.tushare_vo import (
     BatchSaveWorkflowStepModel,
@@ -278,6 +282,53 @@ class TushareApiConfigService:
 
         return excel_stream
 
+    @classmethod
+    async def optimize_table_schema_services(cls, query_db: AsyncSession, table_name: str) -> CrudResponseModel:
+        """
+        优化数据表结构service（紧凑列类型 + 股票代码/交易日期复合索引）
+
+        :param query_db: orm对象
+        :param table_name: 数据表名
+        :return: 优化结果
+        """
+        try:
+            changes = await TushareDataDao.optimize_table_schema_dao(query_db, table_name)
+            await query_db.commit()
+        except ValueError as e:
+            await query_db.rollback()
+            raise ServiceException(message=str(e)) from e
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+        message = f'优化成功：{"；".join(changes)}' if changes else '表结构已是最优，无需变更'
+
+        return CrudResponseModel(is_success=True, message=message)
+
+    @classmethod
+    async def drop_table_partitions_services(
+        cls, query_db: AsyncSession, table_name: str, before_date: str
+    ) -> CrudResponseModel:
+        """
+        删除分区表中早于指定日期的分区service
+
+        :param query_db: orm对象
+        :param table_name: 数据表名
+        :param before_date: 日期（YYYYMMDD），删除数据全部早于该日期的分区
+        :return: 删除结果
+        """
+        try:
+            dropped = await TusharePartitionDao.drop_partitions_before(query_db, table_name, before_date)
+            await query_db.commit()
+        except ValueError as e:
+            await query_db.rollback()
+            raise ServiceException(message=str(e)) from e
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+        message = f'已删除 {len(dropped)} 个分区：{"，".join(dropped)}' if dropped else '没有需要删除的分区'
+
+        return CrudResponseModel(is_success=True, message=message)
+
 
 class TushareDownloadTaskService:
     """
@@ -668,17 +719,19 @@ class TushareDownloadTaskService:
         return result
 
     @classmethod
-    async def execute_task_services(cls, query_db: AsyncSession, task_id: int) -> CrudResponseModel:
+    async def execute_task_services(
+        cls, query_db: AsyncSession, task_id: int, resume: bool = False, priority: int = 0, create_by: str = ''
+    ) -> CrudResponseModel:
         """
-        执行下载任务service
+        执行下载任务service（提交到任务执行队列，同一任务在等待或运行中时不允许重复提交）
 
         :param query_db: orm对象
         :param task_id: 下载任务id
+        :param resume: 是否从上次失败或中断的运行断点继续执行
+        :param priority: 执行队列优先级（数值越大越先执行）
+        :param create_by: 提交人
         :return: 执行任务结果
         """
-        from fastapi import BackgroundTasks
-        from module_tushare.task.tushare_download_task import download_tushare_data_sync
-        
         # 检查任务是否存在
         task = await TushareDownloadTaskDao.get_task_detail_by_id(query_db, task_id)
         if not task:
@@ -687,24 +740,22 @@ class TushareDownloadTaskService:
         if task.status != '0':
             raise ServiceException(message='任务已暂停，无法执行')
         
+        task_name = task.task_name
         try:
-            # 异步执行任务（使用同步包装函数，在后台线程中执行）
-            import threading
-            import traceback
-            
-            def run_task():
-                try:
-                    download_tushare_data_sync(task_id)
-                except Exception as e:
-                    error_traceback = traceback.format_exc()
-                    logger.exception(f'执行任务 {task_id} 失败: {e}')
-                    logger.error(f'任务执行异常堆栈:\n{error_traceback}')
-            
-            # 在后台线程中执行任务
-            thread = threading.Thread(target=run_task, daemon=True)
-            thread.start()
+            await JobQueueService.enqueue_job_services(
+                query_db,
+                queue_name=JobConstant.QUEUE_TUSHARE_DOWNLOAD,
+                task_id=task_id,
+                invoke_target='module_tushare.task.tushare_download_task.download_tushare_data',
+                job_name=f'tushare_task_{task_name}',
+                job_kwargs={'resume': resume},
+                priority=priority,
+                create_by=create_by,
+            )
             
-            result = {'is_success': True, 'message': '任务已提交执行，请稍后查看执行日志'}
+            result = {'is_success': True, 'message': '任务已提交执行队列，请稍后查看执行日志'}
+        except ServiceException:
+            raise
         except Exception as e:
             import traceback
             error_traceback = traceback.format_exc()
@@ -768,42 +819,80 @@ class TushareDownloadTaskService:
             },
         }
         
+        # 运行指标按步骤汇总（单条分组查询），单接口任务的步骤ID为空
+        metric_rows = {
+            row.step_id: row for row in await TushareDownloadRunMetricDao.get_step_metric_statistics(query_db, task_id)
+        }
+        if task_type == 'single' and None in metric_rows:
+            statistics['run_metrics'] = cls._build_metric_statistics(metric_rows[None])
+
         # 如果是流程配置任务，获取步骤统计
         if task_type == 'workflow' and task.workflow_id:
             from module_tushare.dao.tushare_dao import TushareWorkflowStepDao
             steps = await TushareWorkflowStepDao.get_steps_by_workflow_id(query_db, task.workflow_id)
-            
+
             step_statistics = []
             for step in steps:
-                step_log_query = (
-                    select(
-                        func.count(TushareDownloadLog.log_id).label('count'),
-                        func.sum(cast(TushareDownloadLog.status == '0', Integer)).label('success'),
-                        func.sum(cast(TushareDownloadLog.status == '1', Integer)).label('fail'),
-                        func.sum(TushareDownloadLog.record_count).label('records'),
-                    )
-                    .where(
-                        TushareDownloadLog.task_id == task_id,
-                        TushareDownloadLog.task_name.like(f'%[{step.step_name}]%')
-                    )
-                )
-                step_log_result = await query_db.execute(step_log_query)
-                step_log = step_log_result.first()
-                
+                # 没有运行指标的步骤（记录运行指标之前的历史运行）各项统计为 0，不再按步骤名称模糊匹配下载日志
+                metric_statistics = cls._build_metric_statistics(metric_rows.get(step.step_id))
                 step_statistics.append({
                     'step_id': step.step_id,
                     'step_name': step.step_name,
                     'step_order': step.step_order,
-                    'log_count': step_log.count or 0,
-                    'success_count': step_log.success or 0,
-                    'fail_count': step_log.fail or 0,
-                    'total_records': step_log.records or 0,
+                    **metric_statistics,
+                    # 兼容原有字段：执行次数按步骤运行次数统计
+                    'log_count': metric_statistics['execute_count'],
                 })
-            
+
             statistics['step_statistics'] = step_statistics
-        
+
         return statistics
 
+    @classmethod
+    def _build_metric_statistics(cls, metric_row: Any) -> dict[str, Any]:
+        """
+        将运行指标的分组汇总行转换为统计信息
+
+        :param metric_row: 分组汇总行，为 None 表示没有运行指标
+        :return: 统计信息
+        """
+        if metric_row is None:
+            return {
+                'execute_count': 0,
+                'success_count': 0,
+                'fail_count': 0,
+                'total_records': 0,
+                'combo_count': 0,
+                'fail_combo_count': 0,
+                'api_call_count': 0,
+                'avg_api_wait_ms': 0,
+                'total_api_wait_ms': 0,
+                'total_db_write_ms': 0,
+                'avg_duration_ms': 0,
+                'rows_per_sec': 0,
+                'last_run_time': None,
+            }
+        execute_count = metric_row.execute_count or 0
+        total_records = int(metric_row.total_records or 0)
+        api_call_count = int(metric_row.api_call_count or 0)
+        api_wait_ms = int(metric_row.api_wait_ms or 0)
+        duration_ms = int(metric_row.duration_ms or 0)
+        return {
+            'execute_count': execute_count,
+            'success_count': int(metric_row.success_count or 0),
+            'fail_count': int(metric_row.fail_count or 0),
+            'total_records': total_records,
+            'combo_count': int(metric_row.combo_count or 0),
+            'fail_combo_count': int(metric_row.fail_combo_count or 0),
+            'api_call_count': api_call_count,
+            'avg_api_wait_ms': round(api_wait_ms / api_call_count, 2) if api_call_count else 0,
+            'total_api_wait_ms': api_wait_ms,
+            'total_db_write_ms': int(metric_row.db_write_ms or 0),
+            'avg_duration_ms': round(duration_ms / execute_count, 2) if execute_count else 0,
+            'rows_per_sec': round(total_records * 1000 / duration_ms, 2) if duration_ms else 0,
+            'last_run_time': metric_row.last_run_time.isoformat() if metric_row.last_run_time else None,
+        }
+
 
 class TushareDownloadLogService:
     """
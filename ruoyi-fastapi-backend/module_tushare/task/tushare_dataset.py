@@ -0,0 +1,181 @@
+import os
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from utils.log_util import logger
+
+# Parquet 数据集的分区列（Hive 风格目录：api_code=xxx/trade_date=YYYYMMDD）
+DATASET_API_CODE_COLUMN = 'api_code'
+DATASET_DATE_COLUMN = 'trade_date'
+# Parquet 压缩算法
+DATASET_COMPRESSION = 'zstd'
+# 读取时记录每行来源文件的临时列（pyarrow 扫描的特殊字段 __filename）
+DATASET_FILE_COLUMN = '__filename'
+# 分区列的结构（分区值均按字符串处理，避免 YYYYMMDD 被推断为整数）
+DATASET_PARTITION_SCHEMA = pa.schema([(DATASET_API_CODE_COLUMN, pa.string()), (DATASET_DATE_COLUMN, pa.string())])
+
+
+def _open_api_dataset(save_path: str, api_code: str) -> ds.Dataset | None:
+    """
+    打开某个接口的 Parquet 数据集，数据集结构为该接口所有文件结构的合并
+
+    追加写入的文件结构可能不同（接口新增列、整数列因空值写为浮点列），不能只用第一个文件的结构：
+    缺少的列读取为空值，类型不一致的列按 pyarrow 的宽松规则提升为兼容类型
+
+    :param save_path: 数据集根目录
+    :param api_code: 接口代码
+    :return: 数据集，接口目录不存在时为 None
+    """
+    api_path = os.path.join(save_path, f'{DATASET_API_CODE_COLUMN}={api_code}')
+    if not os.path.isdir(api_path):
+        return None
+    dataset = ds.dataset(
+        save_path, format='parquet', partitioning=ds.partitioning(DATASET_PARTITION_SCHEMA, flavor='hive')
+    )
+    fragments = dataset.get_fragments(filter=ds.field(DATASET_API_CODE_COLUMN) == api_code)
+    schema = pa.unify_schemas(
+        [*(fragment.physical_schema for fragment in fragments), DATASET_PARTITION_SCHEMA], promote_options='permissive'
+    )
+    return dataset.replace_schema(schema)
+
+
+def write_parquet_dataset(df: pd.DataFrame, save_path: str, api_code: str) -> str:
+    """
+    以追加方式写入 Hive 分区的 Parquet 数据集（zstd 压缩）
+
+    每次写入使用按写入时间递增的唯一文件名前缀，已有文件保持不变（重复写入的数据在读取时按 (trade_date, 代码) 保留最新文件中的行）；
+    没有 trade_date 列的数据只按 api_code 分区
+
+    :param df: 数据
+    :param save_path: 数据集根目录
+    :param api_code: 接口代码
+    :return: 接口对应的数据集目录
+    """
+    data = df.copy()
+    data[DATASET_API_CODE_COLUMN] = api_code
+    partition_columns = [DATASET_API_CODE_COLUMN]
+    if DATASET_DATE_COLUMN in data.columns:
+        data[DATASET_DATE_COLUMN] = data[DATASET_DATE_COLUMN].astype(str)
+        partition_columns.append(DATASET_DATE_COLUMN)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    partition_count = data[DATASET_DATE_COLUMN].nunique() if len(partition_columns) > 1 else 1
+
+    ds.write_dataset(
+        table,
+        base_dir=save_path,
+        format='parquet',
+        partitioning=partition_columns,
+        partitioning_flavor='hive',
+        basename_template=f'part-{time.time_ns():020d}-{uuid.uuid4().hex}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+        max_partitions=max(partition_count + 1, 1024),
+        file_options=ds.ParquetFileFormat().make_write_options(compression=DATASET_COMPRESSION),
+    )
+    return os.path.join(save_path, f'{DATASET_API_CODE_COLUMN}={api_code}')
+
+
+def read_parquet_dataset(
+    save_path: str,
+    api_code: str,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    columns: list[str] | None = None,
+    symbols: list[str] | None = None,
+    symbol_col: str = 'ts_code',
+) -> pd.DataFrame:
+    """
+    从 Parquet 数据集读取某个接口指定日期范围的数据（分区裁剪，只读取需要的日期目录）
+
+    数据集以追加方式写入，同一 (trade_date, 代码) 重复下载时会存在于多个文件中，读取时只保留最新写入文件中的行
+
+    :param save_path: 数据集根目录
+    :param api_code: 接口代码
+    :param start_date: 开始日期（YYYYMMDD，包含）
+    :param end_date: 结束日期（YYYYMMDD，包含）
+    :param columns: 需要读取的列，为空则读取全部列
+    :param symbols: 代码列表，为空则不过滤
+    :param symbol_col: 代码列名
+    :return: 数据（按 trade_date、代码排序）
+    """
+    dataset = _open_api_dataset(save_path, api_code)
+    if dataset is None:
+        logger.warning(f'Parquet 数据集中没有接口 {api_code} 的数据: {save_path}')
+        return pd.DataFrame()
+
+    condition = ds.field(DATASET_API_CODE_COLUMN) == api_code
+    if start_date:
+        condition = condition & (ds.field(DATASET_DATE_COLUMN) >= start_date)
+    if end_date:
+        condition = condition & (ds.field(DATASET_DATE_COLUMN) <= end_date)
+    if symbols:
+        condition = condition & ds.field(symbol_col).isin(symbols)
+
+    if columns:
+        read_columns = list(dict.fromkeys([DATASET_DATE_COLUMN, symbol_col, *columns]))
+    else:
+        read_columns = [name for name in dataset.schema.names if name != DATASET_API_CODE_COLUMN]
+    projection = {name: ds.field(name) for name in read_columns}
+    projection[DATASET_FILE_COLUMN] = ds.field('__filename')
+    df = dataset.to_table(columns=projection, filter=condition).to_pandas()
+
+    key_columns = [DATASET_DATE_COLUMN, symbol_col]
+    if set(key_columns).issubset(df.columns) and not df.empty:
+        # 按文件写入顺序（修改时间、文件名）排序后去重，保留最新文件中的行
+        file_paths = sorted(
+            df[DATASET_FILE_COLUMN].unique(), key=lambda path: (os.path.getmtime(path), os.path.basename(path))
+        )
+        file_rank = df[DATASET_FILE_COLUMN].map({path: rank for rank, path in enumerate(file_paths)})
+        df = df.iloc[file_rank.to_numpy().argsort(kind='stable')].drop_duplicates(key_columns, keep='last')
+    df = df.drop(columns=[DATASET_FILE_COLUMN])
+    sort_columns = [column for column in (DATASET_DATE_COLUMN, symbol_col) if column in df.columns]
+    if sort_columns and not df.empty:
+        df = df.sort_values(sort_columns).reset_index(drop=True)
+    return df
+
+
+def save_dataframe_to_file(
+    df: pd.DataFrame, save_path: str, save_format: str | None, file_name: str, api_code: str
+) -> str:
+    """
+    按保存格式保存数据（同步函数，在线程中调用，避免阻塞事件循环）
+
+    :param df: 数据
+    :param save_path: 保存路径
+    :param save_format: 保存格式（csv/excel/json/parquet，为空或未知格式时为 csv）
+    :param file_name: 文件名（不含扩展名，parquet 格式不使用）
+    :param api_code: 接口代码（parquet 格式的分区值）
+    :return: 文件路径（parquet 格式为接口对应的数据集目录）
+    """
+    os.makedirs(save_path, exist_ok=True)
+    save_format = save_format or 'csv'
+
+    if save_format == 'parquet':
+        return write_parquet_dataset(df, save_path, api_code)
+    if save_format == 'excel':
+        file_path = os.path.join(save_path, f'{file_name}.xlsx')
+        df.to_excel(file_path, index=False, engine='openpyxl')
+    elif save_format == 'json':
+        file_path = os.path.join(save_path, f'{file_name}.json')
+        df.to_json(file_path, orient='records', force_ascii=False, indent=2)
+    else:
+        file_path = os.path.join(save_path, f'{file_name}.csv')
+        df.to_csv(file_path, index=False, encoding='utf-8-sig')
+    return file_path
+
+
+def get_parquet_dataset_columns(save_path: str, api_code: str) -> list[str] | None:
+    """
+    获取 Parquet 数据集某个接口的列名（只读取文件元数据，包含所有文件中出现过的列）
+
+    :param save_path: 数据集根目录
+    :param api_code: 接口代码
+    :return: 列名列表，数据集不存在时为 None
+    """
+    dataset = _open_api_dataset(save_path, api_code)
+    if dataset is None:
+        return None
+    return [name for name in dataset.schema.names if name != DATASET_API_CODE_COLUMN]
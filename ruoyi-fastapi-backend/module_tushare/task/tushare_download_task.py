@@ -1,7 +1,15 @@
+import asyncio
+import functools
+import hashlib
 import json
+import math
 import os
 import re
+import time
 import traceback
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from itertools import product
 from typing import Any
@@ -9,21 +17,48 @@ from typing import Any
 import pandas as pd
 import tushare as ts
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from config.database import AsyncSessionLocal
 from config.env import DataBaseConfig, TushareConfig
+from config.get_worker import WorkerUtil
 from module_tushare.dao.tushare_dao import (
     TushareApiConfigDao,
     TushareDataDao,
     TushareDownloadLogDao,
+    TushareDownloadRunCheckpointDao,
     TushareDownloadRunDao,
+    TushareDownloadRunMetricDao,
     TushareDownloadTaskDao,
     TushareWorkflowConfigDao,
     TushareWorkflowStepDao,
 )
+from module_tushare.dao.tushare_partition_dao import PARTITION_COLUMN, TusharePartitionDao
+from module_tushare.dao.tushare_schema_registry import (
+    CODE_DATE_INDEX_COLUMNS,
+    COMPACT_CODE_MAX_LENGTH,
+    COMPACT_CODE_TYPE,
+    COMPACT_DATE_PATTERN,
+    COMPACT_DATE_TYPE,
+    TushareSchemaRegistry,
+    is_code_column,
+    is_date_column,
+)
 from module_tushare.entity.do.tushare_do import TushareData, TushareDownloadLog
 from module_tushare.entity.vo.tushare_vo import TushareDownloadTaskModel
+from module_tushare.task.tushare_dataset import save_dataframe_to_file
+from module_tushare.task.tushare_gap_planner import TushareGapPlanner
+from module_tushare.task.tushare_http_client import TushareHttpClient
+from module_tushare.task.tushare_rate_limiter import TushareRateLimiter
+from module_tushare.task.tushare_response_cache import TushareResponseCache
+from module_tushare.task.tushare_run_metrics import TushareStepMetrics
+from module_tushare.task.tushare_spill_store import SpilledStepResult, TushareStepSpillStore
+from module_tushare.task.tushare_step_result import (
+    ColumnarStepResult,
+    StreamingKeyDeduplicator,
+    deduplicate_values,
+)
+from module_tushare.task.tushare_trade_calendar import TradeCalendar
 from utils.log_util import logger
 
 
@@ -82,6 +117,45 @@ def pandas_dtype_to_db_type(dtype, db_type: str = 'postgresql') -> str:
         return 'TEXT' if db_type == 'postgresql' else 'TEXT'
 
 
+def infer_column_db_type(series: pd.Series, column_name: str, db_type: str = 'postgresql') -> str:
+    """
+    根据列名和实际数据推断紧凑的数据库类型（用于自动建表）
+
+    - 全部为 YYYYMMDD 的日期列使用 CHAR(8)
+    - 代码列按实际长度使用 VARCHAR(32)
+    - 超过 500 字符的字符串列使用 TEXT
+    - 开启 TUSHARE_COMPACT_FLOAT_ENABLED 后，有效数字不超过 6 位的浮点列使用单精度类型
+    其余情况与 pandas_dtype_to_db_type 一致
+
+    :param series: 列数据
+    :param column_name: 安全列名
+    :param db_type: 数据库类型 ('postgresql' 或 'mysql')
+    :return: 数据库类型字符串
+    """
+    db_type_str = pandas_dtype_to_db_type(series.dtype, db_type)
+    values = series.dropna()
+    if values.empty:
+        return db_type_str
+
+    if db_type_str == 'VARCHAR(500)':
+        str_values = values.astype(str)
+        if is_date_column(column_name) and str_values.str.match(COMPACT_DATE_PATTERN).all():
+            return COMPACT_DATE_TYPE
+        max_length = int(str_values.str.len().max())
+        if is_code_column(column_name) and max_length <= COMPACT_CODE_MAX_LENGTH:
+            return COMPACT_CODE_TYPE
+        if max_length > 500:
+            return 'TEXT'
+        return db_type_str
+
+    if TushareConfig.tushare_compact_float_enabled and db_type_str in ('DOUBLE PRECISION', 'DOUBLE'):
+        # 单精度约有 7 位有效数字，只保留 6 位以内的值转换后不会丢失精度
+        unique_values = pd.unique(values.to_numpy(dtype='float64'))
+        if all(float(f'{value:.6g}') == value for value in unique_values):
+            return 'REAL' if db_type == 'postgresql' else 'FLOAT'
+    return db_type_str
+
+
 async def ensure_table_exists(session: AsyncSession, table_name: str, api_code: str, df: pd.DataFrame | None = None, config=None, primary_key_fields_str: str | None = None) -> None:
     """
     确保表存在，如果不存在则根据 DataFrame 结构创建
@@ -100,33 +174,16 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
     if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name):
         raise ValueError(f'无效的表名: {table_name}')
     
-    # 检查表是否存在
     if DataBaseConfig.db_type == 'postgresql':
-        check_sql = """
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_name = :table_name
-            )
-        """
         # PostgreSQL 表名和索引名需要用双引号转义
         table_name_escaped = f'"{table_name}"'
     else:
-        check_sql = """
-            SELECT COUNT(*) as count
-            FROM information_schema.tables 
-            WHERE table_schema = DATABASE()
-            AND table_name = :table_name
-        """
         # MySQL 表名和索引名需要用反引号转义
         table_name_escaped = f'`{table_name}`'
     
-    result = await session.execute(text(check_sql), {'table_name': table_name})
-    
-    if DataBaseConfig.db_type == 'postgresql':
-        table_exists = result.scalar()
-    else:
-        table_exists = result.scalar() > 0
+    # 检查表是否存在（使用进程级表结构缓存，避免每次都查询系统目录）
+    table_schema = await TushareSchemaRegistry.get_table_schema(session, table_name)
+    table_exists = table_schema.exists
     
     if not table_exists:
         if df is None or df.empty:
@@ -168,12 +225,16 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
                 logger.warning(f'解析接口配置的主键字段失败: {e}，将使用默认 data_id 主键')
                 primary_key_fields = None
         
+        # 配置为分区表且数据包含交易日期时，按交易日期创建月范围分区
+        # 分区表的主键必须包含分区列，因此分区列不能为 NULL，默认主键改为 (data_id, trade_date)
+        partitioned = TusharePartitionDao.is_partitioned_table(table_name) and PARTITION_COLUMN in df.columns
+        
         # 根据 DataFrame 的列和数据类型创建表结构
         columns = []
         primary_key_columns = []
         
         # 如果配置了主键字段，不创建 data_id 作为主键，否则创建
-        if primary_key_fields:
+        if primary_key_fields or partitioned:
             # 创建 data_id 但不设为主键（用于兼容性）
             if DataBaseConfig.db_type == 'postgresql':
                 columns.append('data_id BIGSERIAL NOT NULL')
@@ -194,6 +255,7 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
         
         # 添加 DataFrame 的列，并收集主键字段
         col_mapping = {}  # 原始列名 -> 安全列名的映射
+        column_types = {}  # 安全列名 -> 数据库类型
         for col_name in df.columns:
             # 验证列名，只允许字母、数字和下划线
             safe_col_name = re.sub(r'[^a-zA-Z0-9_]', '_', str(col_name))
@@ -203,8 +265,8 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
             col_mapping[col_name] = safe_col_name
             
             # 获取列的数据类型
-            col_dtype = df[col_name].dtype
-            db_type_str = pandas_dtype_to_db_type(col_dtype, DataBaseConfig.db_type)
+            db_type_str = infer_column_db_type(df[col_name], safe_col_name, DataBaseConfig.db_type)
+            column_types[safe_col_name] = db_type_str
             
             # 检查是否为主键字段
             is_primary_key = False
@@ -222,23 +284,45 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
                     col_def = f'"{safe_col_name}" {db_type_str}'
                 else:
                     col_def = f'`{safe_col_name}` {db_type_str}'
+                if partitioned and safe_col_name == PARTITION_COLUMN:
+                    col_def += ' NOT NULL'
             
             columns.append(col_def)
         
+        if partitioned:
+            if not primary_key_columns:
+                primary_key_columns.append('data_id')
+            if PARTITION_COLUMN not in primary_key_columns:
+                primary_key_columns.append(PARTITION_COLUMN)
+        
         # 生成简短的索引名称（避免名称过长）
         idx_suffix = table_name[-20:] if len(table_name) > 20 else table_name
         # 生成简短的索引名称（避免名称过长）
         idx_suffix = table_name[-20:] if len(table_name) > 20 else table_name
         
+        # 行情类表按股票代码 + 交易日期做范围查询，主键不是以这两列开头时额外创建复合索引
+        # MySQL 的 utf8mb4 VARCHAR(500) 复合索引会超过索引长度限制，只在两列都是紧凑类型时创建
+        create_code_date_index = (
+            all(col in column_types for col in CODE_DATE_INDEX_COLUMNS)
+            and primary_key_columns[:2] != CODE_DATE_INDEX_COLUMNS
+            and (
+                DataBaseConfig.db_type == 'postgresql'
+                or all(column_types[col] in (COMPACT_CODE_TYPE, COMPACT_DATE_TYPE) for col in CODE_DATE_INDEX_COLUMNS)
+            )
+        )
+        code_date_index_cols = ', '.join(CODE_DATE_INDEX_COLUMNS)
+        
         # 创建表（PostgreSQL 需要分开执行多个 SQL 语句）
         if DataBaseConfig.db_type == 'postgresql':
-            # 如果有配置的主键字段，添加主键约束
-            if primary_key_fields and primary_key_columns:
+            # 如果有配置的主键字段（或为分区表），添加主键约束
+            if primary_key_columns:
                 pk_cols_escaped = ', '.join([f'"{col}"' for col in primary_key_columns])
                 columns.append(f'PRIMARY KEY ({pk_cols_escaped})')
             
             # 创建表
             create_table_sql = f"CREATE TABLE {table_name_escaped} (\n    " + ",\n    ".join(columns) + "\n)"
+            if partitioned:
+                create_table_sql += f' {TusharePartitionDao.get_partition_clause()}'
             await session.execute(text(create_table_sql))
             await session.flush()
             
@@ -250,6 +334,8 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
                 f'CREATE INDEX idx_dd_{idx_suffix} ON {table_name_escaped}(download_date)',
                 f'CREATE INDEX idx_ct_{idx_suffix} ON {table_name_escaped}(create_time)',
             ]
+            if create_code_date_index:
+                index_sqls.append(f'CREATE INDEX idx_tstd_{idx_suffix} ON {table_name_escaped}({code_date_index_cols})')
             
             for index_sql in index_sqls:
                 await session.execute(text(index_sql))
@@ -278,8 +364,8 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
                 await session.flush()
         else:
             # MySQL 可以在一个语句中执行
-            # 如果有配置的主键字段，添加主键约束
-            if primary_key_fields and primary_key_columns:
+            # 如果有配置的主键字段（或为分区表），添加主键约束
+            if primary_key_columns:
                 pk_cols_escaped = ', '.join([f'`{col}`' for col in primary_key_columns])
                 columns.append(f'PRIMARY KEY ({pk_cols_escaped})')
             
@@ -291,25 +377,35 @@ async def ensure_table_exists(session: AsyncSession, table_name: str, api_code:
                 f'INDEX idx_dd_{idx_suffix} (download_date)',
                 f'INDEX idx_ct_{idx_suffix} (create_time)',
             ]
+            if create_code_date_index:
+                index_defs.append(f'INDEX idx_tstd_{idx_suffix} ({code_date_index_cols})')
             
-            create_sql = f"CREATE TABLE {table_name_escaped} (\n    " + ",\n    ".join(columns + index_defs) + f"\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Tushare数据存储表（{api_code}）';"
+            create_sql = f"CREATE TABLE {table_name_escaped} (\n    " + ",\n    ".join(columns + index_defs) + f"\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Tushare数据存储表（{api_code}）'"
+            if partitioned:
+                create_sql += f' {TusharePartitionDao.get_partition_clause()}'
             await session.execute(text(create_sql))
             await session.flush()
         
+        # 执行了 DDL，事务提交前不缓存该表的结构，并使分区缓存失效
+        TushareSchemaRegistry.mark_pending_ddl(session, table_name)
+        TusharePartitionDao.invalidate(table_name)
+        
+        if partitioned:
+            logger.info(f'数据表 {table_name} 按 {PARTITION_COLUMN} 月范围分区，写入前自动创建分区')
         if primary_key_fields and primary_key_columns:
             logger.info(f'已创建数据表: {table_name}，包含 {len(df.columns)} 个数据列，主键字段: {primary_key_columns}')
         else:
             logger.info(f'已创建数据表: {table_name}，包含 {len(df.columns)} 个数据列，使用默认 data_id 主键')
 
 
-async def execute_single_api(session: AsyncSession, task, download_date: str) -> None:
+async def execute_single_api(session: AsyncSession, task, download_date: str) -> bool:
     """
     执行单个接口下载
 
     :param session: 数据库会话
     :param task: 任务对象
     :param download_date: 下载日期
-    :return: None
+    :return: 是否执行成功（接口配置已停用时视为成功）
     """
     start_time = datetime.now()
     
@@ -338,7 +434,7 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
     config = await TushareApiConfigDao.get_config_detail_by_id(session, task_config_id)
     if not config:
         logger.error(f'接口配置ID {task_config_id} 不存在')
-        return
+        return False
 
     # 立即提取 config 的所有属性，避免在 commit 后访问 ORM 对象导致延迟加载
     config_dict = config.__dict__.copy()
@@ -350,10 +446,12 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
     config_config_id = config_dict.get('config_id')
     config_data_fields = config_dict.get('data_fields')
     config_primary_key_fields = config_dict.get('primary_key_fields')
+    config_rate_limit = config_dict.get('rate_limit')
+    config_client_mode = config_dict.get('client_mode', '0') or '0'
 
     if config_status != '0':
         logger.warning(f'接口配置 {config_api_name} 已停用')
-        return
+        return True
 
     # 解析参数
     api_params = {}
@@ -398,25 +496,44 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
 
     # 动态调用接口
     # 某些接口（如 pro_bar）是 ts 模块的函数，不是 pro 对象的方法
-    api_func = getattr(pro, config_api_code, None)
+    api_func = resolve_api_func(pro, config_api_code)
     if not api_func:
-        # 尝试从 ts 模块获取（如 pro_bar）
-        api_func = getattr(ts, config_api_code, None)
-        if not api_func:
-            raise ValueError(f'接口 {config_api_code} 不存在（在 pro 对象和 ts 模块中都未找到）')
-
-    # 调用接口获取数据
-    try:
-        df = api_func(**api_params)
-    except Exception as api_error:
+        raise ValueError(f'接口 {config_api_code} 不存在（在 pro 对象和 ts 模块中都未找到）')
+
+    # 调用接口获取数据（经过进程级限流器）
+    cache_stats = {'hits': 0, 'misses': 0}
+    run_metrics = TushareStepMetrics(run_id, task_task_id)
+    run_metrics.api_code = config_api_code
+    run_metrics.combo_count = 1
+    planned_table_name = (
+        resolve_data_table_name(None, task_data_table_name, config_api_code) if task_save_to_db == '1' else None
+    )
+    df, api_error = await fetch_gap_planned_api_data(
+        session,
+        planned_table_name,
+        '0',
+        api_func,
+        api_params,
+        config_api_code,
+        config_rate_limit,
+        cache_stats,
+        config_client_mode,
+        run_metrics,
+    )
+    if api_error is not None:
         error_detail = f'Tushare接口调用失败: {str(api_error)}\n参数: {api_params}'
-        logger.exception(f'任务 {task_name} Tushare接口调用异常: {error_detail}')
+        logger.opt(exception=api_error).error(f'任务 {task_name} Tushare接口调用异常: {error_detail}')
+        run_metrics.failed = True
+        run_metrics.fail_combo_count = 1
+        await TushareDownloadRunMetricDao.add_metric_dao(session, run_metrics.to_metric())
         # 更新运行记录为 FAILED
         await TushareDownloadRunDao.update_run_status(
             session,
             run_record.run_id,
             status='FAILED',
             error_message=error_detail,
+            cache_hits=cache_stats['hits'],
+            cache_misses=cache_stats['misses'],
             set_end_time=True,
         )
         # 更新任务统计
@@ -430,7 +547,7 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
             },
         )
         await session.commit()
-        return
+        return False
 
     if df is None or df.empty:
         logger.warning(f'任务 {task_name} 下载数据为空')
@@ -438,6 +555,7 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
         file_path = None
     else:
         record_count = len(df)
+        run_metrics.add_rows(record_count)
 
         # 如果指定了数据字段，只保留指定字段
         # 使用提前提取的 config_data_fields，避免在 commit 后访问 ORM 对象导致延迟加载
@@ -462,14 +580,24 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
                     session, table_name, config=config, step_unique_key_fields=None
                 )
 
+                write_started = time.perf_counter()
                 inserted_count = await TushareDataDao.add_dataframe_to_table_dao(
                     session, table_name, df, task_task_id, config_config_id, config_api_code, download_date,
                     update_mode='0', unique_key_fields=unique_key_fields, config=config
                 )
+                run_metrics.add_db_write(time.perf_counter() - write_started)
                 logger.info(f'已保存 {inserted_count} 条数据到数据库表 {table_name}')
+                if config_api_code == 'trade_cal':
+                    TradeCalendar.mark_stale()
             except Exception as db_error:
+                # 保存失败可能伴随建表/建分区回滚或表被外部修改，使该表的结构缓存和分区缓存失效
+                TushareSchemaRegistry.invalidate(table_name)
+                TusharePartitionDao.invalidate(table_name)
                 error_detail = f'保存数据到数据库失败: {str(db_error)}'
                 logger.exception(f'任务 {task_name} 保存数据到数据库异常: {error_detail}')
+                run_metrics.failed = True
+                run_metrics.fail_combo_count = 1
+                await TushareDownloadRunMetricDao.add_metric_dao(session, run_metrics.to_metric())
                 # 更新运行记录为 FAILED
                 await TushareDownloadRunDao.update_run_status(
                     session,
@@ -489,29 +617,17 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
                     },
                 )
                 await session.commit()
-                return
+                return False
 
         # 保存到文件（如果配置了保存路径）
         file_path = None
         if task_save_path:
             try:
-                save_path = task_save_path
-                os.makedirs(save_path, exist_ok=True)
                 file_name = f"{config_api_code}_{download_date}_{datetime.now().strftime('%H%M%S')}"
-                save_format = task_save_format or 'csv'
-
-                if save_format == 'csv':
-                    file_path = os.path.join(save_path, f'{file_name}.csv')
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                elif save_format == 'excel':
-                    file_path = os.path.join(save_path, f'{file_name}.xlsx')
-                    df.to_excel(file_path, index=False, engine='openpyxl')
-                elif save_format == 'json':
-                    file_path = os.path.join(save_path, f'{file_name}.json')
-                    df.to_json(file_path, orient='records', force_ascii=False, indent=2)
-                else:
-                    file_path = os.path.join(save_path, f'{file_name}.csv')
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
+                # 文件写入在线程中执行，避免阻塞事件循环
+                file_path = await asyncio.to_thread(
+                    save_dataframe_to_file, df, task_save_path, task_save_format, file_name, config_api_code
+                )
 
                 logger.info(f'数据已保存到文件: {file_path}')
             except Exception as file_error:
@@ -538,6 +654,8 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
     )
 
     await TushareDownloadLogDao.add_log_dao(session, log)
+    run_metrics.success_combo_count = 1
+    await TushareDownloadRunMetricDao.add_metric_dao(session, run_metrics.to_metric())
 
     # 更新运行记录为 SUCCESS
     await TushareDownloadRunDao.update_run_status(
@@ -546,6 +664,8 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
         status='SUCCESS',
         total_records=record_count,
         success_records=record_count,
+        cache_hits=cache_stats['hits'],
+        cache_misses=cache_stats['misses'],
         set_end_time=True,
     )
 
@@ -559,6 +679,7 @@ async def execute_single_api(session: AsyncSession, task, download_date: str) ->
 
     await session.commit()
     logger.info(f'任务 {task_name} 执行成功，记录数: {record_count}, 耗时: {duration}秒')
+    return True
 
 
 def evaluate_date_expression(expr: str, base_date: datetime | None = None) -> str | None:
@@ -569,6 +690,8 @@ def evaluate_date_expression(expr: str, base_date: datetime | None = None) -> st
     - today: 当天
     - today+N: N天后（如 today+1 表示明天）
     - today-N: N天前（如 today-1 表示昨天）
+    - tday: 不晚于当天的最近一个交易日
+    - tday+N / tday-N: 最近一个交易日之后/之前的第 N 个交易日（如 tday-1 表示上一个交易日）
     
     :param expr: 日期表达式字符串
     :param base_date: 基准日期（默认为当前日期）
@@ -580,8 +703,8 @@ def evaluate_date_expression(expr: str, base_date: datetime | None = None) -> st
     # 去除首尾空格并转换为小写
     expr = expr.strip().lower()
     
-    # 匹配日期表达式模式：today 或 today+N 或 today-N
-    pattern = r'^today([+-]\d+)?$'
+    # 匹配日期表达式模式：today/tday 或 today+N/tday+N 或 today-N/tday-N
+    pattern = r'^(today|tday)([+-]\d+)?$'
     match = re.match(pattern, expr)
     
     if not match:
@@ -592,12 +715,28 @@ def evaluate_date_expression(expr: str, base_date: datetime | None = None) -> st
         base_date = datetime.now()
     
     # 提取偏移天数
-    offset_str = match.group(1) if match.group(1) else ''
+    offset_str = match.group(2) if match.group(2) else ''
     if offset_str:
         # 解析偏移量（+1, -1, +7, -30 等）
         offset_days = int(offset_str)
     else:
         offset_days = 0
+
+    if match.group(1) == 'tday':
+        trade_date = TradeCalendar.offset_trade_date(base_date.strftime('%Y%m%d'), offset_days)
+        if trade_date is not None:
+            return trade_date
+        # 交易日历不可用或超出日历范围时按工作日近似计算
+        logger.warning(f'交易日历不可用或未覆盖当前日期，日期表达式 {expr} 按工作日计算')
+        target_date = base_date
+        while target_date.weekday() >= 5:
+            target_date -= timedelta(days=1)
+        step = 1 if offset_days > 0 else -1
+        for _ in range(abs(offset_days)):
+            target_date += timedelta(days=step)
+            while target_date.weekday() >= 5:
+                target_date += timedelta(days=step)
+        return target_date.strftime('%Y%m%d')
     
     # 计算目标日期
     target_date = base_date + timedelta(days=offset_days)
@@ -757,14 +896,36 @@ def sanitize_dict_values(data: Any) -> Any:
         return '<Unserializable Object>'
 
 
-def generate_param_combinations(param_config: dict, previous_results: dict, previous_step_name: str = None) -> list[dict]:
+class LazyParamCombinations:
+    """
+    惰性生成的参数组合（笛卡尔积）
+
+    只保存每个参数去重后的值列表，遍历时逐个生成组合，不在内存中展开所有组合
+    """
+
+    def __init__(self, param_names: list[str], value_lists: list[list]) -> None:
+        self.param_names = param_names
+        # 清理值列表，确保所有值都是基本类型，避免触发 ORM 延迟加载（每个值只清理一次，而不是每个组合清理一次）
+        self.value_lists = [sanitize_dict_values(values) for values in value_lists]
+
+    def __len__(self) -> int:
+        return math.prod(len(values) for values in self.value_lists)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for combo in product(*self.value_lists):
+            yield dict(zip(self.param_names, combo, strict=True))
+
+
+def generate_param_combinations(
+    param_config: dict, previous_results: dict, previous_step_name: str = None
+) -> list[dict] | LazyParamCombinations:
     """
     生成所有参数组合（笛卡尔积）
     
     :param param_config: 参数配置字典（来自 parse_step_params）
     :param previous_results: 前一步的结果数据
     :param previous_step_name: 前一步的步骤名，用于解析 previous_step 占位符
-    :return: 参数组合列表，例如：[{'ts_code': '000001.SZ', 'trade_date': '20240101'}, ...]
+    :return: 参数组合（可迭代且支持 len），例如：[{'ts_code': '000001.SZ', 'trade_date': '20240101'}, ...]
     """
     # 收集所有参数的值列表
     param_values = {}
@@ -794,7 +955,18 @@ def generate_param_combinations(param_config: dict, previous_results: dict, prev
                 # 从前一步的结果列表中提取所有记录的该字段值
                 if step_name in previous_results:
                     records = previous_results[step_name]
-                    if isinstance(records, list):
+                    if isinstance(records, (ColumnarStepResult, SpilledStepResult)):
+                        # 按列存储或落盘的结果：只读取引用到的字段，哈希去重后再计算日期表达式
+                        for value in records.read_column_values(field):
+                            if isinstance(value, str):
+                                date_result = evaluate_date_expression(value)
+                                if date_result is not None:
+                                    value = date_result
+                            values.append(value)
+                        values = deduplicate_values(values)
+                        if not values:
+                            logger.warning(f'参数 {param_name} (遍历变量, source: {source}): 前一步 {step_name} 的 {len(records)} 条记录中都没有字段 {field}，可用字段: {records.columns}')
+                    elif isinstance(records, list):
                         if len(records) == 0:
                             logger.warning(f'参数 {param_name} (遍历变量, source: {source}): 前一步 {step_name} 的结果列表为空')
                         else:
@@ -807,9 +979,9 @@ def generate_param_combinations(param_config: dict, previous_results: dict, prev
                                         date_result = evaluate_date_expression(value)
                                         if date_result is not None:
                                             value = date_result
-                                    if value not in values:  # 去重
-                                        values.append(value)
+                                    values.append(value)
                                     found_count += 1
+                            values = deduplicate_values(values)
                             if found_count == 0:
                                 logger.warning(f'参数 {param_name} (遍历变量, source: {source}): 前一步 {step_name} 的 {len(records)} 条记录中都没有字段 {field}，可用字段: {list(records[0].keys()) if records and isinstance(records[0], dict) else "N/A"}')
                     else:
@@ -873,6 +1045,8 @@ def generate_param_combinations(param_config: dict, previous_results: dict, prev
                     # 如果使用点号格式找不到，尝试从步骤结果列表中获取第一条记录
                     if step_name in previous_results:
                         records = previous_results[step_name]
+                        if isinstance(records, (ColumnarStepResult, SpilledStepResult)):
+                            records = [records.first_record] if records.first_record else []
                         if isinstance(records, list) and len(records) > 0:
                             first_record = records[0]
                             if isinstance(first_record, dict) and field in first_record:
@@ -940,14 +1114,147 @@ def generate_param_combinations(param_config: dict, previous_results: dict, prev
         logger.debug(f'前一步结果可用键: {list(previous_results.keys())}')
         return []
     
-    combinations = []
-    for combo in product(*value_lists):
-        combination_dict = dict(zip(param_names, combo))
-        # 清理字典值，确保所有值都是基本类型，避免触发 ORM 延迟加载
-        sanitized_dict = sanitize_dict_values(combination_dict)
-        combinations.append(sanitized_dict)
-    
-    return combinations
+    return LazyParamCombinations(param_names, value_lists)
+
+
+# Tushare SDK 为阻塞调用，统一放到进程级线程池中执行，避免阻塞事件循环
+_api_executor = ThreadPoolExecutor(max_workers=TushareConfig.tushare_api_max_workers, thread_name_prefix='tushare_api')
+
+
+def resolve_api_func(pro: Any, api_code: str) -> Any:
+    """
+    获取接口对应的调用函数
+
+    :param pro: Tushare pro API对象
+    :param api_code: 接口代码
+    :return: 接口调用函数，不存在时返回 None
+    """
+    # pro_bar 是 ts 模块的函数，不是 pro 对象的方法，需要先设置 token
+    if api_code == 'pro_bar':
+        ts_token = TushareConfig.tushare_token or os.getenv('TUSHARE_TOKEN', '')
+        if ts_token:
+            ts.set_token(ts_token)
+        return ts.pro_bar
+    # 其他接口从 pro 对象获取，找不到时尝试从 ts 模块获取
+    api_func = getattr(pro, api_code, None)
+    if not api_func:
+        api_func = getattr(ts, api_code, None)
+    return api_func
+
+
+async def fetch_api_data(
+    api_func: Any,
+    api_params: dict,
+    api_code: str = '',
+    rate_limit: int | None = None,
+    cache_stats: dict[str, int] | None = None,
+    client_mode: str = '0',
+) -> tuple[pd.DataFrame | None, Exception | None]:
+    """
+    在线程池中调用Tushare接口（优先读取磁盘缓存；经过进程级限流器，配额超限时自适应退避重试）
+
+    :param api_func: 接口调用函数
+    :param api_params: API参数字典
+    :param api_code: 接口代码（限流及缓存维度）
+    :param rate_limit: 接口每分钟调用次数上限，为空则使用全局默认值
+    :param cache_stats: 缓存命中统计（{'hits': 命中数, 'misses': 未命中数}），为 None 时不统计
+    :param client_mode: 调用方式（0 SDK线程池 1 异步HTTP客户端，SDK辅助接口始终使用线程池）
+    :return: (df, 异常) 调用成功时异常为 None，调用失败时 df 为 None
+    """
+    loop = asyncio.get_running_loop()
+    cache_enabled = TushareResponseCache.is_enabled()
+    if cache_enabled:
+        # 命中缓存时不占用接口配额
+        cached_df = await loop.run_in_executor(_api_executor, TushareResponseCache.get, api_code, api_params)
+        if cache_stats is not None:
+            cache_stats['hits' if cached_df is not None else 'misses'] += 1
+        if cached_df is not None:
+            return cached_df, None
+    ts_token = TushareConfig.tushare_token or os.getenv('TUSHARE_TOKEN', '')
+    use_http_client = client_mode == '1' and TushareHttpClient.supports(api_code)
+    if client_mode == '1' and not use_http_client:
+        logger.debug(f'接口 {api_code} 不支持异步HTTP客户端（SDK辅助接口或未安装 httpx），使用线程池调用')
+    retry_count = 0
+    while True:
+        wait_seconds = TushareRateLimiter.reserve(ts_token, api_code, rate_limit)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        try:
+            if use_http_client:
+                df = await TushareHttpClient.query(api_code, ts_token, api_params)
+            else:
+                df = await loop.run_in_executor(_api_executor, functools.partial(api_func, **api_params))
+        except Exception as api_error:
+            if TushareRateLimiter.is_quota_error(api_error) and retry_count < TushareConfig.tushare_rate_limit_max_retries:
+                retry_count += 1
+                TushareRateLimiter.report_quota_error(ts_token, api_code)
+                logger.warning(f'接口 {api_code} 配额超限，第 {retry_count} 次退避重试，参数: {api_params}')
+                continue
+            return None, api_error
+        TushareRateLimiter.report_success(ts_token, api_code)
+        if cache_enabled:
+            await loop.run_in_executor(_api_executor, TushareResponseCache.put, api_code, api_params, df)
+        return df, None
+
+
+async def fetch_gap_planned_api_data(
+    session: AsyncSession,
+    table_name: str | None,
+    update_mode: str,
+    api_func: Any,
+    api_params: dict,
+    api_code: str = '',
+    rate_limit: int | None = None,
+    cache_stats: dict[str, int] | None = None,
+    client_mode: str = '0',
+    metrics: TushareStepMetrics | None = None,
+) -> tuple[pd.DataFrame | None, Exception | None]:
+    """
+    按缺口规划调用Tushare接口：日期区间参数改写为目标表缺失的区间后逐个请求并合并结果，不可规划时按原参数调用
+
+    :param session: 数据库会话（规划查询使用同一连接池的独立会话，可以在并发预取中调用）
+    :param table_name: 目标数据表名，为空（不保存到数据库或结果被后续步骤引用）时不做规划
+    :param update_mode: 更新模式
+    :param api_func: 接口调用函数
+    :param api_params: API参数字典
+    :param api_code: 接口代码
+    :param rate_limit: 接口每分钟调用次数上限
+    :param cache_stats: 缓存命中统计
+    :param client_mode: 调用方式
+    :param metrics: 运行指标收集器，为 None 时不统计接口等待耗时
+    :return: (df, 异常) 调用成功时异常为 None，调用失败时 df 为 None
+    """
+
+    async def timed_fetch(params: dict) -> tuple[pd.DataFrame | None, Exception | None]:
+        fetch_started = time.perf_counter()
+        result = await fetch_api_data(api_func, params, api_code, rate_limit, cache_stats, client_mode)
+        if metrics is not None:
+            metrics.add_api_wait(time.perf_counter() - fetch_started)
+        return result
+
+    gap_params = None
+    if table_name and TushareGapPlanner.is_applicable(api_code, api_params, update_mode):
+        try:
+            async with async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)() as plan_session:
+                gap_params = await TushareGapPlanner.plan_gap_params(
+                    plan_session, table_name, api_code, api_params, update_mode
+                )
+        except Exception as plan_error:
+            logger.warning(f'接口 {api_code} 缺口规划失败，按原参数下载: {plan_error}')
+    if gap_params is None:
+        return await timed_fetch(api_params)
+    if not gap_params:
+        logger.info(f'接口 {api_code} 参数 {api_params} 对应的数据已完整，跳过接口调用')
+        return pd.DataFrame(), None
+
+    gap_dfs = []
+    for params in gap_params:
+        df, api_error = await timed_fetch(params)
+        if api_error is not None:
+            return None, api_error
+        if df is not None and not df.empty:
+            gap_dfs.append(df)
+    return (pd.concat(gap_dfs, ignore_index=True) if gap_dfs else pd.DataFrame()), None
 
 
 async def execute_single_step(
@@ -973,12 +1280,18 @@ async def execute_single_step(
     config_config_id: int | None = None,  # 提前提取的配置ID，避免 commit 后访问 ORM 对象
     config_data_fields: str | None = None,  # 提前提取的数据字段，避免 commit 后访问 ORM 对象
     config_primary_key_fields: str | None = None,  # 提前提取的主键字段，避免 commit 后访问 ORM 对象
+    config_rate_limit: int | None = None,  # 提前提取的接口每分钟调用上限，避免 commit 后访问 ORM 对象
+    config_client_mode: str = '0',  # 提前提取的接口调用方式，避免 commit 后访问 ORM 对象
     task_task_id: int | None = None,  # 提前提取的任务ID，避免 commit 后访问 ORM 对象
     task_save_to_db: str = '0',  # 提前提取的是否保存到数据库，避免 commit 后访问 ORM 对象
     task_data_table_name: str | None = None,  # 提前提取的任务数据表名，避免 commit 后访问 ORM 对象
     task_save_path: str | None = None,  # 提前提取的保存路径，避免 commit 后访问 ORM 对象
     task_save_format: str | None = None,  # 提前提取的保存格式，避免 commit 后访问 ORM 对象
     log_detail: bool = True,  # 是否记录明细级下载日志（遍历模式下可关闭，仅保留汇总）
+    prefetched_result: tuple[pd.DataFrame | None, Exception | None] | None = None,  # 并发预取的接口结果
+    cache_stats: dict[str, int] | None = None,  # 运行级缓存命中统计
+    step_metrics: TushareStepMetrics | None = None,  # 步骤运行指标收集器
+    gap_plan_enabled: bool = True,  # 是否允许缺口规划（结果被后续步骤引用时需要完整数据，不做规划）
 ) -> tuple[int, pd.DataFrame | None]:
     """
     执行单个步骤（单次API调用）
@@ -1005,6 +1318,12 @@ async def execute_single_step(
     :param config_config_id: 配置ID（提前提取，避免延迟加载）
     :param config_data_fields: 数据字段（提前提取，避免延迟加载）
     :param config_primary_key_fields: 主键字段（提前提取，避免延迟加载）
+    :param config_rate_limit: 接口每分钟调用次数上限（提前提取，避免延迟加载）
+    :param config_client_mode: 接口调用方式（提前提取，避免延迟加载）
+    :param prefetched_result: 并发预取的接口结果 (df, 异常)，为 None 时在本函数内调用接口
+    :param cache_stats: 运行级缓存命中统计（{'hits': 命中数, 'misses': 未命中数}）
+    :param step_metrics: 步骤运行指标收集器（累加接口等待、数据库写入耗时和记录数）
+    :param gap_plan_enabled: 是否允许按目标表缺口规划接口参数
     :return: (record_count, df) 记录数和DataFrame
     """
     # 使用传入的参数，避免访问已过期的 ORM 对象属性
@@ -1020,39 +1339,37 @@ async def execute_single_step(
     current_config_data_fields = config_data_fields if config_data_fields is not None else None
     current_config_primary_key_fields = config_primary_key_fields if config_primary_key_fields is not None else None
     
-    # 动态调用接口
-    # pro_bar 是 ts 模块的函数，需要特殊处理
-    if current_config_api_code == 'pro_bar':
-        # pro_bar 是 ts 模块的函数，不是 pro 对象的方法
-        # 需要先设置 token，然后直接调用 ts.pro_bar
-        ts_token = TushareConfig.tushare_token or os.getenv('TUSHARE_TOKEN', '')
-        if ts_token:
-            ts.set_token(ts_token)
-        api_func = ts.pro_bar
+    # 调用接口获取数据
+    # 遍历并发模式下，接口数据已由调用方在线程池中预先获取，直接使用预取结果
+    if prefetched_result is not None:
+        df, api_error = prefetched_result
     else:
-        # 其他接口从 pro 对象获取
-        api_func = getattr(pro, current_config_api_code, None)
+        api_func = resolve_api_func(pro, current_config_api_code)
         if not api_func:
-            # 尝试从 ts 模块获取
-            api_func = getattr(ts, current_config_api_code, None)
-            if not api_func:
-                logger.error(f'步骤 {current_step_name} 的接口 {current_config_api_code} 不存在（在 pro 对象和 ts 模块中都未找到）')
-                return (0, None)
+            logger.error(f'步骤 {current_step_name} 的接口 {current_config_api_code} 不存在（在 pro 对象和 ts 模块中都未找到）')
+            return (0, None)
 
-    # 调用接口获取数据
-    try:
         # 记录接口调用信息（用于调试）
         logger.debug(f'步骤 {current_step_name} 调用接口 {current_config_api_code}，函数类型: {type(api_func)}，参数: {api_params}')
-        
-        # 检查 api_func 是否是 functools.partial（某些接口可能返回 partial 对象）
-        import functools
-        if isinstance(api_func, functools.partial):
-            logger.debug(f'接口 {current_config_api_code} 返回的是 partial 对象: {api_func}')
-            # partial 对象可以直接调用，但需要确保参数正确
-            df = api_func(**api_params)
-        else:
-            df = api_func(**api_params)
-    except Exception as api_error:
+        planned_table_name = (
+            resolve_data_table_name(step_data_table_name, task_data_table_name, current_config_api_code)
+            if task_save_to_db == '1' and gap_plan_enabled
+            else None
+        )
+        df, api_error = await fetch_gap_planned_api_data(
+            session,
+            planned_table_name,
+            step_update_mode,
+            api_func,
+            api_params,
+            current_config_api_code,
+            config_rate_limit,
+            cache_stats,
+            config_client_mode,
+            step_metrics,
+        )
+
+    if api_error is not None:
         # 获取完整的错误信息（包括堆栈跟踪）
         full_error = ''.join(traceback.format_exception(type(api_error), api_error, api_error.__traceback__))
         error_detail = f'步骤 {current_step_name} Tushare接口调用失败: {full_error}\n参数: {api_params}\n接口代码: {current_config_api_code}\n接口名称: {current_config_api_name}'
@@ -1062,7 +1379,7 @@ async def execute_single_step(
         if len(error_detail) > max_error_length:
             error_detail = error_detail[:max_error_length] + '\n... (错误信息过长，已截断)'
         
-        logger.exception(f'步骤 {current_step_name} Tushare接口调用失败: {str(api_error)}')
+        logger.opt(exception=api_error).error(f'步骤 {current_step_name} Tushare接口调用失败: {str(api_error)}')
         # 记录错误日志（可按需关闭明细日志）
         step_duration = int((datetime.now() - step_start_time).total_seconds())
         # 使用提前提取的 task_task_id，避免在 commit 后访问 ORM 对象导致延迟加载
@@ -1090,6 +1407,8 @@ async def execute_single_step(
         file_path = None
     else:
         record_count = len(df)
+        if step_metrics is not None:
+            step_metrics.add_rows(record_count)
 
         # 如果指定了数据字段，只保留指定字段
         # 使用提前提取的 current_config_data_fields，避免在 commit 后访问 ORM 对象导致延迟加载
@@ -1165,10 +1484,13 @@ async def execute_single_step(
                 if current_task_task_id is None:
                     raise ValueError('任务ID不能为空')
                 # 传递提前提取的 primary_key_fields_str，避免访问 config 对象导致延迟加载
+                write_started = time.perf_counter()
                 inserted_count = await TushareDataDao.add_dataframe_to_table_dao(
                     session, table_name, df, current_task_task_id, current_config_config_id, current_config_api_code, download_date,
                     update_mode=update_mode, unique_key_fields=unique_key_fields, config=config, primary_key_fields_str=current_config_primary_key_fields
                 )
+                if step_metrics is not None:
+                    step_metrics.add_db_write(time.perf_counter() - write_started)
                 
                 # 记录保存结果
                 if inserted_count < len(df) and update_mode in ['1', '2']:
@@ -1182,7 +1504,12 @@ async def execute_single_step(
                         f'步骤 {current_step_name}' + (f' 组合{combination_index}' if combination_index is not None else '') +
                         f' 已保存 {inserted_count} 条数据到数据库表 {table_name}，更新模式: {update_mode}'
                     )
+                if current_config_api_code == 'trade_cal':
+                    TradeCalendar.mark_stale()
             except Exception as db_error:
+                # 保存失败可能伴随建表/建分区回滚或表被外部修改，使该表的结构缓存和分区缓存失效
+                TushareSchemaRegistry.invalidate(table_name)
+                TusharePartitionDao.invalidate(table_name)
                 # 获取完整的错误信息（包括堆栈跟踪）
                 full_error = ''.join(traceback.format_exception(type(db_error), db_error, db_error.__traceback__))
                 error_detail = f'步骤 {current_step_name} 保存数据到数据库失败: {full_error}'
@@ -1229,7 +1556,8 @@ async def execute_single_step(
                     # 尝试记录错误日志（使用新会话，避免影响主事务）
                     if log_detail:
                         try:
-                            async with AsyncSessionLocal() as new_session:
+                            # 新会话使用当前会话的引擎（后台任务运行时的连接池与事件循环绑定）
+                            async with async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)() as new_session:
                                 await TushareDownloadLogDao.add_log_dao(new_session, log)
                                 await new_session.commit()
                         except Exception as new_session_error:
@@ -1248,7 +1576,8 @@ async def execute_single_step(
                         # 如果回滚后仍然失败，尝试创建新会话记录日志
                         if log_detail:
                             try:
-                                async with AsyncSessionLocal() as new_session:
+                                # 新会话使用当前会话的引擎（后台任务运行时的连接池与事件循环绑定）
+                                async with async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)() as new_session:
                                     await TushareDownloadLogDao.add_log_dao(new_session, log)
                                     await new_session.commit()
                             except Exception as new_session_error:
@@ -1261,25 +1590,13 @@ async def execute_single_step(
         # 使用传入的参数，不再访问 task 对象属性，避免在异步上下文中触发延迟加载
         if task_save_path:
             try:
-                save_path = task_save_path
-                os.makedirs(save_path, exist_ok=True)
                 combo_suffix = f'_combo{combination_index}' if combination_index is not None else ''
                 file_name = f"{current_config_api_code}_{current_step_order}_{download_date}_{datetime.now().strftime('%H%M%S')}{combo_suffix}"
                 # 使用传入的参数，不再访问 task 对象属性，避免在异步上下文中触发延迟加载
-                save_format = task_save_format or 'csv'
-
-                if save_format == 'csv':
-                    file_path = os.path.join(save_path, f'{file_name}.csv')
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                elif save_format == 'excel':
-                    file_path = os.path.join(save_path, f'{file_name}.xlsx')
-                    df.to_excel(file_path, index=False, engine='openpyxl')
-                elif save_format == 'json':
-                    file_path = os.path.join(save_path, f'{file_name}.json')
-                    df.to_json(file_path, orient='records', force_ascii=False, indent=2)
-                else:
-                    file_path = os.path.join(save_path, f'{file_name}.csv')
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
+                # 文件写入在线程中执行，避免阻塞事件循环
+                file_path = await asyncio.to_thread(
+                    save_dataframe_to_file, df, task_save_path, task_save_format, file_name, current_config_api_code
+                )
 
                 logger.info(f'步骤 {current_step_name} 数据已保存到文件: {file_path}')
             except Exception as file_error:
@@ -1319,7 +1636,265 @@ async def execute_single_step(
     return (record_count, df)
 
 
-async def execute_workflow(session: AsyncSession, task, download_date: str, task_params_str: str = None) -> None:
+def resolve_data_table_name(step_data_table_name: str | None, task_data_table_name: str | None, api_code: str) -> str:
+    """
+    确定步骤数据的存储表名（优先级：步骤配置 > 任务配置 > 默认表名）
+
+    :param step_data_table_name: 步骤配置的表名
+    :param task_data_table_name: 任务配置的表名
+    :param api_code: 接口代码
+    :return: 表名
+    """
+    if step_data_table_name and step_data_table_name.strip():
+        return step_data_table_name.strip()
+    if task_data_table_name and task_data_table_name.strip():
+        return task_data_table_name.strip()
+    return f'tushare_{api_code}'
+
+
+async def resolve_step_dedup_key_fields(
+    session: AsyncSession, table_name: str, step_unique_key_fields: str | None, primary_key_fields_str: str | None
+) -> list[str]:
+    """
+    确定遍历步骤结果去重使用的唯一键字段（与保存数据时的唯一键优先级一致）
+
+    :param session: 数据库会话
+    :param table_name: 步骤数据表名
+    :param step_unique_key_fields: 步骤配置的唯一键字段（JSON格式）
+    :param primary_key_fields_str: 接口配置的主键字段（JSON格式）
+    :return: 唯一键字段列表，为空时按整行去重
+    """
+    step_key_fields = None
+    if step_unique_key_fields and step_unique_key_fields.strip():
+        try:
+            step_key_fields = json.loads(step_unique_key_fields)
+        except (json.JSONDecodeError, TypeError):
+            step_key_fields = None
+    if not isinstance(step_key_fields, list):
+        step_key_fields = None
+    try:
+        return await TushareDataDao.get_unique_key_fields(
+            session, table_name, step_unique_key_fields=step_key_fields, primary_key_fields_str=primary_key_fields_str
+        )
+    except Exception as key_error:
+        logger.warning(f'获取表 {table_name} 的唯一键字段失败，遍历结果将按整行去重: {key_error}')
+        return []
+
+
+def build_combo_key(combo_params: dict) -> str:
+    """
+    生成参数组合的断点键
+
+    :param combo_params: 参数组合
+    :return: 断点键
+    """
+    raw = json.dumps(combo_params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+async def save_step_checkpoint(session: AsyncSession, run_id: int, checkpoint: dict[str, Any], step_key: str) -> None:
+    """
+    保存单个步骤的断点信息（与步骤数据在同一事务中提交）
+
+    只写入该步骤自己的断点行，并行分支不会把其他分支尚未提交数据的断点一并持久化，也不会争用运行记录的行锁
+
+    :param session: 数据库会话
+    :param run_id: 运行ID
+    :param checkpoint: 断点信息
+    :param step_key: 步骤键
+    :return: None
+    """
+    combo_keys = checkpoint['step_combos'].get(step_key)
+    await TushareDownloadRunCheckpointDao.save_step_checkpoint(
+        session,
+        run_id,
+        step_key,
+        completed=step_key in checkpoint['completed_steps'],
+        combo_keys=json.dumps(combo_keys) if combo_keys else None,
+    )
+
+
+async def load_persisted_step_results(
+    session: AsyncSession, table_name: str, task_id: int, config_id: int, download_date: str
+) -> pd.DataFrame | None:
+    """
+    从数据表中恢复已持久化的步骤结果（断点续跑时重建 previous_results）
+
+    :param session: 数据库会话
+    :param table_name: 数据表名
+    :param task_id: 任务ID
+    :param config_id: 接口配置ID
+    :param download_date: 下载日期
+    :return: 结果数据，无法恢复时返回 None
+    """
+    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', table_name):
+        return None
+    table_name_escaped = f'"{table_name}"' if DataBaseConfig.db_type == 'postgresql' else f'`{table_name}`'
+    query_sql = (
+        f'SELECT * FROM {table_name_escaped} '
+        'WHERE task_id = :task_id AND config_id = :config_id AND download_date = :download_date'
+    )
+    try:
+        async with session.begin_nested():
+            result = await session.execute(
+                text(query_sql), {'task_id': task_id, 'config_id': config_id, 'download_date': download_date}
+            )
+            restored_df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    except Exception as e:
+        logger.warning(f'从数据表 {table_name} 恢复步骤结果失败: {e}')
+        return None
+    # 去掉系统字段，只保留接口返回的数据字段
+    meta_columns = ['data_id', 'task_id', 'config_id', 'api_code', 'download_date', 'create_time']
+    return restored_df.drop(columns=meta_columns, errors='ignore')
+
+
+def collect_step_field_references(step_params_list: list[str | None]) -> dict[str, set[str] | None]:
+    """
+    收集流程中各步骤参数引用到的前序步骤字段，用于步骤结果按列裁剪
+
+    :param step_params_list: 各步骤的参数（JSON字符串）
+    :return: 步骤名 -> 被引用的字段集合（None 表示需要保留完整记录），previous_step 占位符的引用记录在 previous_step 键下
+    """
+    references: dict[str, set[str] | None] = {}
+    for step_params_str in step_params_list:
+        if not step_params_str:
+            continue
+        try:
+            step_params = json.loads(step_params_str)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if not isinstance(step_params, dict):
+            continue
+        for value in step_params.values():
+            if isinstance(value, dict) and value.get('type') in ('loop', 'variable'):
+                source = value.get('source') or ''
+            elif isinstance(value, str) and value.startswith('${') and value.endswith('}'):
+                source = value[2:-1]
+            else:
+                continue
+            if '.' in source:
+                source_step_name, field = source.split('.', 1)
+                if references.get(source_step_name, set()) is not None:
+                    references.setdefault(source_step_name, set()).add(field)
+            elif source:
+                # 直接引用整个步骤结果时需要保留完整记录
+                references[source] = None
+    return references
+
+
+def collect_step_reference_sources(cached_step: dict[str, Any]) -> list[str]:
+    """
+    收集步骤参数和执行条件中引用的前序步骤数据（${步骤名.字段}、遍历/变量参数的 source、执行条件的 field）
+
+    :param cached_step: 提前提取属性的步骤
+    :return: 引用来源列表（步骤名.字段 或 步骤名）
+    """
+    sources: list[str] = []
+    try:
+        step_params = json.loads(cached_step['step_params']) if cached_step['step_params'] else {}
+    except (json.JSONDecodeError, TypeError):
+        step_params = {}
+    if isinstance(step_params, dict):
+        for value in step_params.values():
+            if isinstance(value, dict) and value.get('type') in ('loop', 'variable'):
+                sources.append(value.get('source') or '')
+            elif isinstance(value, str) and value.startswith('${') and value.endswith('}'):
+                sources.append(value[2:-1])
+    try:
+        condition = json.loads(cached_step['condition_expr']) if cached_step['condition_expr'] else {}
+    except (json.JSONDecodeError, TypeError):
+        condition = {}
+    if isinstance(condition, dict) and isinstance(condition.get('field'), str):
+        sources.append(condition['field'])
+    return sources
+
+
+def build_step_dependencies(
+    step_cache: list[dict[str, Any]], step_table_names: list[str | None]
+) -> list[set[int]]:
+    """
+    根据步骤参数和执行条件中的引用构建步骤依赖（只依赖顺序在前的步骤，保证与顺序执行的结果一致）
+
+    - 参数中的 ${步骤名.字段}、遍历/变量参数的 source、执行条件的 field：依赖最近一个同名的前序步骤
+    - 引用 previous_step：依赖所有前序步骤（前一步需要按顺序确定）
+    - 写入同一数据表的步骤按顺序执行，避免并发写入同一张表
+
+    :param step_cache: 提前提取属性的步骤列表（按执行顺序）
+    :param step_table_names: 各步骤的数据表名（无需保存数据的节点为 None）
+    :return: 各步骤依赖的步骤序号集合
+    """
+    dependencies: list[set[int]] = []
+    for step_index, cached_step in enumerate(step_cache):
+        step_dependencies: set[int] = set()
+        for source in collect_step_reference_sources(cached_step):
+            source_step_name = source.split('.', 1)[0]
+            if not source_step_name:
+                continue
+            if source_step_name == 'previous_step':
+                step_dependencies.update(range(step_index))
+                continue
+            for previous_index in range(step_index - 1, -1, -1):
+                if step_cache[previous_index]['step_name'] == source_step_name:
+                    step_dependencies.add(previous_index)
+                    break
+        table_name = step_table_names[step_index]
+        if table_name:
+            for previous_index in range(step_index - 1, -1, -1):
+                if step_table_names[previous_index] == table_name:
+                    step_dependencies.add(previous_index)
+                    break
+        dependencies.append(step_dependencies)
+    return dependencies
+
+
+def store_step_result(
+    previous_results: dict[str, Any],
+    step_name: str,
+    df: pd.DataFrame,
+    field_references: dict[str, set[str] | None],
+) -> None:
+    """
+    保存步骤结果供后续步骤使用（按列存储，只保留后续步骤引用到的字段）
+
+    :param previous_results: 前序步骤结果
+    :param step_name: 步骤名称
+    :param df: 步骤结果
+    :param field_references: 各步骤被引用的字段（来自 collect_step_field_references）
+    :return: None
+    """
+    step_fields = field_references.get(step_name, set())
+    previous_step_fields = field_references.get('previous_step', set())
+    if step_fields is None or previous_step_fields is None:
+        # 存在对整个步骤结果的引用，保留完整记录
+        records = df.to_dict('records')
+        previous_results[step_name] = records
+        first_record = records[0] if records else None
+    else:
+        step_result = ColumnarStepResult.from_dataframe(df, step_fields | previous_step_fields)
+        previous_results[step_name] = step_result
+        first_record = step_result.first_record
+    if first_record:
+        # 保存第一条记录的所有字段，方便变量参数和条件判断
+        for key, value in first_record.items():
+            previous_results[f'{step_name}.{key}'] = value
+
+
+async def spill_step_chunk(spilled_result: SpilledStepResult, chunk_dfs: list[pd.DataFrame]) -> None:
+    """
+    将一批组合的结果合并后写入落盘结果（各组合的结果到达时已按唯一键增量去重，这里不再对所有列去重）
+
+    :param spilled_result: 落盘结果
+    :param chunk_dfs: 本批次组合的结果列表
+    :return: None
+    """
+    chunk_df = pd.concat(chunk_dfs, ignore_index=True)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_api_executor, spilled_result.append, chunk_df)
+
+
+async def execute_workflow(
+    session: AsyncSession, task, download_date: str, task_params_str: str = None, resume: bool = False
+) -> bool:
     """
     执行流程配置，串联多个接口
 
@@ -1327,7 +1902,8 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
     :param task: 任务对象
     :param download_date: 下载日期
     :param task_params_str: 任务参数字符串（JSON格式），避免延迟加载问题
-    :return: None
+    :param resume: 是否从最近一次失败或中断的运行断点继续执行
+    :return: 是否执行成功（流程配置已停用或没有步骤时视为成功）
     """
     start_time = datetime.now()
     workflow_failed = False
@@ -1357,28 +1933,66 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
     workflow = await TushareWorkflowConfigDao.get_workflow_detail_by_id(session, task_workflow_id)
     if not workflow:
         logger.error(f'流程配置ID {task.workflow_id} 不存在')
-        return
+        return False
 
     if workflow.status != '0':
         logger.warning(f'流程配置 {workflow.workflow_name} 已停用')
-        return
-
-    # 创建运行记录（PENDING -> RUNNING）
-    # 注意：这里立即缓存 run_id，后续不再访问 ORM 对象属性，避免在 commit 之后触发延迟加载
-    run_record = await TushareDownloadRunDao.create_run_record(session, task, initial_status='PENDING')
-    run_id = run_record.run_id
+        return True
+
+    # 断点续跑：复用最近一次失败或中断的运行记录及其断点信息
+    run_id = None
+    checkpoint: dict[str, Any] = {}
+    if resume:
+        resumable_run = await TushareDownloadRunDao.get_resumable_run(session, task_task_id)
+        if resumable_run:
+            run_id = resumable_run.run_id
+            try:
+                checkpoint = json.loads(resumable_run.checkpoint) or {}
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.warning(f'运行记录 {run_id} 的断点信息解析失败: {e}，将重新执行所有步骤')
+                checkpoint = {}
+            # 合并步骤断点行（旧版本的断点直接保存在运行记录中，同样兼容）
+            checkpoint.setdefault('completed_steps', [])
+            checkpoint.setdefault('step_combos', {})
+            for step_checkpoint in await TushareDownloadRunCheckpointDao.get_run_checkpoints(session, run_id):
+                if step_checkpoint.completed == '1':
+                    if step_checkpoint.step_key not in checkpoint['completed_steps']:
+                        checkpoint['completed_steps'].append(step_checkpoint.step_key)
+                    checkpoint['step_combos'].pop(step_checkpoint.step_key, None)
+                elif step_checkpoint.combo_keys:
+                    checkpoint['step_combos'][step_checkpoint.step_key] = json.loads(step_checkpoint.combo_keys)
+            # 续跑时沿用中断运行的下载日期，保证恢复的数据与新写入的数据一致
+            download_date = checkpoint.get('download_date') or download_date
+            logger.info(
+                f'流程任务 {task_name} 从运行记录 {run_id} 的断点继续执行，'
+                f'已完成步骤数: {len(checkpoint.get("completed_steps", []))}'
+            )
+        else:
+            logger.info(f'流程任务 {task_name} 没有可续跑的运行记录，将重新执行')
+
+    if run_id is None:
+        # 创建运行记录（PENDING -> RUNNING）
+        # 注意：这里立即缓存 run_id，后续不再访问 ORM 对象属性，避免在 commit 之后触发延迟加载
+        run_record = await TushareDownloadRunDao.create_run_record(session, task, initial_status='PENDING')
+        run_id = run_record.run_id
+    set_start_time = not checkpoint
+    checkpoint.setdefault('download_date', download_date)
+    checkpoint.setdefault('completed_steps', [])
+    checkpoint.setdefault('step_combos', {})
+    # 运行记录只保存运行级断点（下载日期及续跑时已合并的步骤断点），步骤断点由各步骤写入断点表
     await TushareDownloadRunDao.update_run_status(
         session,
         run_id,
         status='RUNNING',
-        set_start_time=True,
+        checkpoint=json.dumps(checkpoint, ensure_ascii=False, default=str),
+        set_start_time=set_start_time,
     )
 
     # 获取流程步骤（按顺序）
     steps = await TushareWorkflowStepDao.get_steps_by_workflow_id(session, task_workflow_id)
     if not steps:
         logger.warning(f'流程配置 {workflow.workflow_name} 没有配置步骤')
-        return
+        return True
 
     # 获取tushare pro接口
     ts_token = TushareConfig.tushare_token or os.getenv('TUSHARE_TOKEN', '')
@@ -1389,10 +2003,13 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
         )
     pro = ts.pro_api(ts_token)
 
+    # 运行级接口响应缓存命中统计
+    cache_stats = {'hits': 0, 'misses': 0}
+
     # 用于存储前一步的结果数据，供后续步骤使用
     previous_results: dict[str, Any] = {}
     total_record_count = 0
-    previous_step_name: str = None  # 记录前一步的步骤名，用于支持 previous_step 占位符
+    spill_store: TushareStepSpillStore | None = None  # 流式模式步骤结果的临时存储（首次使用时创建）
 
     # 提前提取所有步骤的属性并缓存，避免在 commit 后访问 ORM 对象导致延迟加载问题
     # 这是关键优化：一次性加载所有属性，后续不再访问 step 对象
@@ -1425,11 +2042,81 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
             'update_mode': step_dict.get('update_mode', '0') or '0',
             'unique_key_fields': step_dict.get('unique_key_fields'),
             'loop_mode': step_dict.get('loop_mode', '0') or '0',
+            'concurrency': step_dict.get('concurrency') or 1,
+            'stream_mode': step_dict.get('stream_mode', '0') or '0',
         }
         step_cache.append(cached_step)
+
+    # 收集后续步骤引用到的字段，步骤结果只按列保留这些字段
+    field_references = collect_step_field_references([cached_step['step_params'] for cached_step in step_cache])
     
-    # 按顺序执行每个步骤（使用缓存的属性，不再访问 step 对象）
+    # 构建步骤依赖图：没有相互引用的步骤可以并行执行（写入同一数据表的步骤仍按顺序执行）
+    step_table_names: list[str | None] = []
     for cached_step in step_cache:
+        step_table_name = None
+        if cached_step['node_type'] not in ['start', 'end'] and cached_step['config_id']:
+            step_config = await TushareApiConfigDao.get_config_detail_by_id(session, cached_step['config_id'])
+            if step_config is not None:
+                step_table_name = resolve_data_table_name(
+                    cached_step['data_table_name'], task_data_table_name, step_config.__dict__.get('api_code') or ''
+                )
+        step_table_names.append(step_table_name)
+    step_dependencies = build_step_dependencies(step_cache, step_table_names)
+    # 被后续步骤引用数据的步骤名（这些步骤的结果需要完整数据）
+    referenced_step_names = {
+        source.split('.', 1)[0]
+        for cached_step in step_cache
+        for source in collect_step_reference_sources(cached_step)
+        if source
+    }
+    # 已产生数据的步骤（步骤序号 -> 步骤名），用于确定 previous_step 占位符对应的前一步
+    produced_step_names: dict[int, str] = {}
+
+    async def run_step(step_index: int, session: AsyncSession) -> None:
+        """
+        执行单个流程步骤，并在步骤结束后写入步骤运行指标
+
+        :param step_index: 步骤序号
+        :param session: 执行该步骤使用的数据库会话（并行执行时每个分支使用独立会话）
+        :return: None
+        """
+        cached_step = step_cache[step_index]
+        step_metrics = TushareStepMetrics(
+            run_id, task_task_id, cached_step['step_id'], cached_step['step_name'], cached_step['step_order']
+        )
+        try:
+            await execute_step(step_index, session, step_metrics)
+        except Exception:
+            step_metrics.failed = True
+            raise
+        finally:
+            # 停用、开始/结束节点和断点跳过的步骤没有执行，不记录指标
+            # 使用独立会话写入，步骤失败时不会提交步骤会话中未完成的事务
+            if step_metrics.api_code:
+                try:
+                    async with async_sessionmaker(bind=session.bind)() as metric_session:
+                        await TushareDownloadRunMetricDao.add_metric_dao(metric_session, step_metrics.to_metric())
+                        await metric_session.commit()
+                except Exception as metric_error:
+                    logger.warning(f'步骤 {cached_step["step_name"]} 写入运行指标失败: {metric_error}')
+
+    async def execute_step(step_index: int, session: AsyncSession, step_metrics: TushareStepMetrics) -> None:
+        """
+        执行单个流程步骤（使用缓存的属性，不再访问 step 对象）
+
+        :param step_index: 步骤序号
+        :param session: 执行该步骤使用的数据库会话（并行执行时每个分支使用独立会话）
+        :param step_metrics: 步骤运行指标收集器
+        :return: None
+        """
+        nonlocal total_record_count, workflow_failed, last_error_message, spill_store
+        cached_step = step_cache[step_index]
+        # 前一步为顺序在前、最近一个产生数据的步骤（引用 previous_step 的步骤依赖所有前序步骤，执行时该值已确定）
+        previous_step_name = next(
+            (produced_step_names[index] for index in range(step_index - 1, -1, -1) if index in produced_step_names),
+            None,
+        )
+
         # 从缓存中获取所有属性，避免访问 ORM 对象
         step = cached_step['step']  # 保留用于向后兼容，但不应再访问其属性
         step_status = cached_step['status']
@@ -1443,16 +2130,20 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
         step_update_mode = cached_step['update_mode']
         step_unique_key_fields = cached_step['unique_key_fields']
         step_loop_mode = cached_step['loop_mode']
+        # 缺口规划只返回缺失区间的数据，结果被后续步骤引用（或存在 previous_step 引用）时需要完整数据，不做规划
+        step_gap_plan_enabled = (
+            step_name not in referenced_step_names and 'previous_step' not in referenced_step_names
+        )
         
         # 使用提取的值进行判断
         if step_status != '0':
             logger.warning(f'步骤 {step_name} 已停用，跳过')
-            continue
+            return
 
         # 跳过开始和结束节点（这些节点不需要接口配置）
         if step_node_type in ['start', 'end']:
             logger.info(f'步骤 {step_name} 是{step_node_type}节点，跳过执行')
-            continue
+            return
 
         step_start_time = datetime.now()
         logger.info(f'开始执行步骤: {step_name} (顺序: {step_order})')
@@ -1461,7 +2152,7 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
         config = await TushareApiConfigDao.get_config_detail_by_id(session, step_config_id)
         if config is None:
             logger.error(f'步骤 {step_name} 的接口配置ID {step_config_id} 不存在')
-            continue
+            return
 
         # 立即提取 config 的所有属性，避免在 commit 后访问 ORM 对象导致延迟加载
         config_dict = config.__dict__.copy()
@@ -1473,10 +2164,35 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
         config_config_id = config_dict.get('config_id')
         config_data_fields = config_dict.get('data_fields')
         config_primary_key_fields = config_dict.get('primary_key_fields')
+        config_rate_limit = config_dict.get('rate_limit')
+        config_client_mode = config_dict.get('client_mode', '0') or '0'
 
         if config_status != '0':
             logger.warning(f'步骤 {step_name} 的接口配置 {config_api_name} 已停用')
-            continue
+            return
+
+        # 断点续跑：已完成的步骤不再执行，从数据表中恢复结果供后续步骤使用
+        step_key = str(cached_step['step_id'])
+        if step_key in checkpoint['completed_steps']:
+            restored_df = None
+            if task_save_to_db == '1':
+                restored_df = await load_persisted_step_results(
+                    session,
+                    resolve_data_table_name(step_data_table_name, task_data_table_name, config_api_code),
+                    task_task_id,
+                    config_config_id,
+                    download_date,
+                )
+            if restored_df is not None:
+                store_step_result(previous_results, step_name, restored_df, field_references)
+                produced_step_names[step_index] = step_name
+                logger.info(f'步骤 {step_name} 已在断点中完成，跳过执行并从数据表恢复 {len(restored_df)} 条结果')
+                return
+            # 结果未持久化到数据库时无法恢复，重新执行该步骤
+            checkpoint['completed_steps'].remove(step_key)
+            logger.info(f'步骤 {step_name} 已在断点中完成，但结果未保存到数据库，将重新执行')
+
+        step_metrics.api_code = config_api_code
 
         # 解析步骤参数（可以从前一步获取数据）
         base_api_params = {}
@@ -1515,7 +2231,7 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
             
             if not param_combinations:
                 logger.warning(f'步骤 {step_name} 没有有效的参数组合，跳过')
-                continue
+                return
             
             total_combinations = len(param_combinations)
             
@@ -1527,83 +2243,175 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     loop_params_summary[param_name] = {
                         'type': 'loop',
                         'source': source,
-                        'value_count': len([c for c in param_combinations if param_name in c])
+                        'value_count': total_combinations
                     }
             
+            # 步骤并发数（接口调用并发预取窗口大小），受进程级线程池大小限制
+            step_concurrency = max(1, min(cached_step['concurrency'], TushareConfig.tushare_api_max_workers))
+
             logger.info(
                 f'步骤 {step_name} 开启遍历模式，将执行 {total_combinations} 次API调用，'
-                f'遍历参数: {list(loop_params_summary.keys())}'
+                f'遍历参数: {list(loop_params_summary.keys())}，并发数: {step_concurrency}'
             )
             
             # 用于合并所有组合的结果（仅用于后续步骤使用，不用于保存）
             all_dfs = []
             step_total_records = 0
+            # 每个组合的结果到达时按唯一键增量去重，不再在合并后对所有列去重
+            step_deduplicator = StreamingKeyDeduplicator(
+                await resolve_step_dedup_key_fields(
+                    session,
+                    resolve_data_table_name(step_data_table_name, task_data_table_name, config_api_code),
+                    step_unique_key_fields,
+                    config_primary_key_fields,
+                )
+            )
             # 遍历执行统计
             loop_success_count = 0
             loop_fail_count = 0
             loop_skip_count = 0
             loop_execution_details = []  # 记录每个组合的执行详情
-            
+            # 断点续跑：仅结果保存到数据库的步骤可以跳过已提交的组合（结果可从数据表恢复）
+            resume_combos_enabled = task_save_to_db == '1'
+            completed_combo_keys = set(checkpoint['step_combos'].get(step_key, [])) if resume_combos_enabled else set()
+            pending_combo_keys: list[str] = []  # 已执行但尚未提交的组合
+            resumed_combo_count = 0
+            # 流式模式：按批次提交并将步骤结果落盘，内存中只保留当前批次的数据
+            stream_mode = cached_step['stream_mode'] == '1'
+            spilled_result: SpilledStepResult | None = None
+            if stream_mode:
+                if spill_store is None:
+                    spill_store = TushareStepSpillStore(run_id)
+                spilled_result = spill_store.create_step_result()
+            chunk_dfs: list[pd.DataFrame] = []  # 流式模式当前批次的结果
+            commit_interval = (
+                TushareConfig.tushare_stream_chunk_size if stream_mode else TushareConfig.tushare_checkpoint_interval
+            )
+            combos_since_commit = 0
+            # 上次提交以来的组合统计（整个事务回滚时这些组合写入的数据丢失，需要撤销）
+            interval_success_count = 0
+            interval_record_count = 0
+            interval_df_start = len(all_dfs)
+            interval_detail_start = len(loop_execution_details)
+            interval_rolled_back = False
+
             # 对每个参数组合执行步骤
-            for combo_index, combo_params in enumerate(param_combinations, 1):
-                # 清理 combo_params，确保所有值都是基本类型，避免触发 ORM 延迟加载
-                sanitized_combo_params = sanitize_dict_values(combo_params)
-                
-                # 合并基础参数和组合参数
-                api_params = base_api_params.copy()
-                api_params.update(sanitized_combo_params)
-                
-                # 任务参数覆盖步骤参数
-                if task_params_str:
-                    try:
-                        task_params = json.loads(task_params_str)
-                        if isinstance(task_params, dict):
-                            api_params.update(task_params)
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.warning(f'步骤 {step_name} 组合{combo_index} 任务参数解析失败: {e}，将跳过任务参数')
-                
-                # 注意：不再自动添加日期参数，所有参数必须从配置中获取
-                # 如果需要在参数中使用日期，请在接口配置或步骤参数中明确指定
-                
-                # 检查执行条件（可选）- 使用提前提取的值
-                if step_condition_expr:
+            # 接口调用在线程池中并发预取（窗口大小为步骤并发数），数据库写入仍按组合顺序在当前会话中串行执行，
+            # 每个组合使用独立保存点隔离，保证统计结果与执行详情与串行执行一致
+            api_func = resolve_api_func(pro, config_api_code)
+            # 保存到数据库且结果不被后续步骤引用时按目标表做缺口规划
+            planned_table_name = (
+                resolve_data_table_name(step_data_table_name, task_data_table_name, config_api_code)
+                if task_save_to_db == '1' and step_gap_plan_enabled
+                else None
+            )
+            in_flight: deque = deque()
+            combo_iterator = enumerate(param_combinations, 1)
+            combos_exhausted = False
+            while True:
+                # 补充预取窗口
+                while not combos_exhausted and len(in_flight) < step_concurrency:
                     try:
-                        condition = json.loads(step_condition_expr)
-                        should_execute = True
-                        if 'field' in condition and 'value' in condition:
-                            field = condition['field']
-                            expected_value = condition['value']
-                            if field in previous_results:
-                                actual_value = previous_results[field]
-                                if condition.get('operator') == 'eq':
-                                    should_execute = actual_value == expected_value
-                                elif condition.get('operator') == 'ne':
-                                    should_execute = actual_value != expected_value
-                        if not should_execute:
-                            # 降低日志级别，避免遍历模式下产生过多 INFO 日志
-                            logger.debug(f'步骤 {step_name} 组合{combo_index} 不满足执行条件，跳过')
-                            loop_skip_count += 1
-                            # 使用清理后的参数，避免触发 ORM 延迟加载
-                            loop_execution_details.append({
-                                'combo_index': combo_index,
-                                'params': sanitized_combo_params,
-                                'status': 'skipped',
-                                'reason': '不满足执行条件'
-                            })
-                            continue
-                    except (json.JSONDecodeError, Exception) as e:
-                        logger.warning(f'步骤 {step_name} 组合{combo_index} 条件表达式解析失败: {e}，将执行')
-                
+                        combo_index, combo_params = next(combo_iterator)
+                    except StopIteration:
+                        combos_exhausted = True
+                        break
+
+                    # 清理 combo_params，确保所有值都是基本类型，避免触发 ORM 延迟加载
+                    sanitized_combo_params = sanitize_dict_values(combo_params)
+
+                    # 合并基础参数和组合参数
+                    api_params = base_api_params.copy()
+                    api_params.update(sanitized_combo_params)
+
+                    # 任务参数覆盖步骤参数
+                    if task_params_str:
+                        try:
+                            task_params = json.loads(task_params_str)
+                            if isinstance(task_params, dict):
+                                api_params.update(task_params)
+                        except (json.JSONDecodeError, TypeError) as e:
+                            logger.warning(f'步骤 {step_name} 组合{combo_index} 任务参数解析失败: {e}，将跳过任务参数')
+
+                    # 注意：不再自动添加日期参数，所有参数必须从配置中获取
+                    # 如果需要在参数中使用日期，请在接口配置或步骤参数中明确指定
+
+                    # 检查执行条件（可选）- 使用提前提取的值
+                    if step_condition_expr:
+                        try:
+                            condition = json.loads(step_condition_expr)
+                            should_execute = True
+                            if 'field' in condition and 'value' in condition:
+                                field = condition['field']
+                                expected_value = condition['value']
+                                if field in previous_results:
+                                    actual_value = previous_results[field]
+                                    if condition.get('operator') == 'eq':
+                                        should_execute = actual_value == expected_value
+                                    elif condition.get('operator') == 'ne':
+                                        should_execute = actual_value != expected_value
+                            if not should_execute:
+                                # 降低日志级别，避免遍历模式下产生过多 INFO 日志
+                                logger.debug(f'步骤 {step_name} 组合{combo_index} 不满足执行条件，跳过')
+                                loop_skip_count += 1
+                                # 使用清理后的参数，避免触发 ORM 延迟加载
+                                loop_execution_details.append({
+                                    'combo_index': combo_index,
+                                    'params': sanitized_combo_params,
+                                    'status': 'skipped',
+                                    'reason': '不满足执行条件'
+                                })
+                                continue
+                        except (json.JSONDecodeError, Exception) as e:
+                            logger.warning(f'步骤 {step_name} 组合{combo_index} 条件表达式解析失败: {e}，将执行')
+
+                    # 断点续跑：跳过已提交的组合
+                    combo_key = build_combo_key(sanitized_combo_params)
+                    if combo_key in completed_combo_keys:
+                        resumed_combo_count += 1
+                        continue
+
+                    combo_start_time = datetime.now()
+                    # 接口不存在时不预取，由 execute_single_step 统一记录错误
+                    fetch_future = (
+                        asyncio.ensure_future(
+                            fetch_gap_planned_api_data(
+                                session,
+                                planned_table_name,
+                                step_update_mode,
+                                api_func,
+                                api_params,
+                                config_api_code,
+                                config_rate_limit,
+                                cache_stats,
+                                config_client_mode,
+                                step_metrics,
+                            )
+                        )
+                        if api_func
+                        else None
+                    )
+                    in_flight.append(
+                        (combo_index, combo_key, sanitized_combo_params, api_params, combo_start_time, fetch_future)
+                    )
+
+                if not in_flight:
+                    break
+
+                combo_index, combo_key, sanitized_combo_params, api_params, combo_start_time, fetch_future = (
+                    in_flight.popleft()
+                )
+                prefetched_result = await fetch_future if fetch_future is not None else None
+
                 # 执行单次步骤（循环模式下，使用保存点隔离每个组合，先保存数据，最后统一commit）
                 # 使用保存点可以确保某个组合失败时只回滚该组合，不影响其他组合
-                combo_start_time = datetime.now()
-                # 创建保存点，隔离每个组合的事务
                 savepoint = await session.begin_nested()
                 try:
                     # 传递提前提取的 config 和 task 属性，避免在 commit 后访问 ORM 对象
                     # 遍历模式下关闭明细日志，仅依赖后续的步骤级汇总日志
+                    # 遍历过程中会按断点间隔提交事务，config 对象提交后会过期，这里只传递提前提取的属性
                     record_count, df = await execute_single_step(
-                        session, step, config, api_params, task, task_name,
+                        session, step, None, api_params, task, task_name,
                         download_date, pro, previous_results, combo_start_time, combo_index,
                         immediate_commit=False,  # 循环模式下不立即提交，统一在循环结束后提交
                         step_data_table_name=step_data_table_name,
@@ -1616,14 +2424,19 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                         config_config_id=config_config_id,  # 传递提前提取的配置ID
                         config_data_fields=config_data_fields,  # 传递提前提取的数据字段
                         config_primary_key_fields=config_primary_key_fields,  # 传递提前提取的主键字段
+                        config_rate_limit=config_rate_limit,  # 传递提前提取的接口调用上限
+                        config_client_mode=config_client_mode,  # 传递提前提取的接口调用方式
+                        cache_stats=cache_stats,  # 传递运行级缓存命中统计
+                        step_metrics=step_metrics,  # 传递步骤运行指标收集器
                         task_task_id=task_task_id,  # 传递提前提取的任务ID
                         task_save_to_db=task_save_to_db,  # 传递提前提取的是否保存到数据库
                         task_data_table_name=task_data_table_name,  # 传递提前提取的任务数据表名
                         task_save_path=task_save_path,  # 传递提前提取的保存路径
                         task_save_format=task_save_format,  # 传递提前提取的保存格式
                         log_detail=False,  # 关闭组合级明细日志
+                        prefetched_result=prefetched_result,  # 传递并发预取的接口结果
                     )
-                    
+
                     # 提交保存点（但不提交主事务）
                     await savepoint.commit()
                     # 循环模式下不立即提交，统一在循环结束后提交，避免频繁 commit 导致的异步上下文问题
@@ -1638,30 +2451,42 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                         # 如果保存点回滚失败，回滚整个事务
                         try:
                             await session.rollback()
-                            logger.warning(f'步骤 {step_name} 组合{combo_index} 保存点回滚失败，已回滚整个事务，之前成功的组合数据可能丢失')
+                            interval_rolled_back = True
+                            logger.warning(
+                                f'步骤 {step_name} 组合{combo_index} 保存点回滚失败，已回滚整个事务，'
+                                f'上次提交以来成功的组合按失败处理，续跑时重新执行'
+                            )
                         except Exception as full_rollback_error:
                             logger.error(f'步骤 {step_name} 组合{combo_index} 回滚整个事务也失败: {full_rollback_error}')
-                    
+
                     # 异常处理：使用提前提取的 step_name，不访问 step 对象
                     logger.error(f'步骤 {step_name} 组合{combo_index} 执行失败: {step_error}')
                     workflow_failed = True
                     last_error_message = str(step_error)
                     record_count = 0
                     df = None
-                
+
                 # 记录执行结果
                 combo_status = 'success' if df is not None and not df.empty else 'empty'
                 if df is not None and not df.empty:
-                    all_dfs.append(df)
+                    deduplicated_df = step_deduplicator.filter(df)
+                    if not deduplicated_df.empty:
+                        if stream_mode:
+                            chunk_dfs.append(deduplicated_df)
+                        else:
+                            all_dfs.append(deduplicated_df)
                     step_total_records += record_count
                     loop_success_count += 1
+                    interval_success_count += 1
+                    interval_record_count += record_count
                 else:
                     if record_count == 0 and df is None:
                         loop_fail_count += 1
                         combo_status = 'failed'
                     else:
                         loop_success_count += 1  # 空数据也算成功执行
-                
+                        interval_success_count += 1
+
                 # 记录组合执行详情
                 combo_duration = int((datetime.now() - combo_start_time).total_seconds())
                 # 使用清理后的参数，避免触发 ORM 延迟加载
@@ -1672,26 +2497,122 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     'record_count': record_count,
                     'duration': combo_duration
                 })
-            
+
+                # 按断点间隔（流式模式按批次大小）提交已完成的组合，进程中断后可从断点继续执行
+                if resume_combos_enabled and combo_status != 'failed':
+                    pending_combo_keys.append(combo_key)
+                combos_since_commit += 1
+                if combos_since_commit >= commit_interval and (stream_mode or pending_combo_keys):
+                    combos_since_commit = 0
+                    # 流式模式：本批次结果落盘后释放内存
+                    if stream_mode and chunk_dfs:
+                        await spill_step_chunk(spilled_result, chunk_dfs)
+                        chunk_dfs = []
+                    checkpoint['step_combos'][step_key] = list(completed_combo_keys.union(pending_combo_keys))
+                    try:
+                        await save_step_checkpoint(session, run_id, checkpoint, step_key)
+                        await session.commit()
+                        completed_combo_keys.update(pending_combo_keys)
+                        interval_success_count = 0
+                        interval_record_count = 0
+                        interval_df_start = len(all_dfs)
+                        interval_detail_start = len(loop_execution_details)
+                    except Exception as commit_error:
+                        logger.error(f'步骤 {step_name} 提交断点失败: {commit_error}，本批次组合将在续跑时重新执行')
+                        checkpoint['step_combos'][step_key] = list(completed_combo_keys)
+                        workflow_failed = True
+                        last_error_message = str(commit_error)
+                        interval_rolled_back = True
+                        try:
+                            await session.rollback()
+                        except Exception as rollback_error:
+                            logger.warning(f'步骤 {step_name} 回滚事务也失败: {rollback_error}')
+                    pending_combo_keys.clear()
+
+                # 整个事务已回滚（结果保存到数据库时）：撤销上次提交以来的组合，
+                # 避免未写入数据库的组合被记为已完成或计入步骤结果
+                if interval_rolled_back and resume_combos_enabled:
+                    pending_combo_keys.clear()
+                    del all_dfs[interval_df_start:]
+                    chunk_dfs = []
+                    loop_success_count -= interval_success_count
+                    loop_fail_count += interval_success_count
+                    step_total_records -= interval_record_count
+                    for detail in loop_execution_details[interval_detail_start:]:
+                        if detail['status'] in ('success', 'empty'):
+                            detail['status'] = 'failed'
+                            detail['reason'] = '事务回滚，数据未保存'
+                    combos_since_commit = 0
+                    interval_success_count = 0
+                    interval_record_count = 0
+                    interval_detail_start = len(loop_execution_details)
+                interval_rolled_back = False
+
+            # 预取窗口会提前处理跳过的组合，按组合序号排序保证执行详情与并发数无关
+            loop_execution_details.sort(key=lambda detail: detail['combo_index'])
+
             # 计算步骤总耗时
             step_duration = int((datetime.now() - step_start_time).total_seconds())
-            
+            step_metrics.combo_count = total_combinations
+            step_metrics.success_combo_count = loop_success_count
+            step_metrics.fail_combo_count = loop_fail_count
+            step_metrics.skip_combo_count = loop_skip_count + resumed_combo_count
+            step_metrics.failed = loop_fail_count > 0
+
+            # 流式模式：最后一批结果落盘
+            if stream_mode and chunk_dfs:
+                await spill_step_chunk(spilled_result, chunk_dfs)
+                chunk_dfs = []
+
+            # 断点续跑跳过了部分组合时，从数据表恢复完整的步骤结果（包含本次新写入的数据）
+            if resumed_combo_count > 0:
+                logger.info(f'步骤 {step_name} 断点续跑跳过 {resumed_combo_count} 个已完成的组合')
+                restored_df = await load_persisted_step_results(
+                    session,
+                    resolve_data_table_name(step_data_table_name, task_data_table_name, config_api_code),
+                    task_task_id,
+                    config_config_id,
+                    download_date,
+                )
+                if restored_df is not None and not restored_df.empty:
+                    if stream_mode:
+                        spilled_result = spill_store.create_step_result()
+                        await spill_step_chunk(spilled_result, [restored_df])
+                    else:
+                        # 恢复的结果包含本次写入的数据，按唯一键重新去重
+                        all_dfs = [StreamingKeyDeduplicator(step_deduplicator.key_fields).filter(restored_df)]
+
+            # 所有组合都成功时清除组合级断点，记录步骤级断点（与步骤数据在同一事务中提交）；
+            # 有失败的组合时只记录成功的组合，续跑时仅重新执行失败的组合
+            if loop_fail_count == 0:
+                checkpoint['step_combos'].pop(step_key, None)
+                checkpoint['completed_steps'].append(step_key)
+            else:
+                checkpoint['step_combos'][step_key] = list(completed_combo_keys.union(pending_combo_keys))
+            await save_step_checkpoint(session, run_id, checkpoint, step_key)
+
             # 合并所有组合的结果
-            if all_dfs:
+            step_result_count = 0
+            if stream_mode:
+                if spilled_result.row_count > 0:
+                    # 流式模式：后续步骤直接引用落盘结果，按需读取字段
+                    previous_results[step_name] = spilled_result
+                    for key, value in spilled_result.first_record.items():
+                        previous_results[f'{step_name}.{key}'] = value
+                    step_result_count = spilled_result.row_count
+            elif all_dfs:
+                # 各组合结果已按唯一键增量去重
                 combined_df = pd.concat(all_dfs, ignore_index=True)
-                # 去重（如果需要）
-                combined_df = combined_df.drop_duplicates()
-                
+
                 # 保存前一步的结果（供后续步骤使用）
-                previous_results[step_name] = combined_df.to_dict('records')
-                if len(previous_results[step_name]) > 0:
-                    # 保存第一条记录的主要字段，方便条件判断
-                    first_record = previous_results[step_name][0]
-                    for key, value in first_record.items():
-                        previous_results[f'{step_name}.{key}'] = value
-                
+                store_step_result(previous_results, step_name, combined_df, field_references)
+                step_result_count = len(combined_df)
+                del combined_df
+            all_dfs = []
+
+            if step_result_count > 0:
                 # 更新前一步步骤名，用于支持 previous_step 占位符
-                previous_step_name = step_name
+                produced_step_names[step_index] = step_name
                 
                 total_record_count += step_total_records
                 
@@ -1702,7 +2623,9 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     f'成功={loop_success_count}, '
                     f'失败={loop_fail_count}, '
                     f'跳过={loop_skip_count}, '
-                    f'总记录数={len(combined_df)}, '
+                    f'断点跳过={resumed_combo_count}, '
+                    f'重复记录={step_deduplicator.duplicate_count}, '
+                    f'总记录数={step_result_count}, '
                     f'总耗时={step_duration}秒'
                 )
                 logger.info(loop_summary_message)
@@ -1716,7 +2639,10 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     'success_count': loop_success_count,
                     'fail_count': loop_fail_count,
                     'skip_count': loop_skip_count,
-                    'total_records': len(combined_df),
+                    'resumed_count': resumed_combo_count,
+                    'duplicate_count': step_deduplicator.duplicate_count,
+                    'dedup_key_fields': step_deduplicator.key_fields,
+                    'total_records': step_result_count,
                     'loop_params': loop_params_summary,
                     'execution_details': trimmed_execution_details,
                 }
@@ -1733,7 +2659,7 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     config_id=config_config_id,
                     api_name=config_api_name,
                     download_date=download_date,
-                    record_count=len(combined_df),
+                    record_count=step_result_count,
                     file_path=None,
                     status='0' if loop_fail_count == 0 else '1',
                     error_message=loop_summary_json,  # 始终保存精简后的汇总信息
@@ -1749,6 +2675,9 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     logger.debug(f'步骤 {step_name} 遍历模式执行完成并已统一提交（共 {total_combinations} 个组合），准备执行下一个步骤')
                 except Exception as commit_error:
                     logger.error(f'步骤 {step_name} 遍历模式提交事务失败: {commit_error}，将跳过 commit 继续执行')
+                    if step_key in checkpoint['completed_steps']:
+                        checkpoint['completed_steps'].remove(step_key)
+                    checkpoint['step_combos'][step_key] = list(completed_combo_keys)
                     try:
                         await session.rollback()
                     except Exception as rollback_error:
@@ -1764,6 +2693,8 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     f'成功={loop_success_count}, '
                     f'失败={loop_fail_count}, '
                     f'跳过={loop_skip_count}, '
+                    f'断点跳过={resumed_combo_count}, '
+                    f'重复记录={step_deduplicator.duplicate_count}, '
                     f'总记录数=0, '
                     f'总耗时={step_duration}秒'
                 )
@@ -1778,6 +2709,9 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     'success_count': loop_success_count,
                     'fail_count': loop_fail_count,
                     'skip_count': loop_skip_count,
+                    'resumed_count': resumed_combo_count,
+                    'duplicate_count': step_deduplicator.duplicate_count,
+                    'dedup_key_fields': step_deduplicator.key_fields,
                     'total_records': 0,
                     'loop_params': loop_params_summary,
                     'execution_details': trimmed_execution_details,
@@ -1811,6 +2745,9 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     logger.debug(f'步骤 {step_name} 遍历模式执行完成并已统一提交（无数据，共 {total_combinations} 个组合），准备执行下一个步骤')
                 except Exception as commit_error:
                     logger.error(f'步骤 {step_name} 遍历模式提交事务失败: {commit_error}，将跳过 commit 继续执行')
+                    if step_key in checkpoint['completed_steps']:
+                        checkpoint['completed_steps'].remove(step_key)
+                    checkpoint['step_combos'][step_key] = list(completed_combo_keys)
                     try:
                         await session.rollback()
                     except Exception as rollback_error:
@@ -1865,7 +2802,7 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                                 should_execute = actual_value != expected_value
                     if not should_execute:
                         logger.info(f'步骤 {step_name} 不满足执行条件，跳过')
-                        continue
+                        return
                 except (json.JSONDecodeError, Exception) as e:
                     logger.warning(f'步骤 {step_name} 条件表达式解析失败: {e}，将执行')
             
@@ -1885,6 +2822,11 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                 config_config_id=config_config_id,  # 传递提前提取的配置ID
                 config_data_fields=config_data_fields,  # 传递提前提取的数据字段
                 config_primary_key_fields=config_primary_key_fields,  # 传递提前提取的主键字段
+                config_rate_limit=config_rate_limit,  # 传递提前提取的接口调用上限
+                config_client_mode=config_client_mode,  # 传递提前提取的接口调用方式
+                cache_stats=cache_stats,  # 传递运行级缓存命中统计
+                step_metrics=step_metrics,  # 传递步骤运行指标收集器
+                gap_plan_enabled=step_gap_plan_enabled,  # 结果被后续步骤引用时不做缺口规划
                 task_task_id=task_task_id,  # 传递提前提取的任务ID
                 task_save_to_db=task_save_to_db,  # 传递提前提取的是否保存到数据库
                 task_data_table_name=task_data_table_name,  # 传递提前提取的任务数据表名
@@ -1892,17 +2834,16 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                 task_save_format=task_save_format  # 传递提前提取的保存格式
             )
             
+            step_metrics.combo_count = 1
+            step_metrics.success_combo_count = 0 if df is None else 1
+            step_metrics.fail_combo_count = 1 if df is None else 0
+            step_metrics.failed = df is None
             if df is not None and not df.empty:
                 # 保存前一步的结果（供后续步骤使用）
-                previous_results[step_name] = df.to_dict('records')
-                if len(previous_results[step_name]) > 0:
-                    # 保存第一条记录的主要字段，方便条件判断
-                    first_record = previous_results[step_name][0]
-                    for key, value in first_record.items():
-                        previous_results[f'{step_name}.{key}'] = value
+                store_step_result(previous_results, step_name, df, field_references)
                 
                 # 更新前一步步骤名，用于支持 previous_step 占位符
-                previous_step_name = step_name
+                produced_step_names[step_index] = step_name
                 
                 total_record_count += record_count
             else:
@@ -1911,6 +2852,11 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                     workflow_failed = True
                     last_error_message = f'步骤 {step_name} 执行失败或未返回数据'
             
+            # 步骤执行成功时记录步骤级断点（与步骤数据在同一事务中提交）
+            if df is not None:
+                checkpoint['completed_steps'].append(step_key)
+                await save_step_checkpoint(session, run_id, checkpoint, step_key)
+
             # 步骤执行完成后立即 commit，然后再执行下一个步骤
             # 注意：commit 失败时不抛出异常，只记录错误并继续执行
             try:
@@ -1918,12 +2864,50 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
                 logger.debug(f'步骤 {step_name} 执行完成并已提交，准备执行下一个步骤')
             except Exception as commit_error:
                 logger.error(f'步骤 {step_name} 提交事务失败: {commit_error}，将跳过 commit 继续执行')
+                if step_key in checkpoint['completed_steps']:
+                    checkpoint['completed_steps'].remove(step_key)
                 try:
                     await session.rollback()
                 except Exception as rollback_error:
                     logger.warning(f'步骤 {step_name} 回滚事务也失败: {rollback_error}')
                 # 继续执行下一个步骤，不抛出异常
 
+    max_parallel_steps = max(1, TushareConfig.tushare_workflow_max_parallel_steps)
+    if max_parallel_steps == 1:
+        # 按顺序执行每个步骤
+        for step_index in range(len(step_cache)):
+            await run_step(step_index, session)
+    else:
+        # 先提交运行状态，分支会话只写入各自步骤的断点行，不再更新运行记录，不会等待主会话持有的行锁
+        await session.commit()
+        branch_session_factory = async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)
+
+        async def run_branch_step(step_index: int) -> None:
+            async with branch_session_factory() as branch_session:
+                await run_step(step_index, branch_session)
+
+        # 依赖的步骤全部完成后即可开始执行，同时执行的步骤数不超过 max_parallel_steps
+        pending_steps = set(range(len(step_cache)))
+        finished_steps: set[int] = set()
+        running_steps: dict[asyncio.Future, int] = {}
+        branch_error: BaseException | None = None
+        while pending_steps or running_steps:
+            if branch_error is None:
+                ready_steps = sorted(index for index in pending_steps if step_dependencies[index] <= finished_steps)
+                for step_index in ready_steps[: max_parallel_steps - len(running_steps)]:
+                    pending_steps.discard(step_index)
+                    running_steps[asyncio.ensure_future(run_branch_step(step_index))] = step_index
+            if not running_steps:
+                break
+            done_futures, _ = await asyncio.wait(running_steps.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for future in done_futures:
+                finished_steps.add(running_steps.pop(future))
+                if future.exception() is not None and branch_error is None:
+                    # 分支异常时不再启动新的步骤，等待正在执行的步骤结束后抛出
+                    branch_error = future.exception()
+        if branch_error is not None:
+            raise branch_error
+
     # 计算总执行时长
     duration = int((datetime.now() - start_time).total_seconds())
 
@@ -1940,6 +2924,8 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
         success_records=total_record_count if not workflow_failed else 0,
         fail_records=0 if not workflow_failed else 1,
         error_message=last_error_message,
+        cache_hits=cache_stats['hits'],
+        cache_misses=cache_stats['misses'],
         set_end_time=True,
     )
 
@@ -1958,23 +2944,33 @@ async def execute_workflow(session: AsyncSession, task, download_date: str, task
             }
         await TushareDownloadTaskDao.edit_task_dao(session, task_task_id, update_stats_dict)
 
+    if not workflow_failed:
+        # 运行成功后不再需要续跑，清理步骤断点
+        await TushareDownloadRunCheckpointDao.delete_run_checkpoints(session, run_id)
     await session.commit()
+    if spill_store is not None:
+        spill_store.cleanup()
     logger.info(
         f'流程任务 {task_name} 执行{"失败" if workflow_failed else "完成"}，'
         f'总记录数: {total_record_count}, 总耗时: {duration}秒'
     )
+    return not workflow_failed
 
 
-async def download_tushare_data(task_id: int, download_date: str | None = None, session: AsyncSession | None = None) -> None:
+async def download_tushare_data(
+    task_id: int, download_date: str | None = None, session: AsyncSession | None = None, resume: bool = False
+) -> None:
     """
     下载Tushare数据的异步任务函数
 
     :param task_id: 任务ID
     :param download_date: 下载日期（YYYYMMDD格式），如果为None则使用当前日期
     :param session: 可选的数据库会话，如果为None则创建新会话
-    :return: None
+    :param resume: 是否从最近一次失败或中断的运行断点继续执行（仅流程任务支持）
+    :return: None（执行失败时抛出异常，供任务执行队列和定时任务记录失败状态）
     """
     start_time = datetime.now()
+    succeeded = True
     task = None
     config = None
     log = None
@@ -2018,18 +3014,35 @@ async def download_tushare_data(task_id: int, download_date: str | None = None,
             if download_date is None:
                 download_date = datetime.now().strftime('%Y%m%d')
 
+            # 预先加载交易日历，供参数中的 tday 表达式和缺口规划使用
+            await TradeCalendar.ensure_loaded(session)
+
             # 如果任务有流程配置ID，执行流程；否则执行单个接口
             if task_workflow_id:
-                await execute_workflow(session, task, download_date, task_params_str)
+                succeeded = await execute_workflow(session, task, download_date, task_params_str, resume=resume)
             else:
-                await execute_single_api(session, task, download_date)
+                if resume:
+                    logger.info(f'任务 {task_name} 为单接口任务，不支持断点续跑，将重新执行')
+                succeeded = await execute_single_api(session, task, download_date)
 
-            logger.info(f'任务 {task_name} 执行完成')
+            if succeeded:
+                logger.info(f'任务 {task_name} 执行完成')
         finally:
             # 如果使用的是外部会话，不关闭它；否则关闭内部创建的会话
             if session_context is not None:
                 await session_context.__aexit__(None, None, None)
 
+    except asyncio.CancelledError:
+        # 任务被取消（服务停止、工作进程退出等）时把未结束的运行记录标记为失败（保留断点，可以续跑），再继续传播取消
+        logger.warning(f'任务 {task_name if task_name else task_id} 被取消')
+        if session is not None:
+            try:
+                async with async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)() as cancel_session:
+                    await TushareDownloadRunDao.fail_unfinished_runs(cancel_session, task_id, '任务已取消')
+                    await cancel_session.commit()
+            except Exception as cancel_error:
+                logger.warning(f'标记被取消任务的运行记录失败: {cancel_error}')
+        raise
     except Exception as e:
         # 获取完整的异常堆栈信息
         error_traceback = traceback.format_exc()
@@ -2103,7 +3116,8 @@ async def download_tushare_data(task_id: int, download_date: str | None = None,
                     # 如果使用当前会话失败，尝试创建新会话记录日志
                     logger.warning(f'使用当前会话记录错误日志失败: {session_error}')
                     try:
-                        async with AsyncSessionLocal() as new_session:
+                        # 新会话使用当前会话的引擎（后台任务运行时的连接池与事件循环绑定）
+                        async with async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)() as new_session:
                             if task_name and config_id and api_name:
                                 duration = int((datetime.now() - start_time).total_seconds())
                                 log = TushareDownloadLog(
@@ -2129,60 +3143,25 @@ async def download_tushare_data(task_id: int, download_date: str | None = None,
         except Exception as log_error:
             logger.exception(f'记录错误日志失败: {log_error}')
             logger.error(f'记录错误日志异常堆栈:\n{traceback.format_exc()}')
+        # 记录完成后继续抛出，由调用方（任务执行队列、定时任务）记录失败状态
+        raise
+
+    if not succeeded:
+        # 失败已记录到运行记录和下载日志，这里抛出异常使调用方记录失败状态
+        raise RuntimeError(f'任务 {task_name if task_name else task_id} 执行失败，详见运行记录和下载日志')
 
 
-def download_tushare_data_sync(task_id: int, download_date: str | None = None) -> None:
+def download_tushare_data_sync(task_id: int, download_date: str | None = None, resume: bool = False) -> None:
     """
     下载Tushare数据的同步任务函数（用于定时任务调度）
-    在新线程中创建新的事件循环和数据库连接
+    提交到后台任务运行时执行（共享事件循环和连接池），并等待执行完成
 
     :param task_id: 任务ID
     :param download_date: 下载日期（YYYYMMDD格式），如果为None则使用当前日期
+    :param resume: 是否从最近一次失败或中断的运行断点继续执行
     :return: None
     """
-    import asyncio
-    from urllib.parse import quote_plus
-    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-    from config.env import DataBaseConfig
-    
-    # 在新线程中创建新的事件循环
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        # 在新线程中创建新的数据库引擎和会话
-        # 这样可以避免事件循环冲突
-        async_db_url = (
-            f'mysql+asyncmy://{DataBaseConfig.db_username}:{quote_plus(DataBaseConfig.db_password)}@'
-            f'{DataBaseConfig.db_host}:{DataBaseConfig.db_port}/{DataBaseConfig.db_database}'
-        )
-        if DataBaseConfig.db_type == 'postgresql':
-            async_db_url = (
-                f'postgresql+asyncpg://{DataBaseConfig.db_username}:{quote_plus(DataBaseConfig.db_password)}@'
-                f'{DataBaseConfig.db_host}:{DataBaseConfig.db_port}/{DataBaseConfig.db_database}'
-            )
-        
-        # 创建新的引擎，绑定到当前线程的事件循环
-        thread_engine = create_async_engine(
-            async_db_url,
-            echo=DataBaseConfig.db_echo,
-            max_overflow=DataBaseConfig.db_max_overflow,
-            pool_size=DataBaseConfig.db_pool_size,
-            pool_recycle=DataBaseConfig.db_pool_recycle,
-            pool_timeout=DataBaseConfig.db_pool_timeout,
-        )
-        ThreadSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=thread_engine)
-        
-        # 使用新会话运行下载任务
-        async def download_with_new_session():
-            async with ThreadSessionLocal() as session:
-                await download_tushare_data(task_id, download_date, session=session)
-        
-        # 运行异步函数
-        loop.run_until_complete(download_with_new_session())
-        
-        # 清理引擎
-        loop.run_until_complete(thread_engine.dispose())
-    finally:
-        # 清理事件循环
-        loop.close()
+    WorkerUtil.run_job(
+        f'tushare_task_{task_id}',
+        lambda session: download_tushare_data(task_id, download_date, session=session, resume=resume),
+    )
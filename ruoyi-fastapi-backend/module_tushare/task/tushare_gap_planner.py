@@ -0,0 +1,176 @@
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.env import DataBaseConfig, TushareConfig
+from module_tushare.dao.tushare_schema_registry import COMPACT_DATE_PATTERN, TushareSchemaRegistry
+from module_tushare.task.tushare_trade_calendar import TradeCalendar
+from utils.log_util import logger
+
+# 覆盖范围判断使用的日期列和代码列（与行情表的 (ts_code, trade_date) 复合索引一致）
+GAP_DATE_COLUMN = 'trade_date'
+GAP_CODE_COLUMN = 'ts_code'
+# 影响返回数据内容的接口参数（如 pro_bar 的复权方式、频率、资产类别），参数有值时覆盖范围按同名列过滤
+GAP_FILTER_PARAMS = ('adj', 'freq', 'asset')
+
+
+def build_gap_ranges(open_dates: list[str], covered_dates: set[str]) -> list[tuple[str, str]]:
+    """
+    根据交易日历和已有数据计算缺失的日期区间（按交易日连续合并，得到最少的区间数）
+
+    :param open_dates: 升序排列的交易日列表
+    :param covered_dates: 已有数据的交易日集合
+    :return: 缺失区间列表 [(开始日期, 结束日期)]
+    """
+    gap_ranges: list[tuple[str, str]] = []
+    gap_start = gap_end = None
+    for trade_date in open_dates:
+        if trade_date in covered_dates:
+            if gap_start is not None:
+                gap_ranges.append((gap_start, gap_end))
+                gap_start = gap_end = None
+            continue
+        if gap_start is None:
+            gap_start = trade_date
+        gap_end = trade_date
+    if gap_start is not None:
+        gap_ranges.append((gap_start, gap_end))
+    return gap_ranges
+
+
+class TushareGapPlanner:
+    """
+    增量下载缺口规划
+
+    对按日期区间下载的接口（如 daily、pro_bar），下载前查询目标表中已有的 (ts_code, trade_date)，
+    与交易日历比对后把任务参数的 start_date/end_date 改写为最少的缺失区间，已有数据的交易日不再请求接口：
+    - 默认关闭（tushare_gap_planner_enabled），规划后只返回缺失区间的数据，结果被后续步骤引用的步骤不做规划
+    - 只处理包含 start_date、end_date 和单个 ts_code、不包含 trade_date 的参数（全市场数据无法按交易日判断是否完整）
+    - adj、freq、asset 等参数有值时按目标表的同名列过滤覆盖范围，目标表没有该列时不做规划
+    - 覆盖范围查询只读取 ts_code、trade_date 两列，可以直接使用行情表的复合索引
+    - 目标表不存在、没有 ts_code/trade_date 列或交易日历不可用时不做规划，按原参数下载
+    - 更新模式为 UPSERT/DELETE_INSERT 时需要刷新已有数据，不做规划
+    """
+
+    @classmethod
+    def get_planned_apis(cls) -> set[str]:
+        """
+        获取启用缺口规划的接口代码
+
+        :return: 接口代码集合
+        """
+        return {item.strip() for item in (TushareConfig.tushare_gap_planner_apis or '').split(',') if item.strip()}
+
+    @classmethod
+    def is_applicable(cls, api_code: str, api_params: dict[str, Any], update_mode: str = '0') -> bool:
+        """
+        判断接口参数是否可以做缺口规划
+
+        :param api_code: 接口代码
+        :param api_params: 接口参数
+        :param update_mode: 更新模式
+        :return: 是否可以规划
+        """
+        if not TushareConfig.tushare_gap_planner_enabled or api_code not in cls.get_planned_apis():
+            return False
+        if update_mode in ('2', '3') or api_params.get(GAP_DATE_COLUMN):
+            return False
+        ts_code = str(api_params.get(GAP_CODE_COLUMN) or '').strip()
+        if not ts_code or ',' in ts_code:
+            return False
+        start_date = str(api_params.get('start_date') or '')
+        end_date = str(api_params.get('end_date') or '')
+        return bool(COMPACT_DATE_PATTERN.match(start_date) and COMPACT_DATE_PATTERN.match(end_date)) and (
+            start_date <= end_date
+        )
+
+    @classmethod
+    async def plan_gap_params(
+        cls, db: AsyncSession, table_name: str, api_code: str, api_params: dict[str, Any], update_mode: str = '0'
+    ) -> list[dict[str, Any]] | None:
+        """
+        把接口参数改写为缺失区间对应的参数列表
+
+        :param db: 数据库会话
+        :param table_name: 目标数据表名
+        :param api_code: 接口代码
+        :param api_params: 接口参数
+        :param update_mode: 更新模式
+        :return: 缺失区间的参数列表（空列表表示数据已完整，无需请求接口），None 表示不做规划
+        """
+        if not cls.is_applicable(api_code, api_params, update_mode):
+            return None
+        schema = await TushareSchemaRegistry.get_table_schema(db, table_name)
+        if not schema.exists or GAP_DATE_COLUMN not in schema.columns or GAP_CODE_COLUMN not in schema.columns:
+            return None
+        filters = {name: str(api_params[name]) for name in GAP_FILTER_PARAMS if api_params.get(name)}
+        if any(name not in schema.columns for name in filters):
+            # 表中没有区分这些参数的列，无法判断已有数据是否对应同一组参数
+            return None
+
+        start_date = str(api_params['start_date'])
+        end_date = str(api_params['end_date'])
+        open_dates = None
+        if await TradeCalendar.ensure_loaded(db):
+            open_dates = TradeCalendar.get_trade_dates(start_date, end_date)
+        if open_dates is None:
+            logger.warning(f'交易日历不可用或未覆盖 {start_date}~{end_date}，跳过缺口规划')
+            return None
+
+        ts_code = str(api_params[GAP_CODE_COLUMN]).strip()
+        covered_dates = await cls._load_covered_dates(db, table_name, start_date, end_date, ts_code, filters)
+        gap_ranges = build_gap_ranges(open_dates, covered_dates)
+
+        gap_params = [{**api_params, 'start_date': gap_start, 'end_date': gap_end} for gap_start, gap_end in gap_ranges]
+        logger.info(
+            f'接口 {api_code} 缺口规划：{start_date}~{end_date} 共 {len(open_dates)} 个交易日，'
+            f'已有 {len(covered_dates)} 个，改写为 {len(gap_ranges)} 个区间: {gap_ranges}'
+        )
+        return gap_params
+
+    @classmethod
+    def _quote(cls, name: str) -> str:
+        """
+        按数据库类型转义标识符
+
+        :param name: 表名或列名
+        :return: 转义后的标识符
+        """
+        return f'"{name}"' if DataBaseConfig.db_type == 'postgresql' else f'`{name}`'
+
+    @classmethod
+    async def _load_covered_dates(
+        cls,
+        db: AsyncSession,
+        table_name: str,
+        start_date: str,
+        end_date: str,
+        ts_code: str,
+        filters: dict[str, str],
+    ) -> set[str]:
+        """
+        查询目标表中某个代码在日期区间内已有数据的交易日（只读取索引列）
+
+        :param db: 数据库会话
+        :param table_name: 目标数据表名
+        :param start_date: 开始日期
+        :param end_date: 结束日期
+        :param ts_code: 股票代码
+        :param filters: 额外的过滤条件（列名 -> 参数值，如 adj、freq、asset）
+        :return: 已有数据的交易日集合
+        """
+        date_column = cls._quote(GAP_DATE_COLUMN)
+        params = {'start_date': start_date, 'end_date': end_date, 'ts_code': ts_code}
+        conditions = [f'{cls._quote(GAP_CODE_COLUMN)} = :ts_code']
+        for index, (column, value) in enumerate(filters.items()):
+            conditions.append(f'{cls._quote(column)} = :filter_{index}')
+            params[f'filter_{index}'] = value
+        conditions.append(f'{date_column} BETWEEN :start_date AND :end_date')
+        rows = (
+            await db.execute(
+                text(f'SELECT DISTINCT {date_column} FROM {cls._quote(table_name)} WHERE {" AND ".join(conditions)}'),
+                params,
+            )
+        ).all()
+        return {str(row[0]) for row in rows}
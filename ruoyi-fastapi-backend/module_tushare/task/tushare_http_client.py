@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import weakref
+from typing import Any
+
+import httpx
+import pandas as pd
+
+from config.env import TushareConfig
+from utils.log_util import logger
+
+# 只能通过 SDK 调用的辅助接口（在 SDK 内部组合多个接口或使用其他数据源），异步客户端模式下回退到线程池
+SDK_ONLY_APIS = frozenset({'pro_bar', 'realtime_quote', 'realtime_tick', 'realtime_list'})
+
+
+class TushareHttpClient:
+    """
+    Tushare HTTP 协议的异步客户端
+
+    直接向 {TUSHARE_HTTP_URL}/{api_name} POST api_name/token/params/fields，
+    基于带连接池的 httpx.AsyncClient（保持长连接，启用 HTTP/2），不占用线程池。
+    httpx 的客户端绑定事件循环，每个事件循环（如后台任务线程）使用独立的客户端
+    """
+
+    _lock = threading.Lock()
+    _clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def supports(cls, api_code: str) -> bool:
+        """
+        接口是否可以通过 HTTP 协议直接调用
+
+        :param api_code: 接口代码
+        :return: 是否支持
+        """
+        return api_code not in SDK_ONLY_APIS
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """
+        获取当前事件循环的客户端（首次使用时创建）
+
+        :return: httpx.AsyncClient
+        """
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            client = cls._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    http2=True,
+                    timeout=httpx.Timeout(TushareConfig.tushare_http_timeout),
+                    limits=httpx.Limits(
+                        max_connections=TushareConfig.tushare_http_max_connections,
+                        max_keepalive_connections=TushareConfig.tushare_http_max_connections,
+                    ),
+                )
+                cls._clients[loop] = client
+        return client
+
+    @classmethod
+    async def query(cls, api_name: str, token: str, params: dict | None = None, fields: Any = '') -> pd.DataFrame:
+        """
+        调用Tushare接口
+
+        :param api_name: 接口名称
+        :param token: Tushare token
+        :param params: 接口参数（其中的 fields 会作为返回字段）
+        :param fields: 返回字段（逗号分隔或列表）
+        :return: 接口数据
+        """
+        request_params = dict(params or {})
+        fields = request_params.pop('fields', fields)
+        if isinstance(fields, (list, tuple)):
+            fields = ','.join(str(field) for field in fields)
+        payload = {'api_name': api_name, 'token': token, 'params': request_params, 'fields': fields or ''}
+        response = await cls._get_client().post(
+            f'{TushareConfig.tushare_http_url.rstrip("/")}/{api_name}', json=payload
+        )
+        response.raise_for_status()
+        result = response.json()
+        # 与 SDK 一致：code 不为 0 时以接口返回的消息抛出异常（配额超限判断依赖该消息）
+        if result.get('code') != 0:
+            raise Exception(result.get('msg'))
+        data = result.get('data') or {}
+        return pd.DataFrame(data.get('items') or [], columns=data.get('fields') or [])
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        关闭当前事件循环的客户端（事件循环结束前调用）
+
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            client = cls._clients.pop(loop, None)
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f'关闭Tushare异步客户端失败: {e}')
@@ -0,0 +1,142 @@
+import threading
+import time
+
+from config.env import TushareConfig
+from utils.log_util import logger
+
+
+class TushareTokenBucket:
+    """
+    单个 token + 接口代码 维度的令牌桶
+    """
+
+    def __init__(self, rate_per_minute: int) -> None:
+        self.rate_per_minute = max(1, int(rate_per_minute))
+        # 自适应系数：触发限流错误后降低速率，调用成功后逐步恢复
+        self.factor = 1.0
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        # 触发限流错误后的冷却截止时间
+        self.blocked_until = 0.0
+        self.consecutive_errors = 0
+
+    @property
+    def effective_rate(self) -> float:
+        """
+        当前生效的速率（次/秒）
+        """
+        return self.rate_per_minute * self.factor / 60
+
+    @property
+    def capacity(self) -> int:
+        """
+        令牌桶容量（允许的突发调用数，约为10秒的配额）
+        """
+        return max(1, int(self.rate_per_minute * self.factor / 6))
+
+    def reserve(self, now: float) -> float:
+        """
+        预占一个令牌
+
+        :param now: 当前单调时间
+        :return: 调用前需要等待的秒数
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(float(self.capacity), self.tokens + elapsed * self.effective_rate)
+        self.updated_at = now
+        self.tokens -= 1
+        wait_seconds = -self.tokens / self.effective_rate if self.tokens < 0 else 0.0
+        return max(wait_seconds, self.blocked_until - now)
+
+
+class TushareRateLimiter:
+    """
+    进程级Tushare接口限流器
+
+    按 token + 接口代码 维度维护令牌桶，所有下载路径（定时任务线程、手动执行线程、遍历并发预取）共享同一份状态
+    """
+
+    _lock = threading.Lock()
+    _buckets: dict[tuple[str, str], TushareTokenBucket] = {}
+
+    # Tushare 返回的配额超限错误关键字
+    QUOTA_ERROR_KEYWORDS = ('每分钟最多访问', '每小时最多访问', '每天最多访问', '访问频率', '频繁')
+
+    @classmethod
+    def _get_bucket(cls, token: str, api_code: str, rate_per_minute: int | None) -> TushareTokenBucket:
+        rate = rate_per_minute or TushareConfig.tushare_rate_limit
+        key = (token, api_code)
+        bucket = cls._buckets.get(key)
+        if bucket is None:
+            bucket = TushareTokenBucket(rate)
+            cls._buckets[key] = bucket
+        elif bucket.rate_per_minute != rate:
+            # 接口配额被修改后立即生效
+            bucket.rate_per_minute = max(1, int(rate))
+        return bucket
+
+    @classmethod
+    def reserve(cls, token: str, api_code: str, rate_per_minute: int | None = None) -> float:
+        """
+        预占一次接口调用配额
+
+        :param token: Tushare token
+        :param api_code: 接口代码
+        :param rate_per_minute: 接口每分钟调用次数上限，为空则使用全局默认值
+        :return: 调用前需要等待的秒数
+        """
+        with cls._lock:
+            return cls._get_bucket(token, api_code, rate_per_minute).reserve(time.monotonic())
+
+    @classmethod
+    def report_success(cls, token: str, api_code: str) -> None:
+        """
+        记录一次成功调用，逐步恢复被降低的速率
+
+        :param token: Tushare token
+        :param api_code: 接口代码
+        :return: None
+        """
+        with cls._lock:
+            bucket = cls._buckets.get((token, api_code))
+            if bucket is not None:
+                bucket.consecutive_errors = 0
+                if bucket.factor < 1.0:
+                    bucket.factor = min(1.0, bucket.factor + 0.05)
+
+    @classmethod
+    def report_quota_error(cls, token: str, api_code: str) -> float:
+        """
+        记录一次配额超限错误，降低速率并进入冷却
+
+        :param token: Tushare token
+        :param api_code: 接口代码
+        :return: 本次退避的秒数
+        """
+        with cls._lock:
+            bucket = cls._buckets.get((token, api_code)) or cls._get_bucket(token, api_code, None)
+            bucket.consecutive_errors += 1
+            bucket.factor = max(0.1, bucket.factor * 0.5)
+            backoff_seconds = min(
+                TushareConfig.tushare_rate_limit_max_backoff,
+                TushareConfig.tushare_rate_limit_backoff * (2 ** (bucket.consecutive_errors - 1)),
+            )
+            now = time.monotonic()
+            bucket.blocked_until = max(bucket.blocked_until, now + backoff_seconds)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.updated_at = now
+        logger.warning(
+            f'接口 {api_code} 触发Tushare配额限制，速率降低为 {bucket.effective_rate * 60:.1f} 次/分钟，退避 {backoff_seconds} 秒'
+        )
+        return backoff_seconds
+
+    @classmethod
+    def is_quota_error(cls, error: Exception) -> bool:
+        """
+        判断异常是否为Tushare配额超限错误
+
+        :param error: 接口调用异常
+        :return: 是否为配额超限错误
+        """
+        message = str(error)
+        return any(keyword in message for keyword in cls.QUOTA_ERROR_KEYWORDS)
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+import pandas as pd
+
+from config.env import TushareConfig
+from utils.log_util import logger
+
+
+class TushareResponseCache:
+    """
+    Tushare接口响应磁盘缓存
+
+    每个 (api_code, params) 对应缓存目录下的一个 Parquet 文件：
+    - 请求参数中包含已收盘的历史日期（如 trade_date/end_date 早于今天）时，响应视为不可变，永久缓存
+    - 其他响应视为可变，按 TTL 过期
+    - 缓存总大小超过上限时按最近访问时间淘汰（LRU）
+    """
+
+    _lock = threading.Lock()
+    # 缓存索引：缓存键 -> {'api_code': 接口代码, 'file_name': 文件名, 'size': 字节数, 'last_access': 最近访问时间, 'expire_at': 过期时间}
+    _index: dict[str, dict[str, Any]] | None = None
+    _total_size = 0
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        缓存是否已开启
+
+        :return: 是否开启
+        """
+        return TushareConfig.tushare_cache_enabled
+
+    @classmethod
+    def build_key(cls, api_code: str, params: dict) -> str:
+        """
+        生成缓存键
+
+        :param api_code: 接口代码
+        :param params: 接口参数
+        :return: 缓存键
+        """
+        raw = json.dumps({'api_code': api_code, 'params': params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def is_immutable(cls, api_code: str, params: dict) -> bool:
+        """
+        判断请求的响应是否不可变（参数中的日期均为已收盘的历史日期）
+
+        :param api_code: 接口代码
+        :param params: 接口参数
+        :return: 是否不可变
+        """
+        if api_code in cls._split_setting(TushareConfig.tushare_cache_mutable_apis):
+            return False
+        today = datetime.now().strftime('%Y%m%d')
+        matched = False
+        for param_name in cls._split_setting(TushareConfig.tushare_cache_immutable_params):
+            value = params.get(param_name)
+            if value in (None, ''):
+                continue
+            value_str = str(value).replace('-', '')[:8]
+            if not value_str.isdigit() or value_str >= today:
+                return False
+            matched = True
+        # 只有起始日期没有结束日期的区间请求会随时间增长，不能视为不可变
+        if 'start_date' in params and params.get('start_date') and not params.get('end_date'):
+            return False
+        return matched
+
+    @classmethod
+    def get(cls, api_code: str, params: dict) -> pd.DataFrame | None:
+        """
+        读取缓存（阻塞IO，应在线程池中调用）
+
+        :param api_code: 接口代码
+        :param params: 接口参数
+        :return: 缓存的 DataFrame，未命中时返回 None
+        """
+        if not cls.is_enabled():
+            return None
+        key = cls.build_key(api_code, params)
+        cache_dir = cls._ensure_index()
+        now = time.time()
+        with cls._lock:
+            entry = cls._index.get(key)
+            if entry is None:
+                return None
+            if entry['expire_at'] is not None and entry['expire_at'] < now:
+                cls._remove_entry(cache_dir, key)
+                return None
+            entry['last_access'] = now
+            file_path = os.path.join(cache_dir, api_code, entry['file_name'])
+        try:
+            df = pd.read_parquet(file_path)
+            # 更新文件修改时间，重启后重建索引时作为最近访问时间
+            os.utime(file_path, (now, now))
+            return df
+        except Exception as e:
+            logger.warning(f'读取接口 {api_code} 缓存失败: {e}')
+            with cls._lock:
+                cls._remove_entry(cache_dir, key)
+            return None
+
+    @classmethod
+    def put(cls, api_code: str, params: dict, df: pd.DataFrame | None) -> None:
+        """
+        写入缓存（阻塞IO，应在线程池中调用）
+
+        :param api_code: 接口代码
+        :param params: 接口参数
+        :param df: 接口返回的 DataFrame
+        :return: None
+        """
+        if df is None or not cls.is_enabled():
+            return
+        immutable = cls.is_immutable(api_code, params)
+        if not immutable and TushareConfig.tushare_cache_ttl <= 0:
+            return
+        key = cls.build_key(api_code, params)
+        expire_at = None if immutable else int(time.time()) + TushareConfig.tushare_cache_ttl
+        file_name = f'{key}.i.parquet' if immutable else f'{key}.m{expire_at}.parquet'
+        cache_dir = cls._ensure_index()
+        api_dir = os.path.join(cache_dir, api_code)
+        try:
+            os.makedirs(api_dir, exist_ok=True)
+            tmp_path = os.path.join(api_dir, f'{file_name}.{threading.get_ident()}.tmp')
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, os.path.join(api_dir, file_name))
+            size = os.path.getsize(os.path.join(api_dir, file_name))
+        except Exception as e:
+            logger.warning(f'写入接口 {api_code} 缓存失败: {e}')
+            return
+        with cls._lock:
+            # 同一请求的旧缓存直接替换
+            previous = cls._index.get(key)
+            if previous and previous['file_name'] != file_name:
+                cls._remove_entry(cache_dir, key)
+            elif previous:
+                cls._total_size -= previous['size']
+            cls._index[key] = {
+                'api_code': api_code,
+                'file_name': file_name,
+                'size': size,
+                'last_access': time.time(),
+                'expire_at': expire_at,
+            }
+            cls._total_size += size
+            cls._evict(cache_dir)
+
+    @classmethod
+    def _ensure_index(cls) -> str:
+        """
+        首次使用时扫描缓存目录构建索引
+
+        :return: 缓存目录
+        """
+        cache_dir = TushareConfig.tushare_cache_dir
+        if cls._index is not None:
+            return cache_dir
+        with cls._lock:
+            if cls._index is not None:
+                return cache_dir
+            index: dict[str, dict[str, Any]] = {}
+            total_size = 0
+            if os.path.isdir(cache_dir):
+                for api_code in os.listdir(cache_dir):
+                    api_dir = os.path.join(cache_dir, api_code)
+                    if not os.path.isdir(api_dir):
+                        continue
+                    for file_name in os.listdir(api_dir):
+                        file_path = os.path.join(api_dir, file_name)
+                        if file_name.endswith('.tmp'):
+                            # 清理异常退出遗留的临时文件
+                            os.remove(file_path)
+                            continue
+                        if not file_name.endswith('.parquet'):
+                            continue
+                        stat = os.stat(file_path)
+                        index[file_name.split('.')[0]] = {
+                            'api_code': api_code,
+                            'file_name': file_name,
+                            'size': stat.st_size,
+                            'last_access': stat.st_mtime,
+                            'expire_at': cls._parse_expire_at(file_name),
+                        }
+                        total_size += stat.st_size
+            cls._index = index
+            cls._total_size = total_size
+        return cache_dir
+
+    @classmethod
+    def _evict(cls, cache_dir: str) -> None:
+        """
+        缓存总大小超过上限时，按最近访问时间淘汰到上限的90%（调用方需持有锁）
+
+        :param cache_dir: 缓存目录
+        :return: None
+        """
+        max_size = TushareConfig.tushare_cache_max_size_mb * 1024 * 1024
+        if cls._total_size <= max_size:
+            return
+        target_size = int(max_size * 0.9)
+        evicted_count = 0
+        for key, _ in sorted(cls._index.items(), key=lambda item: item[1]['last_access']):
+            if cls._total_size <= target_size:
+                break
+            cls._remove_entry(cache_dir, key)
+            evicted_count += 1
+        logger.info(f'Tushare接口响应缓存超过上限，已淘汰 {evicted_count} 个缓存文件')
+
+    @classmethod
+    def _remove_entry(cls, cache_dir: str, key: str) -> None:
+        """
+        删除缓存文件及索引（调用方需持有锁）
+
+        :param cache_dir: 缓存目录
+        :param key: 缓存键
+        :return: None
+        """
+        entry = cls._index.pop(key, None)
+        if entry is None:
+            return
+        cls._total_size -= entry['size']
+        try:
+            os.remove(os.path.join(cache_dir, entry['api_code'], entry['file_name']))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _parse_expire_at(file_name: str) -> int | None:
+        """
+        从可变缓存文件名中解析过期时间
+
+        :param file_name: 缓存文件名
+        :return: 过期时间戳，不可变缓存返回 None
+        """
+        marker = file_name.split('.')[1]
+        if marker.startswith('m') and marker[1:].isdigit():
+            return int(marker[1:])
+        return None
+
+    @staticmethod
+    def _split_setting(value: str) -> list[str]:
+        """
+        解析逗号分隔的配置项
+
+        :param value: 配置值
+        :return: 配置项列表
+        """
+        return [item.strip() for item in (value or '').split(',') if item.strip()]
@@ -0,0 +1,95 @@
+import time
+from datetime import datetime
+
+from module_tushare.entity.do.tushare_do import TushareDownloadRunMetric
+
+
+class TushareStepMetrics:
+    """
+    单个步骤（或单接口任务）一次运行的指标收集器
+
+    接口调用和数据库写入处累加耗时，步骤结束后转换为运行指标表的一行。
+    同一步骤的并发预取协程运行在同一个事件循环中，累加无需加锁
+    """
+
+    def __init__(
+        self,
+        run_id: int,
+        task_id: int,
+        step_id: int | None = None,
+        step_name: str | None = None,
+        step_order: int | None = None,
+    ) -> None:
+        self.run_id = run_id
+        self.task_id = task_id
+        self.step_id = step_id
+        self.step_name = step_name
+        self.step_order = step_order
+        # 接口代码在读取接口配置后设置，为空表示步骤未执行（停用、开始/结束节点或断点跳过），不记录指标
+        self.api_code = ''
+        self.failed = False
+        self.combo_count = 0
+        self.success_combo_count = 0
+        self.fail_combo_count = 0
+        self.skip_combo_count = 0
+        self.api_call_count = 0
+        self.api_wait_seconds = 0.0
+        self.db_write_seconds = 0.0
+        self.row_count = 0
+        self.started_at = time.perf_counter()
+
+    def add_api_wait(self, seconds: float) -> None:
+        """
+        累加一次接口调用的等待耗时（包含限流等待和重试）
+
+        :param seconds: 耗时（秒）
+        :return: None
+        """
+        self.api_call_count += 1
+        self.api_wait_seconds += seconds
+
+    def add_db_write(self, seconds: float) -> None:
+        """
+        累加一次数据库写入耗时
+
+        :param seconds: 耗时（秒）
+        :return: None
+        """
+        self.db_write_seconds += seconds
+
+    def add_rows(self, row_count: int) -> None:
+        """
+        累加获取的记录数
+
+        :param row_count: 记录数
+        :return: None
+        """
+        self.row_count += row_count
+
+    def to_metric(self) -> TushareDownloadRunMetric:
+        """
+        转换为运行指标表对象
+
+        :return: 运行指标对象
+        """
+        duration_seconds = time.perf_counter() - self.started_at
+        return TushareDownloadRunMetric(
+            run_id=self.run_id,
+            task_id=self.task_id,
+            step_id=self.step_id,
+            step_name=self.step_name,
+            step_order=self.step_order,
+            api_code=self.api_code,
+            status='1' if self.failed else '0',
+            combo_count=self.combo_count,
+            success_combo_count=self.success_combo_count,
+            fail_combo_count=self.fail_combo_count,
+            skip_combo_count=self.skip_combo_count,
+            api_call_count=self.api_call_count,
+            api_wait_ms=int(self.api_wait_seconds * 1000),
+            db_write_ms=int(self.db_write_seconds * 1000),
+            row_count=self.row_count,
+            duration_ms=int(duration_seconds * 1000),
+            rows_per_sec=round(self.row_count / duration_seconds, 2) if duration_seconds > 0 else 0.0,
+            create_time=datetime.now(),
+        )
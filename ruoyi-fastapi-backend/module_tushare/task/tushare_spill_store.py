@@ -0,0 +1,99 @@
+import os
+import shutil
+from typing import Any
+
+import pandas as pd
+
+from config.env import TushareConfig
+from module_tushare.task.tushare_step_result import deduplicate_values
+from utils.log_util import logger
+
+
+class SpilledStepResult:
+    """
+    落盘的步骤结果
+
+    流式模式下步骤输出按批次写入列式临时文件（Parquet），不在内存中保留完整结果，
+    后续步骤只按需读取引用到的字段
+    """
+
+    def __init__(self, step_dir: str) -> None:
+        self.step_dir = step_dir
+        self.part_count = 0
+        self.row_count = 0
+        self.columns: list[str] = []
+        self.first_record: dict[str, Any] | None = None
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def append(self, df: pd.DataFrame) -> None:
+        """
+        追加一批结果（阻塞IO，应在线程池中调用）
+
+        :param df: 结果数据
+        :return: None
+        """
+        if df is None or df.empty:
+            return
+        os.makedirs(self.step_dir, exist_ok=True)
+        df.to_parquet(os.path.join(self.step_dir, f'part-{self.part_count:06d}.parquet'), index=False)
+        self.part_count += 1
+        self.row_count += len(df)
+        for column in df.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+        if self.first_record is None:
+            self.first_record = df.head(1).to_dict('records')[0]
+
+    def read_column_values(self, field: str) -> list[Any]:
+        """
+        读取某个字段的所有不重复值（保持首次出现的顺序，只加载该字段）
+
+        :param field: 字段名
+        :return: 字段值列表
+        """
+        if field not in self.columns:
+            return []
+        values: list[Any] = []
+        for part_index in range(self.part_count):
+            part_path = os.path.join(self.step_dir, f'part-{part_index:06d}.parquet')
+            try:
+                part_df = pd.read_parquet(part_path, columns=[field])
+            except Exception as e:
+                # 不同批次的字段可能不一致，缺少该字段的批次直接跳过
+                logger.debug(f'读取落盘结果 {part_path} 的字段 {field} 失败: {e}')
+                continue
+            values.extend(deduplicate_values(part_df[field].dropna().tolist()))
+        return deduplicate_values(values)
+
+
+class TushareStepSpillStore:
+    """
+    流程运行级的步骤结果临时存储
+
+    每次运行使用独立目录，运行结束后删除
+    """
+
+    def __init__(self, run_id: int) -> None:
+        self.run_dir = os.path.join(TushareConfig.tushare_spill_dir, f'run_{run_id}')
+        # 同一运行记录断点续跑时，清理上次中断遗留的临时文件
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        self._step_count = 0
+
+    def create_step_result(self) -> SpilledStepResult:
+        """
+        为步骤创建落盘结果
+
+        :return: 落盘结果
+        """
+        self._step_count += 1
+        return SpilledStepResult(os.path.join(self.run_dir, f'step_{self._step_count}'))
+
+    def cleanup(self) -> None:
+        """
+        删除本次运行的所有临时文件
+
+        :return: None
+        """
+        shutil.rmtree(self.run_dir, ignore_errors=True)
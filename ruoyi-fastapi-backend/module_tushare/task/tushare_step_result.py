@@ -0,0 +1,121 @@
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def deduplicate_values(values: Iterable[Any]) -> list[Any]:
+    """
+    哈希去重并保持首次出现的顺序（不可哈希的值退化为线性查找）
+
+    :param values: 待去重的值
+    :return: 去重后的值列表
+    """
+    seen: dict[Any, None] = {}
+    unhashable_values: list[Any] = []
+    result = []
+    for value in values:
+        try:
+            if value in seen:
+                continue
+            seen[value] = None
+        except TypeError:
+            if value in unhashable_values:
+                continue
+            unhashable_values.append(value)
+        result.append(value)
+    return result
+
+
+class ColumnarStepResult:
+    """
+    按列存储的步骤结果
+
+    只保留后续步骤参数引用到的字段（每个字段一个数组），其余字段只保留第一条记录，供变量参数和执行条件使用
+    """
+
+    def __init__(
+        self, data: dict[str, list[Any]], row_count: int, columns: list[str], first_record: dict[str, Any] | None
+    ) -> None:
+        self.data = data
+        self.row_count = row_count
+        self.columns = columns
+        self.first_record = first_record
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, fields: set[str]) -> 'ColumnarStepResult':
+        """
+        从 DataFrame 构建按列存储的步骤结果
+
+        :param df: 步骤结果
+        :param fields: 需要保留的字段
+        :return: 按列存储的步骤结果
+        """
+        first_record = df.head(1).to_dict('records')[0] if not df.empty else None
+        data = {field: df[field].tolist() for field in fields if field in df.columns}
+        return cls(data, len(df), list(df.columns), first_record)
+
+    def read_column_values(self, field: str) -> list[Any]:
+        """
+        读取某个字段的所有不重复值（保持首次出现的顺序）
+
+        :param field: 字段名
+        :return: 字段值列表
+        """
+        return deduplicate_values(self.data.get(field, []))
+
+
+class StreamingKeyDeduplicator:
+    """
+    遍历步骤结果的增量去重
+
+    每个组合的结果到达时只对唯一键字段计算 64 位行哈希，过滤掉已出现过的键，不再在全部结果合并后对所有列去重：
+    - 已出现的哈希保存在有序的 uint64 数组中，新哈希先放入集合，集合超过数组大小时合并，内存约为每个键 8 字节
+    - 唯一键字段为空或结果中缺少唯一键字段时，按整行计算哈希
+    """
+
+    # 新哈希集合合并到有序数组的最小阈值
+    MERGE_THRESHOLD = 65536
+
+    def __init__(self, key_fields: list[str] | None = None) -> None:
+        self.key_fields = list(key_fields or [])
+        self.duplicate_count = 0
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._pending: set[int] = set()
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        过滤掉键已出现过的行（包括同一批结果内部的重复行）
+
+        :param df: 组合结果
+        :return: 去重后的结果
+        """
+        if df is None or df.empty:
+            return df
+        use_key_fields = bool(self.key_fields) and all(field in df.columns for field in self.key_fields)
+        key_df = df[self.key_fields] if use_key_fields else df
+        hashes = pd.util.hash_pandas_object(key_df, index=False).to_numpy(dtype=np.uint64)
+
+        keep_mask = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            positions = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            keep_mask &= self._seen[positions] != hashes
+        if self._pending:
+            keep_mask &= np.fromiter(
+                (int(value) not in self._pending for value in hashes), dtype=bool, count=len(hashes)
+            )
+
+        self._pending.update(int(value) for value in hashes[keep_mask])
+        if len(self._pending) >= max(self.MERGE_THRESHOLD, len(self._seen)):
+            self._seen = np.union1d(self._seen, np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending)))
+            self._pending.clear()
+
+        duplicate_count = len(df) - int(keep_mask.sum())
+        if duplicate_count == 0:
+            return df
+        self.duplicate_count += duplicate_count
+        return df[keep_mask]
@@ -0,0 +1,234 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.env import DataBaseConfig, TushareConfig
+from module_tushare.dao.tushare_schema_registry import TushareSchemaRegistry
+from utils.log_util import logger
+
+# 交易日历缓存有效期（秒），trade_cal 下载完成后会立即标记为过期
+CALENDAR_CACHE_TTL = 3600
+# 交易日历按交易所存储，统一使用上交所日历
+CALENDAR_EXCHANGE = 'SSE'
+
+
+class TradeCalendar:
+    """
+    进程级交易日历缓存
+
+    从 trade_cal 接口下载的交易日历表加载上交所的交易日，保存为升序数组，
+    并为日历范围内的每个自然日预先计算其在数组中的位置，前后第 N 个交易日的查询均为 O(1)：
+    - 下载任务和因子计算开始前调用 ensure_loaded 加载（超过有效期或被标记过期时重新加载）
+    - trade_cal 数据保存到数据库后调用 mark_stale，下次使用前重新加载
+    - 日期超出日历范围时返回 None，由调用方回退到原有逻辑
+    """
+
+    _lock = threading.Lock()
+    # 升序排列的交易日（YYYYMMDD）
+    _trade_dates: list[str] = []
+    # 自然日 -> 不早于该日的第一个交易日在 _trade_dates 中的位置
+    _ceil_positions: dict[str, int] = {}
+    _open_dates: frozenset[str] = frozenset()
+    _loaded_at: float | None = None
+    _stale = False
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        """
+        交易日历是否已加载
+
+        :return: 是否已加载
+        """
+        return bool(cls._trade_dates)
+
+    @classmethod
+    def mark_stale(cls) -> None:
+        """
+        标记交易日历过期（交易日历表更新后调用），下次 ensure_loaded 时重新加载
+
+        :return: None
+        """
+        with cls._lock:
+            cls._stale = True
+
+    @classmethod
+    async def ensure_loaded(cls, db: AsyncSession) -> bool:
+        """
+        确保交易日历已加载且未过期
+
+        :param db: 数据库会话
+        :return: 交易日历是否可用
+        """
+        with cls._lock:
+            fresh = (
+                cls._loaded_at is not None and not cls._stale and time.monotonic() - cls._loaded_at < CALENDAR_CACHE_TTL
+            )
+        if fresh:
+            return cls.is_loaded()
+        try:
+            await cls.load(db)
+        except Exception as e:
+            logger.warning(f'加载交易日历失败: {e}')
+        return cls.is_loaded()
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> None:
+        """
+        从交易日历表加载交易日
+
+        :param db: 数据库会话
+        :return: None
+        """
+        calendar_table = TushareConfig.tushare_trade_cal_table
+        schema = await TushareSchemaRegistry.get_table_schema(db, calendar_table)
+        if not schema.exists or not {'cal_date', 'is_open'} <= set(schema.columns):
+            logger.warning(f'交易日历表 {calendar_table} 不存在或缺少 cal_date/is_open 列，交易日历不可用')
+            with cls._lock:
+                cls._loaded_at = time.monotonic()
+                cls._stale = False
+            return
+
+        quote = cls._quote
+        exchange_condition = f"AND {quote('exchange')} = '{CALENDAR_EXCHANGE}'" if 'exchange' in schema.columns else ''
+        rows = (
+            await db.execute(
+                text(
+                    f'SELECT DISTINCT {quote("cal_date")} FROM {quote(calendar_table)} '
+                    f"WHERE CAST({quote('is_open')} AS CHAR(1)) = '1' {exchange_condition} "
+                    f'ORDER BY {quote("cal_date")}'
+                )
+            )
+        ).all()
+        trade_dates = [str(row[0]) for row in rows]
+        ceil_positions = cls._build_ceil_positions(trade_dates)
+        with cls._lock:
+            cls._trade_dates = trade_dates
+            cls._ceil_positions = ceil_positions
+            cls._open_dates = frozenset(trade_dates)
+            cls._loaded_at = time.monotonic()
+            cls._stale = False
+        if trade_dates:
+            logger.info(f'交易日历加载完成：{trade_dates[0]}~{trade_dates[-1]}，共 {len(trade_dates)} 个交易日')
+
+    @classmethod
+    def is_trade_date(cls, date_str: str) -> bool:
+        """
+        是否为交易日
+
+        :param date_str: 日期（YYYYMMDD）
+        :return: 是否为交易日
+        """
+        return date_str in cls._open_dates
+
+    @classmethod
+    def offset_trade_date(cls, date_str: str, offset: int = 0) -> str | None:
+        """
+        以不晚于指定日期的最近一个交易日为基准，向前或向后偏移 N 个交易日
+
+        :param date_str: 日期（YYYYMMDD）
+        :param offset: 偏移的交易日数（负数向前，0 表示不晚于该日的最近交易日）
+        :return: 交易日，超出日历范围时为 None
+        """
+        trade_dates, ceil_positions = cls._trade_dates, cls._ceil_positions
+        position = ceil_positions.get(date_str)
+        if position is None:
+            return None
+        floor_position = position if date_str in cls._open_dates else position - 1
+        return cls._date_at(trade_dates, floor_position + offset)
+
+    @classmethod
+    def next_trade_date(cls, date_str: str, n: int = 1) -> str | None:
+        """
+        获取指定日期之后的第 N 个交易日
+
+        :param date_str: 日期（YYYYMMDD）
+        :param n: 交易日数
+        :return: 交易日，超出日历范围时为 None
+        """
+        trade_dates, ceil_positions = cls._trade_dates, cls._ceil_positions
+        position = ceil_positions.get(date_str)
+        if position is None:
+            return None
+        if date_str in cls._open_dates:
+            position += 1
+        return cls._date_at(trade_dates, position + n - 1)
+
+    @classmethod
+    def prev_trade_date(cls, date_str: str, n: int = 1) -> str | None:
+        """
+        获取指定日期之前的第 N 个交易日
+
+        :param date_str: 日期（YYYYMMDD）
+        :param n: 交易日数
+        :return: 交易日，超出日历范围时为 None
+        """
+        position = cls._ceil_positions.get(date_str)
+        if position is None:
+            return None
+        return cls._date_at(cls._trade_dates, position - n)
+
+    @classmethod
+    def get_trade_dates(cls, start_date: str, end_date: str) -> list[str] | None:
+        """
+        获取日期区间内的交易日（包含首尾）
+
+        :param start_date: 开始日期（YYYYMMDD）
+        :param end_date: 结束日期（YYYYMMDD）
+        :return: 升序排列的交易日列表，区间超出日历范围时为 None
+        """
+        trade_dates, ceil_positions = cls._trade_dates, cls._ceil_positions
+        start_position = ceil_positions.get(start_date)
+        end_position = ceil_positions.get(end_date)
+        if start_position is None or end_position is None:
+            return None
+        if end_date in cls._open_dates:
+            end_position += 1
+        return trade_dates[start_position:end_position]
+
+    @classmethod
+    def _date_at(cls, trade_dates: list[str], position: int) -> str | None:
+        """
+        获取数组指定位置的交易日
+
+        :param trade_dates: 交易日数组
+        :param position: 位置
+        :return: 交易日，越界时为 None
+        """
+        if 0 <= position < len(trade_dates):
+            return trade_dates[position]
+        return None
+
+    @classmethod
+    def _build_ceil_positions(cls, trade_dates: list[str]) -> dict[str, int]:
+        """
+        为日历范围内的每个自然日计算不早于该日的第一个交易日的位置
+
+        :param trade_dates: 升序排列的交易日
+        :return: 自然日 -> 位置
+        """
+        ceil_positions: dict[str, int] = {}
+        if not trade_dates:
+            return ceil_positions
+        current = datetime.strptime(trade_dates[0], '%Y%m%d')
+        last = datetime.strptime(trade_dates[-1], '%Y%m%d')
+        position = 0
+        while current <= last:
+            day = current.strftime('%Y%m%d')
+            if trade_dates[position] < day:
+                position += 1
+            ceil_positions[day] = position
+            current += timedelta(days=1)
+        return ceil_positions
+
+    @classmethod
+    def _quote(cls, name: str) -> str:
+        """
+        按数据库类型转义标识符
+
+        :param name: 表名或列名
+        :return: 转义后的标识符
+        """
+        return f'"{name}"' if DataBaseConfig.db_type == 'postgresql' else f'`{name}`'
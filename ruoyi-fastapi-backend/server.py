@@ -8,8 +8,10 @@ from fastapi.responses import HTMLResponse
 from common.router import auto_register_routers
 from config.env import AppConfig
 from config.get_db import init_create_table
+from config.get_job_queue import JobQueueUtil
 from config.get_redis import RedisUtil
 from config.get_scheduler import SchedulerUtil
+from config.get_worker import WorkerUtil
 from exceptions.handle import handle_exception
 from middlewares.handle import handle_middleware
 from sub_applications.handle import handle_sub_applications
@@ -26,11 +28,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.redis = await RedisUtil.create_redis_pool()
     await RedisUtil.init_sys_dict(app.state.redis)
     await RedisUtil.init_sys_config(app.state.redis)
+    WorkerUtil.init_background_worker()
     await SchedulerUtil.init_system_scheduler()
+    await JobQueueUtil.init_job_queue()
     logger.info(f'🚀 {AppConfig.app_name}启动成功')
     yield
     await RedisUtil.close_redis_pool(app)
     await SchedulerUtil.close_system_scheduler()
+    await JobQueueUtil.close_job_queue()
+    await WorkerUtil.close_background_worker()
 
 
 def setup_docs_static_resources(
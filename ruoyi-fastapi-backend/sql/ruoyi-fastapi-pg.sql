@@ -963,6 +963,49 @@ comment on column gen_table_column.update_by is '更新者';
 comment on column gen_table_column.update_time is '更新时间';
 comment on table gen_table_column is '代码生成业务表字段';
 
+-- ----------------------------
+-- 20、任务执行队列表
+-- ----------------------------
+drop table if exists sys_job_queue;
+create table sys_job_queue (
+    queue_id bigserial not null,
+    queue_name varchar(64) not null,
+    task_id bigint not null,
+    job_name varchar(200) default '',
+    invoke_target varchar(500) not null,
+    job_kwargs varchar(2000) default '',
+    priority integer default 0,
+    status char(1) default '0',
+    dedup_key varchar(128) default null,
+    error_message varchar(2000) default '',
+    create_by varchar(64) default '',
+    create_time timestamp(0),
+    start_time timestamp(0),
+    end_time timestamp(0),
+    worker_id varchar(128) default null,
+    heartbeat_time timestamp(0),
+    primary key (queue_id),
+    constraint uk_sys_job_queue_dedup_key unique (dedup_key)
+);
+create index idx_sys_job_queue_qs on sys_job_queue(queue_name, status);
+comment on column sys_job_queue.queue_id is '队列任务ID';
+comment on column sys_job_queue.queue_name is '队列名称';
+comment on column sys_job_queue.task_id is '业务任务ID';
+comment on column sys_job_queue.job_name is '任务名称';
+comment on column sys_job_queue.invoke_target is '调用目标字符串';
+comment on column sys_job_queue.job_kwargs is '关键字参数（JSON格式）';
+comment on column sys_job_queue.priority is '优先级（数值越大越先执行）';
+comment on column sys_job_queue.status is '状态（0等待 1运行中 2成功 3失败 4已取消）';
+comment on column sys_job_queue.dedup_key is '去重键（等待或运行中时为 队列名称:业务任务ID，结束后清空）';
+comment on column sys_job_queue.error_message is '错误信息';
+comment on column sys_job_queue.create_by is '创建者';
+comment on column sys_job_queue.create_time is '创建时间';
+comment on column sys_job_queue.start_time is '开始执行时间';
+comment on column sys_job_queue.end_time is '结束时间';
+comment on column sys_job_queue.worker_id is '执行实例标识（主机名:进程号）';
+comment on column sys_job_queue.heartbeat_time is '执行实例心跳时间';
+comment on table sys_job_queue is '任务执行队列表';
+
 CREATE OR REPLACE FUNCTION "find_in_set"(int8, varchar)
     RETURNS "pg_catalog"."bool" AS $BODY$
 DECLARE
@@ -713,4 +713,31 @@ create table gen_table_column (
   update_by         varchar(64)     default ''                 comment '更新者',
   update_time       datetime                                   comment '更新时间',
   primary key (column_id)
-) engine=innodb auto_increment=1 comment = '代码生成业务表字段';
\ No newline at end of file
+) engine=innodb auto_increment=1 comment = '代码生成业务表字段';
+
+
+-- ----------------------------
+-- 20、任务执行队列表
+-- ----------------------------
+drop table if exists sys_job_queue;
+create table sys_job_queue (
+  queue_id            bigint(20)     not null auto_increment    comment '队列任务ID',
+  queue_name          varchar(64)    not null                   comment '队列名称',
+  task_id             bigint(20)     not null                   comment '业务任务ID',
+  job_name            varchar(200)   default ''                 comment '任务名称',
+  invoke_target       varchar(500)   not null                   comment '调用目标字符串',
+  job_kwargs          varchar(2000)  default ''                 comment '关键字参数（JSON格式）',
+  priority            int(11)        default 0                  comment '优先级（数值越大越先执行）',
+  status              char(1)        default '0'                comment '状态（0等待 1运行中 2成功 3失败 4已取消）',
+  dedup_key           varchar(128)   default null               comment '去重键（等待或运行中时为 队列名称:业务任务ID，结束后清空）',
+  error_message       varchar(2000)  default ''                 comment '错误信息',
+  create_by           varchar(64)    default ''                 comment '创建者',
+  create_time         datetime                                  comment '创建时间',
+  start_time          datetime                                  comment '开始执行时间',
+  end_time            datetime                                  comment '结束时间',
+  worker_id           varchar(128)   default null               comment '执行实例标识（主机名:进程号）',
+  heartbeat_time      datetime                                  comment '执行实例心跳时间',
+  primary key (queue_id),
+  unique key uk_sys_job_queue_dedup_key (dedup_key),
+  key idx_sys_job_queue_qs (queue_name, status)
+) engine=innodb auto_increment=1 comment = '任务执行队列表';
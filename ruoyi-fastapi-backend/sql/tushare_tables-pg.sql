@@ -14,6 +14,8 @@ create table tushare_api_config (
   api_params          text,
   data_fields         text,
   primary_key_fields  text,
+  rate_limit          integer,
+  client_mode         char(1)        default '0',
   status              char(1)        default '0',
   create_by           varchar(64)     default '',
   create_time         timestamp(0),
@@ -30,6 +32,8 @@ comment on column tushare_api_config.api_desc is '接口描述';
 comment on column tushare_api_config.api_params is '接口参数（JSON格式）';
 comment on column tushare_api_config.data_fields is '数据字段（JSON格式，用于指定需要下载的字段）';
 comment on column tushare_api_config.primary_key_fields is '主键字段配置（JSON格式，为空则使用默认data_id主键）';
+comment on column tushare_api_config.rate_limit is '每分钟调用次数上限（为空则使用全局默认配额）';
+comment on column tushare_api_config.client_mode is '调用方式（0 SDK 1 异步HTTP客户端）';
 comment on column tushare_api_config.status is '状态（0正常 1停用）';
 comment on column tushare_api_config.create_by is '创建者';
 comment on column tushare_api_config.create_time is '创建时间';
@@ -83,7 +87,7 @@ comment on column tushare_download_task.start_date is '开始日期（YYYYMMDD
 comment on column tushare_download_task.end_date is '结束日期（YYYYMMDD）';
 comment on column tushare_download_task.task_params is '任务参数（JSON格式，覆盖接口默认参数）';
 comment on column tushare_download_task.save_path is '保存路径';
-comment on column tushare_download_task.save_format is '保存格式（csv/excel/json）';
+comment on column tushare_download_task.save_format is '保存格式（csv/excel/json/parquet）';
 comment on column tushare_download_task.save_to_db is '是否保存到数据库（0否 1是）';
 comment on column tushare_download_task.data_table_name is '数据存储表名（为空则使用默认表tushare_data）';
 comment on column tushare_download_task.status is '状态（0正常 1暂停）';
@@ -215,6 +219,8 @@ create table tushare_workflow_step (
   loop_mode            char(1)        default '0',
   update_mode          char(1)        default '0',
   unique_key_fields    text,
+  concurrency          integer        default 1,
+  stream_mode          char(1)        default '0',
   status               char(1)        default '0',
   create_by            varchar(64)    default '',
   create_time          timestamp(0),
@@ -243,6 +249,8 @@ comment on column tushare_workflow_step.data_table_name is '数据存储表名
 comment on column tushare_workflow_step.loop_mode is '遍历模式（0否 1是，开启后所有变量参数都会遍历）';
 comment on column tushare_workflow_step.update_mode is '数据更新方式（0仅插入 1忽略重复 2存在则更新 3先删除再插入）';
 comment on column tushare_workflow_step.unique_key_fields is '唯一键字段配置（JSON格式，为空则自动检测）';
+comment on column tushare_workflow_step.concurrency is '遍历并发数（遍历模式下同时调用接口的组合数，1为串行）';
+comment on column tushare_workflow_step.stream_mode is '流式模式（0否 1是，遍历结果按批次提交并落盘，不在内存中保留完整结果）';
 comment on column tushare_workflow_step.status is '状态（0正常 1停用）';
 comment on column tushare_workflow_step.create_by is '创建者';
 comment on column tushare_workflow_step.create_time is '创建时间';
@@ -250,3 +258,72 @@ comment on column tushare_workflow_step.update_by is '更新者';
 comment on column tushare_workflow_step.update_time is '更新时间';
 comment on column tushare_workflow_step.remark is '备注信息';
 comment on table tushare_workflow_step is 'Tushare流程步骤表';
+
+-- ----------------------------
+-- Tushare下载任务运行表（运行总览，应用启动时也会自动创建，已存在时不重建）
+-- ----------------------------
+create table if not exists tushare_download_run (
+  run_id               bigserial      not null,
+  task_id              bigint         not null,
+  task_name            varchar(100)   not null,
+  status               varchar(20)    not null,
+  start_time           timestamp(0),
+  end_time             timestamp(0),
+  progress             integer        default 0,
+  total_records        integer        default 0,
+  success_records      integer        default 0,
+  fail_records         integer        default 0,
+  error_message        text,
+  create_time          timestamp(0),
+  update_time          timestamp(0),
+  primary key (run_id)
+);
+comment on column tushare_download_run.run_id is '运行ID';
+comment on column tushare_download_run.task_id is '任务ID';
+comment on column tushare_download_run.task_name is '任务名称快照';
+comment on column tushare_download_run.status is '运行状态（PENDING/RUNNING/SUCCESS/FAILED/CANCELED/TIMEOUT）';
+comment on column tushare_download_run.start_time is '开始时间';
+comment on column tushare_download_run.end_time is '结束时间';
+comment on column tushare_download_run.progress is '进度（0-100）';
+comment on column tushare_download_run.total_records is '本次处理总记录数';
+comment on column tushare_download_run.success_records is '成功记录数';
+comment on column tushare_download_run.fail_records is '失败记录数';
+comment on column tushare_download_run.error_message is '错误信息';
+comment on column tushare_download_run.create_time is '创建时间';
+comment on column tushare_download_run.update_time is '更新时间';
+comment on table tushare_download_run is 'Tushare下载任务运行表（运行总览）';
+
+-- ----------------------------
+-- 扩展下载任务运行表，添加接口响应缓存统计字段
+-- ----------------------------
+alter table tushare_download_run add column if not exists cache_hits integer default 0;
+alter table tushare_download_run add column if not exists cache_misses integer default 0;
+comment on column tushare_download_run.cache_hits is '接口响应缓存命中次数';
+comment on column tushare_download_run.cache_misses is '接口响应缓存未命中次数';
+
+-- ----------------------------
+-- 扩展下载任务运行表，添加断点续跑字段
+-- ----------------------------
+alter table tushare_download_run add column if not exists checkpoint text;
+comment on column tushare_download_run.checkpoint is '断点信息（JSON格式，记录已完成并提交的步骤及参数组合）';
+
+-- ----------------------------
+-- Tushare下载运行步骤断点表（每次运行的每个步骤一条，与步骤数据在同一事务中提交）
+-- ----------------------------
+create table if not exists tushare_download_run_checkpoint (
+  checkpoint_id        bigserial      not null,
+  run_id               bigint         not null,
+  step_key             varchar(64)    not null,
+  completed            char(1)        default '0',
+  combo_keys           text,
+  update_time          timestamp(0),
+  primary key (checkpoint_id)
+);
+create unique index if not exists uk_tushare_run_checkpoint_step on tushare_download_run_checkpoint(run_id, step_key);
+comment on column tushare_download_run_checkpoint.checkpoint_id is '断点ID';
+comment on column tushare_download_run_checkpoint.run_id is '运行ID';
+comment on column tushare_download_run_checkpoint.step_key is '步骤键（步骤ID）';
+comment on column tushare_download_run_checkpoint.completed is '步骤是否已完成（0否 1是）';
+comment on column tushare_download_run_checkpoint.combo_keys is '已提交的参数组合键（JSON数组，步骤未完成时记录）';
+comment on column tushare_download_run_checkpoint.update_time is '更新时间';
+comment on table tushare_download_run_checkpoint is 'Tushare下载运行步骤断点表';
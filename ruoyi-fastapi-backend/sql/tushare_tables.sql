@@ -175,3 +175,73 @@ alter table tushare_workflow_step add column data_table_name varchar(100) commen
 alter table tushare_workflow_step add column loop_mode char(1) default '0' comment '遍历模式（0否 1是，开启后所有变量参数都会遍历）';
 alter table tushare_workflow_step add column update_mode char(1) default '0' comment '数据更新方式（0仅插入 1忽略重复 2存在则更新 3先删除再插入）';
 alter table tushare_workflow_step add column unique_key_fields text comment '唯一键字段配置（JSON格式，为空则自动检测）';
+
+-- ----------------------------
+-- 扩展流程步骤表，添加遍历并发数字段
+-- ----------------------------
+alter table tushare_workflow_step add column concurrency int(11) default 1 comment '遍历并发数（遍历模式下同时调用接口的组合数，1为串行）';
+
+-- ----------------------------
+-- 扩展接口配置表，添加接口调用配额字段
+-- ----------------------------
+alter table tushare_api_config add column rate_limit int(11) default null comment '每分钟调用次数上限（为空则使用全局默认配额）';
+
+-- ----------------------------
+-- 扩展流程步骤表，添加流式模式字段
+-- ----------------------------
+alter table tushare_workflow_step add column stream_mode char(1) default '0' comment '流式模式（0否 1是，遍历结果按批次提交并落盘，不在内存中保留完整结果）';
+
+-- ----------------------------
+-- 扩展接口配置表，添加接口调用方式字段
+-- ----------------------------
+alter table tushare_api_config add column client_mode char(1) default '0' comment '调用方式（0 SDK 1 异步HTTP客户端）';
+
+-- ----------------------------
+-- 扩展下载任务表，保存格式支持 parquet（Hive 分区数据集）
+-- ----------------------------
+alter table tushare_download_task modify column save_format varchar(20) default 'csv' comment '保存格式（csv/excel/json/parquet）';
+
+-- ----------------------------
+-- Tushare下载任务运行表（运行总览，应用启动时也会自动创建，已存在时不重建）
+-- ----------------------------
+create table if not exists tushare_download_run (
+  run_id              bigint(20)      not null auto_increment    comment '运行ID',
+  task_id             bigint(20)      not null                    comment '任务ID',
+  task_name           varchar(100)    not null                    comment '任务名称快照',
+  status              varchar(20)     not null                    comment '运行状态（PENDING/RUNNING/SUCCESS/FAILED/CANCELED/TIMEOUT）',
+  start_time          datetime                                    comment '开始时间',
+  end_time            datetime                                    comment '结束时间',
+  progress            int(11)         default 0                   comment '进度（0-100）',
+  total_records       int(11)         default 0                   comment '本次处理总记录数',
+  success_records     int(11)         default 0                   comment '成功记录数',
+  fail_records        int(11)         default 0                   comment '失败记录数',
+  error_message       text                                        comment '错误信息',
+  create_time         datetime                                    comment '创建时间',
+  update_time         datetime                                    comment '更新时间',
+  primary key (run_id)
+) engine=innodb auto_increment=1 comment = 'Tushare下载任务运行表（运行总览）';
+
+-- ----------------------------
+-- 扩展下载任务运行表，添加接口响应缓存统计字段
+-- ----------------------------
+alter table tushare_download_run add column cache_hits int(11) default 0 comment '接口响应缓存命中次数';
+alter table tushare_download_run add column cache_misses int(11) default 0 comment '接口响应缓存未命中次数';
+
+-- ----------------------------
+-- 扩展下载任务运行表，添加断点续跑字段
+-- ----------------------------
+alter table tushare_download_run add column checkpoint longtext comment '断点信息（JSON格式，记录已完成并提交的步骤及参数组合）';
+
+-- ----------------------------
+-- Tushare下载运行步骤断点表（每次运行的每个步骤一条，与步骤数据在同一事务中提交）
+-- ----------------------------
+create table if not exists tushare_download_run_checkpoint (
+  checkpoint_id       bigint(20)      not null auto_increment    comment '断点ID',
+  run_id              bigint(20)      not null                    comment '运行ID',
+  step_key            varchar(64)     not null                    comment '步骤键（步骤ID）',
+  completed           char(1)         default '0'                 comment '步骤是否已完成（0否 1是）',
+  combo_keys          longtext                                    comment '已提交的参数组合键（JSON数组，步骤未完成时记录）',
+  update_time         datetime                                    comment '更新时间',
+  primary key (checkpoint_id),
+  unique key uk_tushare_run_checkpoint_step (run_id, step_key)
+) engine=innodb auto_increment=1 comment = 'Tushare下载运行步骤断点表';